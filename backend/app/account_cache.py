@@ -0,0 +1,100 @@
+# app/account_cache.py
+import itertools
+import os
+from typing import Any, Dict, List, Optional
+
+from app.cache import SingleFlight, TTLCache
+from app.repository import get_repository
+
+
+class UserAccounts:
+	"""A user's accounts (balances already parsed to float) plus the default account id."""
+
+	def __init__(self, accounts: List[Dict[str, Any]]):
+		for account in accounts:
+			account["balance"] = _to_float(account.get("balance"))
+		self.accounts = accounts
+		self.default_account_id: Optional[str] = next((a["id"] for a in accounts if a.get("isDefault")), None)
+
+	@property
+	def primary_account_id(self) -> Optional[str]:
+		"""Default account, else any account; where new transactions are booked."""
+		if self.default_account_id is not None:
+			return self.default_account_id
+		return self.accounts[0]["id"] if self.accounts else None
+
+	def default_account(self) -> Optional[Dict[str, Any]]:
+		return next((dict(a) for a in self.accounts if a["id"] == self.default_account_id), None)
+
+	def list(self) -> List[Dict[str, Any]]:
+		# Copies, so callers cannot mutate the cached rows
+		return [dict(a) for a in self.accounts]
+
+
+def _to_float(value: Any) -> Optional[float]:
+	if value is None:
+		return None
+	try:
+		return float(value)
+	except (TypeError, ValueError):
+		return None
+
+
+# users.id -> UserAccounts. Balances can be changed by other writers (the web app),
+# so entries expire after ACCOUNT_CACHE_TTL seconds; our own writes invalidate explicitly.
+_cache = TTLCache(
+	maxsize=int(os.getenv("ACCOUNT_CACHE_SIZE", "10000")),
+	ttl=float(os.getenv("ACCOUNT_CACHE_TTL", "5")),
+)
+_inflight = SingleFlight()
+# users.id -> generation, bumped by every invalidation. A load only fills the cache if
+# the generation it started under is still current, so a load that raced an
+# invalidation cannot put the pre-write accounts back.
+_generations = TTLCache(maxsize=4 * _cache.maxsize)
+_generation_counter = itertools.count(1)
+
+
+def _generation(user_id: str) -> int:
+	generation = _generations.get(user_id)
+	if generation is None:
+		generation = next(_generation_counter)
+		_generations.set(user_id, generation)
+	return generation
+
+
+async def _load(user_id: str) -> UserAccounts:
+	repo = get_repository()
+	if repo is None:
+		raise ValueError("Supabase client not initialized")
+	return UserAccounts(await repo.list_accounts(user_id))
+
+
+async def _load_and_cache(user_id: str, generation: int) -> UserAccounts:
+	accounts = await _load(user_id)
+	if _generations.get(user_id) == generation:
+		_cache.set(user_id, accounts)
+	return accounts
+
+
+async def get_user_accounts(user_id: str) -> UserAccounts:
+	"""Read-through: one accounts query per user per TTL, shared by concurrent callers.
+
+	Changes made through this API are visible immediately (they invalidate);
+	changes by other writers show up within ACCOUNT_CACHE_TTL seconds.
+	"""
+	cached = _cache.get(user_id)
+	if cached is not None:
+		return cached
+	generation = _generation(user_id)
+	# Keyed by generation too: callers arriving after an invalidation start a new load
+	return await _inflight.do((user_id, generation), lambda: _load_and_cache(user_id, generation))
+
+
+def invalidate_user_accounts(user_id: str) -> None:
+	"""Call after creating, deleting or re-balancing one of the user's accounts."""
+	_cache.pop(user_id)
+	_generations.set(user_id, next(_generation_counter))
+
+
+def get_account_cache_stats() -> Dict[str, Any]:
+	return _cache.stats()
@@ -1,6 +1,8 @@
+import hmac
 import jwt
 import os
-from fastapi import HTTPException, Depends
+from typing import Optional
+from fastapi import HTTPException, Depends, Header
 from fastapi.security import HTTPBearer
 from dotenv import load_dotenv
 
@@ -19,4 +21,16 @@ async def verify_token(token: str = Depends(security)):
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Guard for operational endpoints: X-Admin-Token must match ADMIN_API_TOKEN.
+
+    Without ADMIN_API_TOKEN set the endpoints are disabled and answer 404.
+    """
+    expected = os.getenv("ADMIN_API_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
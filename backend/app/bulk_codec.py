@@ -0,0 +1,159 @@
+# app/bulk_codec.py
+import io
+import zipfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+	import pyarrow as pa
+except Exception:  # pyarrow is optional; Arrow bodies are rejected without it
+	pa = None  # type: ignore
+
+
+NPY_MEDIA_TYPE = "application/x-npy"
+NPZ_MEDIA_TYPE = "application/x-npz"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# Continuation token followed by a zero-length message
+ARROW_EOS = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+
+class BulkFormatError(ValueError):
+	"""The request body could not be decoded as the declared binary format."""
+
+
+def media_type_of(content_type: Optional[str]) -> str:
+	return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+def decode_npy(body: bytes) -> np.ndarray:
+	"""View an .npy body as an array without copying the payload bytes."""
+	buf = io.BytesIO(body)
+	try:
+		version = np.lib.format.read_magic(buf)
+		if version == (1, 0):
+			shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(buf)
+		else:
+			shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(buf)
+	except Exception as exc:
+		raise BulkFormatError(f"Invalid .npy body: {exc}")
+	if dtype.hasobject:
+		raise BulkFormatError("Object arrays are not accepted")
+	count = int(np.prod(shape)) if shape else 1
+	try:
+		flat = np.frombuffer(body, dtype=dtype, count=count, offset=buf.tell())
+	except ValueError as exc:
+		raise BulkFormatError(f"Truncated .npy body: {exc}")
+	return flat.reshape(shape, order="F" if fortran_order else "C")
+
+
+def decode_npz(body: bytes) -> Dict[str, np.ndarray]:
+	"""Named 1-D arrays (one per feature) from an .npz body."""
+	try:
+		with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+			return {name: np.asarray(archive[name]) for name in archive.files}
+	except (ValueError, OSError, zipfile.BadZipFile) as exc:
+		raise BulkFormatError(f"Invalid .npz body: {exc}")
+
+
+def decode_arrow_stream(body: bytes) -> Dict[str, np.ndarray]:
+	"""Columns of an Arrow IPC stream as NumPy arrays (zero-copy for null-free single-chunk numeric columns)."""
+	if pa is None:
+		raise BulkFormatError("Arrow bodies require pyarrow; install it or send .npy/.npz")
+	try:
+		table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+	except Exception as exc:
+		raise BulkFormatError(f"Invalid Arrow IPC stream: {exc}")
+	columns: Dict[str, np.ndarray] = {}
+	for name, column in zip(table.column_names, table.columns):
+		if column.num_chunks == 1:
+			columns[name] = column.chunk(0).to_numpy(zero_copy_only=False)
+		else:
+			columns[name] = column.to_numpy()
+	return columns
+
+
+def columns_to_matrix(columns: Dict[str, np.ndarray], feature_order: List[str]) -> np.ndarray:
+	for name, values in columns.items():
+		if np.ndim(values) != 1:
+			raise BulkFormatError(f"Column '{name}' must be 1-D, got shape {np.shape(values)}")
+	lengths = {len(values) for values in columns.values()}
+	if len(lengths) > 1:
+		raise BulkFormatError("All columns must have the same length")
+	n_rows = lengths.pop() if lengths else 0
+	matrix = np.zeros((n_rows, len(feature_order)), dtype=np.float64)
+	for j, name in enumerate(feature_order):
+		if name in columns:
+			try:
+				matrix[:, j] = columns[name]
+			except (TypeError, ValueError) as exc:
+				raise BulkFormatError(f"Column '{name}' is not numeric: {exc}")
+	return matrix
+
+
+def npy_header(n_rows: int) -> bytes:
+	buf = io.BytesIO()
+	# Writes the magic string as well as the padded header dict
+	np.lib.format.write_array_header_1_0(buf, {"descr": "<f8", "fortran_order": False, "shape": (n_rows,)})
+	return buf.getvalue()
+
+
+def encode_npy_stream(n_rows: int, chunks: Iterator[np.ndarray]) -> Iterator[bytes]:
+	"""Stream a 1-D float64 .npy: header first (the row count is known up front), then raw chunks."""
+	yield npy_header(n_rows)
+	for chunk in chunks:
+		yield np.ascontiguousarray(chunk, dtype="<f8").tobytes()
+
+
+def encode_npz(predictions: np.ndarray) -> bytes:
+	buf = io.BytesIO()
+	np.savez(buf, prediction=predictions.astype(np.float64, copy=False))
+	return buf.getvalue()
+
+
+def encode_arrow_stream(chunks: Iterator[np.ndarray]) -> Iterator[bytes]:
+	"""Stream predictions as Arrow IPC: schema message, one record batch per chunk, end-of-stream marker."""
+	schema = pa.schema([("prediction", pa.float64())])
+	yield schema.serialize().to_pybytes()
+	for chunk in chunks:
+		batch = pa.record_batch([pa.array(np.asarray(chunk, dtype=np.float64))], schema=schema)
+		yield batch.serialize().to_pybytes()
+	yield ARROW_EOS
+
+
+def score_in_chunks(model, matrix: np.ndarray, chunk_rows: int) -> Iterator[np.ndarray]:
+	"""Lazily score matrix in row chunks.
+
+	When this feeds a streamed reply, an error in a later chunk can only cut the
+	body short (the status line is already sent), so a body shorter than
+	X-Row-Count predictions means the request failed.
+	"""
+	for start in range(0, matrix.shape[0], chunk_rows):
+		pred = model.predict(matrix[start:start + chunk_rows])
+		yield np.asarray(pred, dtype=np.float64).reshape(-1)
+
+
+def decode_matrix(media_type: str, body: bytes, feature_order: Optional[List[str]], header_columns: Optional[List[str]]) -> Tuple[np.ndarray, List[str]]:
+	"""Decode a bulk body into an (n_rows, n_features) float64 matrix in model feature order."""
+	if media_type == NPY_MEDIA_TYPE:
+		values = decode_npy(body)
+		if values.ndim != 2:
+			raise BulkFormatError(f"Expected a 2-D array, got shape {values.shape}")
+		if values.dtype.kind not in "biuf":
+			raise BulkFormatError(f"Expected a numeric array, got dtype {values.dtype}")
+		columns = header_columns or feature_order
+		if not columns or len(columns) != values.shape[1]:
+			raise BulkFormatError("Column count does not match; send X-Feature-Columns with the .npy column names")
+		order = feature_order or sorted(columns)
+		if list(columns) == list(order):
+			return values.astype(np.float64, copy=False), order
+		return columns_to_matrix({name: values[:, i] for i, name in enumerate(columns)}, order), order
+
+	if media_type == NPZ_MEDIA_TYPE:
+		columns_map = decode_npz(body)
+	elif media_type == ARROW_STREAM_MEDIA_TYPE:
+		columns_map = decode_arrow_stream(body)
+	else:
+		raise BulkFormatError(f"Unsupported content type '{media_type}'")
+	order = feature_order or sorted(columns_map)
+	return columns_to_matrix(columns_map, order), order
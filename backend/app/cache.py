@@ -0,0 +1,120 @@
+# app/cache.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+_MISSING = object()
+
+
+class TTLCache:
+	"""Bounded in-process LRU cache with an optional per-entry TTL.
+
+	Not thread-safe; intended to be used from the event loop only.
+	A ttl of None (or <= 0) disables expiry and leaves pure LRU eviction.
+	"""
+
+	def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+		self.maxsize = max(1, int(maxsize))
+		self.ttl = ttl if ttl and ttl > 0 else None
+		self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def get(self, key: Hashable, default: Any = None) -> Any:
+		entry = self._data.get(key, _MISSING)
+		if entry is _MISSING:
+			self.misses += 1
+			return default
+		expires_at, value = entry
+		if expires_at and expires_at < time.monotonic():
+			del self._data[key]
+			self.misses += 1
+			return default
+		self._data.move_to_end(key)
+		self.hits += 1
+		return value
+
+	def set(self, key: Hashable, value: Any) -> None:
+		expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+		self._data[key] = (expires_at, value)
+		self._data.move_to_end(key)
+		while len(self._data) > self.maxsize:
+			self._data.popitem(last=False)
+			self.evictions += 1
+
+	def pop(self, key: Hashable, default: Any = None) -> Any:
+		entry = self._data.pop(key, _MISSING)
+		return default if entry is _MISSING else entry[1]
+
+	def clear(self) -> None:
+		self._data.clear()
+
+	def __contains__(self, key: Hashable) -> bool:
+		return key in self._data
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+	def stats(self) -> Dict[str, Any]:
+		lookups = self.hits + self.misses
+		return {
+			"size": len(self._data),
+			"maxsize": self.maxsize,
+			"ttl_seconds": self.ttl,
+			"hits": self.hits,
+			"misses": self.misses,
+			"evictions": self.evictions,
+			"hit_ratio": (self.hits / lookups) if lookups else 0.0,
+		}
+
+
+class _LeaderCancelled(Exception):
+	"""The in-flight call was cancelled with its caller; waiting callers run it again."""
+
+
+class SingleFlight:
+	"""Collapse concurrent calls for the same key into one awaited call.
+
+	The first caller runs the coroutine; callers arriving while it is in flight
+	await the same future and receive the same result (or exception). If the
+	first caller is cancelled (e.g. its client disconnected), the others are not:
+	one of them starts the call again.
+	"""
+
+	def __init__(self):
+		self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+		self.shared = 0
+
+	async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+		future = self._inflight.get(key)
+		while future is not None:
+			self.shared += 1
+			try:
+				return await asyncio.shield(future)
+			except _LeaderCancelled:
+				future = self._inflight.get(key)
+
+		future = asyncio.get_running_loop().create_future()
+		self._inflight[key] = future
+		try:
+			result = await fn()
+		except asyncio.CancelledError:
+			future.set_exception(_LeaderCancelled())
+			future.exception()
+			raise
+		except BaseException as exc:
+			future.set_exception(exc)
+			# Mark retrieved so an un-awaited future does not log a warning
+			future.exception()
+			raise
+		else:
+			future.set_result(result)
+			return result
+		finally:
+			self._inflight.pop(key, None)
+
+	def __len__(self) -> int:
+		return len(self._inflight)
@@ -0,0 +1,147 @@
+# app/inference_batcher.py
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.inference_executor import executor
+from app.metrics import Histogram
+from app.ml_model import ModelVersion
+
+
+class PredictionBatcher:
+	"""Coalesces concurrent single-row predictions into one model.predict call.
+
+	The first queued row opens a batch; it is sent once max_batch_size rows are
+	collected or max_wait_ms has passed, and each caller gets its own row's result.
+	Each row carries the model version pinned by its request, so rows queued across
+	a hot reload are still scored by the version they were built for.
+	"""
+
+	def __init__(self, max_batch_size: int = 64, max_wait_ms: float = 2.0):
+		self.max_batch_size = max(1, max_batch_size)
+		self.max_wait = max(0.0, max_wait_ms) / 1000.0
+		self._queue: Optional["asyncio.Queue[Tuple[List[float], ModelVersion, asyncio.Future, float]]"] = None
+		self._task: Optional["asyncio.Task[None]"] = None
+		self._inflight: Set["asyncio.Task[None]"] = set()
+		# The batch the run loop is collecting or dispatching; stop() fails whatever is unresolved
+		self._pending: List[Tuple[List[float], ModelVersion, asyncio.Future, float]] = []
+		self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128, 256])
+		self.queue_wait_ms = Histogram([0.1, 0.5, 1, 2, 5, 10, 25, 50, 100])
+
+	@property
+	def running(self) -> bool:
+		return self._task is not None and not self._task.done()
+
+	def start(self) -> None:
+		if self.running:
+			return
+		self._queue = asyncio.Queue()
+		self._task = asyncio.get_running_loop().create_task(self._run())
+
+	async def stop(self) -> None:
+		if self._task is None:
+			return
+		self._task.cancel()
+		try:
+			await self._task
+		except asyncio.CancelledError:
+			pass
+		self._task = None
+		if self._inflight:
+			await asyncio.gather(*self._inflight, return_exceptions=True)
+		# Fail anything collected or still queued rather than leaving callers hanging
+		stranded = self._pending
+		self._pending = []
+		while not self._queue.empty():
+			stranded.append(self._queue.get_nowait())
+		for _, _, future, _ in stranded:
+			if not future.done():
+				future.set_exception(RuntimeError("Prediction batcher stopped"))
+
+	async def submit(self, row: List[float], version: ModelVersion) -> Any:
+		future = asyncio.get_running_loop().create_future()
+		await self._queue.put((row, version, future, time.perf_counter()))
+		return await future
+
+	async def _collect(self) -> List[Tuple[List[float], ModelVersion, asyncio.Future, float]]:
+		batch = self._pending
+		batch.append(await self._queue.get())
+		deadline = time.perf_counter() + self.max_wait
+		while len(batch) < self.max_batch_size:
+			if not self._queue.empty():
+				batch.append(self._queue.get_nowait())
+				continue
+			remaining = deadline - time.perf_counter()
+			if remaining <= 0:
+				break
+			try:
+				batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+			except asyncio.TimeoutError:
+				break
+		return batch
+
+	async def _run(self) -> None:
+		while True:
+			batch = await self._collect()
+			started = time.perf_counter()
+			for *_, enqueued_at in batch:
+				self.queue_wait_ms.observe((started - enqueued_at) * 1000)
+			self.batch_sizes.observe(len(batch))
+			# Normally one group; two only while a model swap is in flight
+			groups: Dict[int, List[Tuple[List[float], ModelVersion, asyncio.Future, float]]] = {}
+			for item in batch:
+				groups.setdefault(id(item[1]), []).append(item)
+			for group in groups.values():
+				if executor.uses_pool(group[0][1]):
+					# Pool-backed models score off the loop; keep collecting the next batch meanwhile
+					task = asyncio.get_running_loop().create_task(self._predict(group[0][1], group))
+					self._inflight.add(task)
+					task.add_done_callback(self._inflight.discard)
+				else:
+					await self._predict(group[0][1], group)
+			self._pending = []
+
+	async def _predict(self, version: ModelVersion, batch: List[Tuple[List[float], ModelVersion, asyncio.Future, float]]) -> None:
+		try:
+			pred = await executor.predict(version, [row for row, *_ in batch])
+			results = pred.tolist()
+			if len(results) != len(batch):
+				raise RuntimeError(f"Model returned {len(results)} predictions for {len(batch)} rows")
+		except Exception as exc:
+			for _, _, future, _ in batch:
+				if not future.done():
+					future.set_exception(exc)
+			return
+		for (_, _, future, _), result in zip(batch, results):
+			if not future.done():
+				future.set_result(result)
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"running": self.running,
+			"max_batch_size": self.max_batch_size,
+			"max_wait_ms": self.max_wait * 1000,
+			"queue_depth": self._queue.qsize() if self._queue is not None else 0,
+			"batch_size": self.batch_sizes.snapshot(),
+			"queue_wait_ms": self.queue_wait_ms.snapshot(),
+		}
+
+
+batcher = PredictionBatcher(
+	max_batch_size=int(os.getenv("PREDICT_BATCH_MAX_SIZE", "64")),
+	max_wait_ms=float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "2")),
+)
+
+
+def start_prediction_batcher() -> None:
+	batcher.start()
+	print(f"🧮 Prediction batcher started (max_batch={batcher.max_batch_size}, max_wait={batcher.max_wait * 1000:g}ms)")
+
+
+async def shutdown_prediction_batcher() -> None:
+	await batcher.stop()
+
+
+def get_prediction_batcher_stats() -> Dict[str, Any]:
+	return batcher.stats()
@@ -0,0 +1,199 @@
+# app/inference_executor.py
+import asyncio
+import multiprocessing as mp
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.metrics import Histogram
+from app.ml_model import DummyModel, ModelVersion, load_model_artifact
+from app.simple_models import LinearSumModel
+
+
+class ExecutorSaturated(Exception):
+	"""Too many prediction chunks are already queued; the caller should retry later (503)."""
+
+
+# Per pool child: models by pinned artifact path, most recently used last.
+# Children never see the parent's registry; each task names the artifact it needs.
+_child_models: "OrderedDict[str, Any]" = OrderedDict()
+_child_cache_size = 2
+
+
+def _init_child(cache_size: int) -> None:
+	global _child_cache_size
+	_child_cache_size = max(1, cache_size)
+
+
+def _child_model(artifact_path: str) -> Any:
+	model = _child_models.get(artifact_path)
+	if model is None:
+		# Same loader as the parent, so joblib dumps are memory-mapped and shared again
+		model, _ = load_model_artifact(artifact_path)
+		_child_models[artifact_path] = model
+		while len(_child_models) > _child_cache_size:
+			_child_models.popitem(last=False)
+	else:
+		_child_models.move_to_end(artifact_path)
+	return model
+
+
+def _child_predict(artifact_path: str, matrix: np.ndarray) -> np.ndarray:
+	return np.asarray(_child_model(artifact_path).predict(matrix), dtype=np.float64).reshape(-1)
+
+
+def _child_load(artifact_path: str) -> bool:
+	return _child_model(artifact_path) is not None
+
+
+def is_cheap_model(model: Any) -> bool:
+	"""Models whose predict is a single matmul; shipping rows to a child would cost more than scoring them."""
+	if isinstance(model, (LinearSumModel, DummyModel)):
+		return True
+	# sklearn linear estimators expose coef_; ensembles expose estimators_
+	return hasattr(model, "coef_") and not hasattr(model, "estimators_")
+
+
+class InferenceExecutor:
+	"""Runs model.predict inline or in one long-lived process pool.
+
+	Children load each version from its pinned artifact (ModelVersion.artifact_path)
+	on first use and keep the model_cache_size most recent ones, so switching
+	between resident versions (reload, rollback) never restarts the pool.
+
+	mode "inline" always scores on the event loop, "process" always uses the pool,
+	"auto" uses the pool only for models that are not cheap (see is_cheap_model).
+	Batches of at least 2 * split_rows rows are split across the pool's workers.
+	At most max_pending chunks may be queued or running; beyond that requests
+	fail fast with ExecutorSaturated instead of queueing without bound. A pool
+	whose child died is replaced and the call retried once.
+	"""
+
+	def __init__(self, mode: str = "auto", workers: int = 0, max_pending: int = 0, split_rows: int = 10000, model_cache_size: int = 2):
+		self.mode = mode if mode in ("auto", "inline", "process") else "auto"
+		self.workers = max(1, workers or os.cpu_count() or 1)
+		self.max_pending = max_pending or self.workers * 4
+		self.split_rows = max(1, split_rows)
+		self.model_cache_size = max(1, model_cache_size)
+		self._pool: Optional[ProcessPoolExecutor] = None
+		self.pending = 0
+		self.inline_calls = 0
+		self.pool_calls = 0
+		self.pool_restarts = 0
+		self.rejected = 0
+		self.pool_ms = Histogram([1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000])
+
+	def uses_pool(self, version: ModelVersion) -> bool:
+		# A version without a pinned file (DummyModel fallback) cannot be loaded by the children
+		if self.mode == "inline" or not version.artifact_path:
+			return False
+		return self.mode == "process" or not is_cheap_model(version.model)
+
+	def _get_pool(self) -> ProcessPoolExecutor:
+		if self._pool is None:
+			self._pool = ProcessPoolExecutor(
+				max_workers=self.workers,
+				mp_context=mp.get_context("spawn"),
+				initializer=_init_child,
+				initargs=(self.model_cache_size,),
+			)
+			print(f"🧵 Inference pool started ({self.workers} workers)")
+		return self._pool
+
+	def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+		# Concurrent callers may all see the same broken pool; only the first replaces it
+		if self._pool is pool:
+			self._pool = None
+			self.pool_restarts += 1
+			pool.shutdown(wait=False, cancel_futures=True)
+			print("⚠️ Inference pool broken (a worker died); starting a new one")
+
+	def warm(self, version: Optional[ModelVersion]) -> None:
+		if version is not None and self.uses_pool(version):
+			# One load per worker slot, so the model is read now rather than on the first request
+			pool = self._get_pool()
+			for _ in range(self.workers):
+				pool.submit(_child_load, version.artifact_path)
+
+	async def _run_chunks(self, version: ModelVersion, parts: List[np.ndarray]) -> List[np.ndarray]:
+		loop = asyncio.get_running_loop()
+
+		def submit(pool: ProcessPoolExecutor) -> "asyncio.Future[List[np.ndarray]]":
+			return asyncio.gather(*(loop.run_in_executor(pool, _child_predict, version.artifact_path, part) for part in parts))
+
+		pool = self._get_pool()
+		try:
+			return await submit(pool)
+		except BrokenProcessPool:
+			self._discard_pool(pool)
+		# A child died (killed, out of memory); retry once on a fresh pool
+		return await submit(self._get_pool())
+
+	async def predict(self, version: ModelVersion, rows: Any) -> np.ndarray:
+		matrix = rows if isinstance(rows, np.ndarray) else np.asarray(rows, dtype=np.float64)
+		if not self.uses_pool(version) or matrix.shape[0] == 0:
+			self.inline_calls += 1
+			return np.asarray(version.model.predict(matrix), dtype=np.float64).reshape(-1)
+
+		n_chunks = min(self.workers, self.max_pending, max(1, matrix.shape[0] // self.split_rows))
+		if self.pending + n_chunks > self.max_pending:
+			self.rejected += 1
+			raise ExecutorSaturated(f"Inference queue is full ({self.pending} chunks pending)")
+
+		started = time.perf_counter()
+		self.pending += n_chunks
+		self.pool_calls += 1
+		try:
+			parts = np.array_split(matrix, n_chunks) if n_chunks > 1 else [matrix]
+			results = await self._run_chunks(version, parts)
+		finally:
+			self.pending -= n_chunks
+		self.pool_ms.observe((time.perf_counter() - started) * 1000)
+		return results[0] if len(results) == 1 else np.concatenate(results)
+
+	async def stop(self) -> None:
+		pool, self._pool = self._pool, None
+		if pool is not None:
+			await asyncio.to_thread(pool.shutdown, True, cancel_futures=True)
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"mode": self.mode,
+			"workers": self.workers,
+			"pool_running": self._pool is not None,
+			"model_cache_size": self.model_cache_size,
+			"pending_chunks": self.pending,
+			"max_pending": self.max_pending,
+			"split_rows": self.split_rows,
+			"inline_calls": self.inline_calls,
+			"pool_calls": self.pool_calls,
+			"pool_restarts": self.pool_restarts,
+			"rejected": self.rejected,
+			"pool_ms": self.pool_ms.snapshot(),
+		}
+
+
+executor = InferenceExecutor(
+	mode=os.getenv("PREDICT_EXECUTOR", "auto").strip().lower(),
+	workers=int(os.getenv("PREDICT_PROCESS_WORKERS", "0")),
+	max_pending=int(os.getenv("PREDICT_MAX_PENDING", "0")),
+	split_rows=int(os.getenv("PREDICT_SPLIT_ROWS", "10000")),
+	model_cache_size=int(os.getenv("ML_MODEL_KEEP_VERSIONS", "2")),
+)
+
+
+def start_inference_executor(version: Optional[ModelVersion]) -> None:
+	executor.warm(version)
+
+
+async def shutdown_inference_executor() -> None:
+	await executor.stop()
+
+
+def get_inference_executor_stats() -> Dict[str, Any]:
+	return executor.stats()
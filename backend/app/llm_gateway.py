@@ -0,0 +1,133 @@
+# app/llm_gateway.py
+import asyncio
+import hashlib
+import os
+from typing import Any, Dict, Optional
+
+from app.cache import SingleFlight, TTLCache
+
+try:
+	import google.generativeai as genai
+except Exception:  # Allow running with the stub provider only
+	genai = None  # type: ignore
+
+
+class GeminiProvider:
+	"""Calls Gemini through the SDK's native async API; the model object is built once."""
+
+	def __init__(self, model_name: str = "gemini-2.5-pro"):
+		if genai is None:
+			raise RuntimeError("google-generativeai is not installed")
+		self.model_name = model_name
+		self._model = genai.GenerativeModel(model_name)
+
+	async def generate(self, prompt: str) -> str:
+		response = await self._model.generate_content_async(prompt)
+		return response.text
+
+	def __repr__(self) -> str:
+		return f"<GeminiProvider: {self.model_name}>"
+
+
+class StubProvider:
+	"""Offline provider with a fixed latency, for benchmarks and local runs without network."""
+
+	def __init__(self, latency: float = 0.5):
+		self.latency = latency
+		self.calls = 0
+
+	async def generate(self, prompt: str) -> str:
+		self.calls += 1
+		await asyncio.sleep(self.latency)
+		digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+		return f"**Stub savings suggestions** (prompt {digest})\n\n1. Track your highest spending days.\n2. Set a weekly budget."
+
+	def __repr__(self) -> str:
+		return f"<StubProvider: {self.latency}s>"
+
+
+class LLMGateway:
+	"""Async front door for LLM calls.
+
+	Bounds concurrent provider calls with a semaphore, enforces a per-call timeout
+	(including time spent queued), collapses identical in-flight prompts into one
+	call and caches successful responses by prompt hash. generate() returns None
+	on timeout or provider error so callers can fall back.
+	"""
+
+	def __init__(self, provider: Any, max_concurrency: int = 4, timeout: float = 20.0, cache_size: int = 512, cache_ttl: Optional[float] = 3600.0):
+		self.provider = provider
+		self.timeout = timeout
+		self.max_concurrency = max(1, max_concurrency)
+		self._semaphore = asyncio.Semaphore(self.max_concurrency)
+		self._cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+		self._inflight = SingleFlight()
+		self.provider_calls = 0
+		self.timeouts = 0
+		self.errors = 0
+
+	async def _call_provider(self, prompt: str) -> str:
+		async with self._semaphore:
+			self.provider_calls += 1
+			return await self.provider.generate(prompt)
+
+	async def _generate_uncached(self, key: str, prompt: str) -> Optional[str]:
+		try:
+			text = await asyncio.wait_for(self._call_provider(prompt), self.timeout)
+		except asyncio.TimeoutError:
+			self.timeouts += 1
+			return None
+		except Exception as exc:
+			self.errors += 1
+			print(f"⚠️ LLM provider error: {exc}")
+			return None
+		self._cache.set(key, text)
+		return text
+
+	async def generate(self, prompt: str) -> Optional[str]:
+		key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+		cached = self._cache.get(key)
+		if cached is not None:
+			return cached
+		return await self._inflight.do(key, lambda: self._generate_uncached(key, prompt))
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"provider": repr(self.provider),
+			"max_concurrency": self.max_concurrency,
+			"timeout_seconds": self.timeout,
+			"provider_calls": self.provider_calls,
+			"timeouts": self.timeouts,
+			"errors": self.errors,
+			"inflight": len(self._inflight),
+			"deduplicated": self._inflight.shared,
+			"cache": self._cache.stats(),
+		}
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def _build_provider() -> Any:
+	provider = os.getenv("LLM_PROVIDER", "gemini").lower()
+	if provider == "stub":
+		return StubProvider(latency=float(os.getenv("LLM_STUB_LATENCY", "0.5")))
+	return GeminiProvider(os.getenv("LLM_MODEL", "gemini-2.5-pro"))
+
+
+def get_llm_gateway() -> LLMGateway:
+	"""Return the process-wide gateway, configured from LLM_* env vars on first use."""
+	global _gateway
+	if _gateway is None:
+		_gateway = LLMGateway(
+			_build_provider(),
+			max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+			timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "20")),
+			cache_size=int(os.getenv("LLM_CACHE_SIZE", "512")),
+			cache_ttl=float(os.getenv("LLM_CACHE_TTL", "3600")),
+		)
+	return _gateway
+
+
+def get_llm_gateway_stats() -> Optional[Dict[str, Any]]:
+	return _gateway.stats() if _gateway is not None else None
@@ -3,27 +3,47 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.database import connect_to_mongo, close_mongo_connection, db
-from app.ml_model import load_ml_model
+from app.ml_model import load_ml_model, start_model_watcher, stop_model_watcher, get_active_model_version
 from app.scheduler import start_scheduler, shutdown_scheduler
-from app.supabase_client import connect_to_supabase, close_supabase_connection, get_supabase
+from app.repository import connect_repository, close_repository, get_repository
+from app.user_resolver import get_resolver_stats
+from app.account_cache import get_account_cache_stats
+from app.pagination import NEXT_CURSOR_HEADER
+from app.smart_saving_agent import get_analysis_cache_stats
+from app.llm_gateway import get_llm_gateway_stats
+from app.inference_executor import start_inference_executor, shutdown_inference_executor, get_inference_executor_stats
+from app.prediction_cache import get_prediction_cache_stats
+from app.inference_batcher import start_prediction_batcher, shutdown_prediction_batcher, get_prediction_batcher_stats
+from app.notification_writer import start_notification_writer, shutdown_notification_writer, get_notification_writer_stats
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
 	# Startup
 	print("🚀 Starting up Financial Management API...")
 	# Initialize Supabase (new primary datastore)
-	connect_to_supabase()
+	connect_repository()
 	# Keep Mongo optional: do not fail if missing; legacy routes may still use it
 	await connect_to_mongo()
-	# Load ML model synchronously
+	# Load ML model synchronously; later versions are hot-swapped by the model registry
 	load_ml_model()
+	start_model_watcher()
+	# Preloads the model in the pool children when the model is too heavy to score inline
+	start_inference_executor(get_active_model_version())
+	start_prediction_batcher()
+	# Start batched notification writer
+	start_notification_writer()
 	# Start scheduler
 	start_scheduler()
 	yield
 	# Shutdown
 	print("🛑 Shutting down Financial Management API...")
 	shutdown_scheduler()
-	close_supabase_connection()
+	await shutdown_prediction_batcher()
+	await shutdown_inference_executor()
+	await stop_model_watcher()
+	# Flush buffered notifications before the repository goes away
+	await shutdown_notification_writer()
+	await close_repository()
 	await close_mongo_connection()
 
 app = FastAPI(
@@ -40,6 +60,8 @@ app.add_middleware(
 	allow_credentials=True,
 	allow_methods=["*"],
 	allow_headers=["*"],
+	# Lets browser clients read the pagination cursor of list endpoints
+	expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include routers
@@ -48,12 +70,14 @@ from app.routers import predict as predict_router
 from app.routers import loans as loans_router
 from app.routers import savings as savings_router
 from app.routers import accounts as accounts_router
+from app.routers import analytics as analytics_router
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(transactions.router, prefix="/api/transactions", tags=["transactions"])
 app.include_router(predict_router.router, prefix="/api", tags=["predict"])
 app.include_router(loans_router.router, prefix="/api", tags=["loans", "notifications"])
 app.include_router(savings_router.router, prefix="/api", tags=["savings"])
 app.include_router(accounts_router.router, prefix="/api", tags=["accounts"])
+app.include_router(analytics_router.router, prefix="/api", tags=["analytics"])
 
 @app.get("/")
 async def root():
@@ -63,18 +87,31 @@ async def root():
 async def health_check():
 	return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+	"""In-process cache and pipeline counters for monitoring"""
+	return {
+		"user_resolver": get_resolver_stats(),
+		"account_cache": get_account_cache_stats(),
+		"notification_writer": get_notification_writer_stats(),
+		"savings_cache": get_analysis_cache_stats(),
+		"llm_gateway": get_llm_gateway_stats(),
+		"prediction_batcher": get_prediction_batcher_stats(),
+		"inference_executor": get_inference_executor_stats(),
+		"prediction_cache": get_prediction_cache_stats(),
+	}
+
 @app.get("/test-db")
 async def test_database():
 	"""Test endpoint to check Supabase connectivity"""
-	sb = get_supabase()
+	repo = get_repository()
 	try:
-		if sb is None:
+		if repo is None:
 			return {"status": "Supabase client not initialized"}
 		# Simple select with limit 1 against users table
-		res = sb.table("users").select("id").limit(1).execute()
 		return {
 			"status": "Supabase connected",
-			"users_rows_seen": len(res.data or []),
+			"users_rows_seen": await repo.ping(),
 		}
 	except Exception as e:
 		return {"status": "Supabase error", "error": str(e)}
@@ -0,0 +1,29 @@
+# app/metrics.py
+import bisect
+from typing import Any, Dict, Sequence
+
+
+class Histogram:
+	"""Fixed-bucket histogram; bucket i counts observations <= bounds[i], the last bucket is +Inf."""
+
+	def __init__(self, bounds: Sequence[float]):
+		self.bounds = sorted(bounds)
+		self.counts = [0] * (len(self.bounds) + 1)
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+
+	def observe(self, value: float) -> None:
+		self.counts[bisect.bisect_left(self.bounds, value)] += 1
+		self.count += 1
+		self.total += value
+		self.max = max(self.max, value)
+
+	def snapshot(self) -> Dict[str, Any]:
+		labels = [f"le_{b:g}" for b in self.bounds] + ["le_inf"]
+		return {
+			"count": self.count,
+			"mean": (self.total / self.count) if self.count else 0.0,
+			"max": self.max,
+			"buckets": dict(zip(labels, self.counts)),
+		}
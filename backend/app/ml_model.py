@@ -1,7 +1,16 @@
 # app/ml_model.py
 import os
 import json
-from typing import Any, List, Optional
+import asyncio
+import hashlib
+import shutil
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.model_format import is_linear_artifact, load_linear_model
+from app.prediction_cache import clear_prediction_cache
 
 try:
 	from joblib import load as joblib_load
@@ -9,69 +18,344 @@ except Exception:  # joblib might not be installed yet
 	joblib_load = None  # type: ignore
 
 
+# Arrays in joblib.dump'ed files are mapped read-only instead of copied, so every
+# uvicorn worker shares one page-cache copy. Set ML_MODEL_MMAP_MODE=none to disable.
+MMAP_MODE: Optional[str] = os.getenv("ML_MODEL_MMAP_MODE", "r").strip().lower() or None
+if MMAP_MODE == "none":
+	MMAP_MODE = None
+
+# Each loaded version is pinned under a content-addressed name in this directory
+# (default: .model_versions next to the model file); pool children load the pin
+SNAPSHOT_DIR = os.getenv("ML_MODEL_SNAPSHOT_DIR", "")
+
+
 class DummyModel:
 	"""Fallback model used when no model file is present. Produces a simple heuristic.
 	For regression: sum of features; for classification-like models, returns 0.
 	"""
 
-	def predict(self, X):
-		if not X:
-			return []
+	def predict(self, X) -> np.ndarray:
 		# Simple sum heuristic
-		return [float(sum(row)) for row in X]
+		X_arr = X if isinstance(X, np.ndarray) and X.dtype == np.float64 else np.asarray(X, dtype=np.float64)
+		if X_arr.size == 0:
+			return np.zeros(len(X_arr), dtype=np.float64)
+		return X_arr.sum(axis=1)
 
 	def __repr__(self) -> str:
 		return "<DummyModel: sum-of-features>"
 
 
-_model: Any = None
-_feature_order: Optional[List[str]] = None
+class ModelLoadError(Exception):
+	"""A candidate model failed to load or validate; the active model is left untouched."""
+
+
+class ModelVersion:
+	"""An immutable, fully loaded and warmed model plus the feature order it expects.
+
+	Request handlers take one reference up front and use it to the end, so a swap
+	never changes the model underneath an in-flight prediction.
+	"""
+
+	def __init__(self, version: str, model: Any, feature_order: Optional[List[str]], model_path: Optional[str], features_path: Optional[str], artifact_path: Optional[str] = None):
+		self.version = version
+		self.model = model
+		self.feature_order = feature_order
+		self.model_path = model_path
+		self.features_path = features_path
+		# Immutable copy of exactly what was loaded; None when there is no file behind the model
+		self.artifact_path = artifact_path
+		self.loaded_at = datetime.utcnow()
+
+	def describe(self) -> Dict[str, Any]:
+		return {
+			"version": self.version,
+			"model": repr(self.model),
+			"feature_order": self.feature_order,
+			"model_path": self.model_path,
+			"artifact_path": self.artifact_path,
+			"memory_mapped": is_memory_mapped(self.model),
+			"loaded_at": self.loaded_at.isoformat(),
+		}
+
+
+def is_memory_mapped(model: Any) -> bool:
+	"""True if any top-level array attribute of the model is backed by a file mapping."""
+	for value in vars(model).values() if hasattr(model, "__dict__") else ():
+		if isinstance(value, np.memmap) or isinstance(getattr(value, "base", None), np.memmap):
+			return True
+	return False
+
+
+def load_model_file(path: str, mmap_mode: Optional[str] = MMAP_MODE) -> Any:
+	"""Unpickle a model file, memory-mapping its NumPy arrays when the file allows it.
+
+	Only arrays written by joblib.dump without compression can be mapped; plain
+	pickles and compressed dumps are loaded into private memory as before. Replace
+	model files by rename (os.replace), never in place: resident versions keep
+	reading the old inode through their mapping.
+	"""
+	if joblib_load is None:
+		raise ModelLoadError("joblib is not installed")
+	return joblib_load(path, mmap_mode=mmap_mode)
+
+
+def load_model_artifact(path: str) -> Tuple[Any, Optional[List[str]]]:
+	"""Load a model file by format: (model, feature order stored in the artifact or None)."""
+	if is_linear_artifact(path):
+		return load_linear_model(path)
+	return load_model_file(path), None
+
+
+_active: Optional[ModelVersion] = None
+_resident: List[ModelVersion] = []
 _model_path: Optional[str] = None
 _features_path: Optional[str] = None
+_keep_versions = max(1, int(os.getenv("ML_MODEL_KEEP_VERSIONS", "2")))
+_reload_lock: Optional[asyncio.Lock] = None
+_watch_task: Optional["asyncio.Task[None]"] = None
+_load_count = 0
+# File fingerprint of the last load attempt; the watcher reloads when it changes
+_seen_fingerprint: Optional[tuple] = None
 
 
-def load_ml_model() -> None:
-	"""Load the ML model and optional feature order from disk.
-	Respects env vars ML_MODEL_PATH and ML_FEATURES_PATH.
+def _resolve_paths() -> None:
+	global _model_path, _features_path
+	# The format follows the path: ML_MODEL_PATH=model.npz selects the pickle-free artifact,
+	# which is read into private memory; the memory-mapped joblib file stays the default
+	_model_path = os.getenv("ML_MODEL_PATH") or "model.pkl"
+	_features_path = os.getenv("ML_FEATURES_PATH", os.path.splitext(_model_path)[0] + "_features.json")
+
+
+def _file_fingerprint(path: Optional[str]) -> Optional[tuple]:
+	if not path or not os.path.exists(path):
+		return None
+	stat = os.stat(path)
+	return (stat.st_mtime_ns, stat.st_size)
+
+
+def _fingerprint() -> tuple:
+	return (_file_fingerprint(_model_path), _file_fingerprint(_features_path))
+
+
+def _file_digest(path: str) -> str:
+	# Chunked so hashing a large model file does not pull a private copy into memory
+	sha = hashlib.sha256()
+	with open(path, "rb") as f:
+		for block in iter(lambda: f.read(1 << 20), b""):
+			sha.update(block)
+	return sha.hexdigest()[:10]
+
+
+def _snapshot_artifact(path: str) -> Tuple[str, str]:
+	"""Pin the current content of path under an immutable name; returns (pinned path, digest).
+
+	A hard link shares the inode, so the pin costs no space and a later os.replace
+	of path cannot change it; the file is copied where linking is not possible.
+	Pins are content-addressed, so reloading the same model reuses its pin.
 	"""
-	global _model, _feature_order, _model_path, _features_path
+	directory = SNAPSHOT_DIR or os.path.join(os.path.dirname(os.path.abspath(path)), ".model_versions")
+	os.makedirs(directory, exist_ok=True)
+	tmp_path = os.path.join(directory, f".{os.getpid()}-{_load_count}.tmp")
+	try:
+		os.link(path, tmp_path)
+	except OSError:
+		shutil.copyfile(path, tmp_path)
+	digest = _file_digest(tmp_path)
+	pinned = os.path.join(directory, digest + os.path.splitext(path)[1])
+	if os.path.exists(pinned):
+		os.remove(tmp_path)
+	else:
+		os.replace(tmp_path, pinned)
+	return pinned, digest
+
+
+def _read_feature_order(path: Optional[str]) -> Optional[List[str]]:
+	if not path or not os.path.exists(path):
+		return None
+	with open(path, "r") as f:
+		data = json.load(f)
+	if isinstance(data, dict) and "features" in data and isinstance(data["features"], list):
+		return [str(x) for x in data["features"]]
+	if isinstance(data, list):
+		return [str(x) for x in data]
+	raise ModelLoadError(f"Unrecognized feature list format in {path}")
+
+
+def _validate_and_warm(model: Any, feature_order: Optional[List[str]]) -> None:
+	if not hasattr(model, "predict"):
+		raise ModelLoadError(f"Loaded object {type(model).__name__} has no predict()")
+	if feature_order is None:
+		return
+	if not feature_order or any(not name for name in feature_order) or len(set(feature_order)) != len(feature_order):
+		raise ModelLoadError("Feature list must be a non-empty list of unique names")
+	expected = getattr(model, "n_features_in_", None)
+	weights = getattr(model, "weights", None)
+	if expected is None and weights is not None:
+		expected = len(weights)
+	if expected is not None and int(expected) != len(feature_order):
+		raise ModelLoadError(f"Model expects {expected} features but the feature list has {len(feature_order)}")
+	# Warm-up call: exercises lazy init paths and proves the model accepts this width
+	pred = model.predict([[0.0] * len(feature_order)])
+	if len(pred) != 1:
+		raise ModelLoadError(f"Warm-up prediction returned {len(pred)} values for 1 row")
 
-	_model_path = os.getenv("ML_MODEL_PATH", "model.pkl")
-	_features_path = os.getenv("ML_FEATURES_PATH", os.path.splitext(_model_path)[0] + "_features.json")
 
-	# Load model
-	if _model_path and os.path.exists(_model_path) and joblib_load is not None:
+def _build_version(model_path: Optional[str], features_path: Optional[str], strict: bool) -> ModelVersion:
+	"""Load, validate and warm a model from disk. strict=False falls back to DummyModel (startup)."""
+	global _load_count
+	digest = "dummy"
+	artifact_path: Optional[str] = None
+	artifact_features: Optional[List[str]] = None
+	if model_path and os.path.exists(model_path) and (is_linear_artifact(model_path) or joblib_load is not None):
 		try:
-			_model = joblib_load(_model_path)
-			print(f"✅ Loaded ML model from {_model_path}")
+			try:
+				artifact_path, digest = _snapshot_artifact(model_path)
+			except OSError as exc:
+				# Still servable from this process; without a pin the pool children cannot load it
+				print(f"⚠️ Could not pin {model_path} ({exc}); this version is scored inline only")
+				digest = _file_digest(model_path)
+			model, artifact_features = load_model_artifact(artifact_path or model_path)
+			print(f"✅ Loaded ML model from {model_path}{' (memory-mapped)' if is_memory_mapped(model) else ''}")
 		except Exception as exc:
-			print(f"❌ Failed to load ML model at {_model_path}: {exc}")
-			_model = DummyModel()
+			if strict:
+				raise ModelLoadError(f"Failed to load ML model at {model_path}: {exc}")
+			print(f"❌ Failed to load ML model at {model_path}: {exc}")
+			model = DummyModel()
+			digest, artifact_path = "dummy", None
 	else:
+		if strict:
+			raise ModelLoadError(f"Model file not found at {model_path} (or joblib unavailable)")
 		if joblib_load is None:
 			print("⚠️ joblib not available; using DummyModel. Install joblib to load pickled models.")
 		else:
-			print(f"⚠️ Model file not found at {_model_path}; using DummyModel fallback.")
-		_model = DummyModel()
+			print(f"⚠️ Model file not found at {model_path}; using DummyModel fallback.")
+		model = DummyModel()
+
+	try:
+		if artifact_features is not None:
+			feature_order = artifact_features
+			features_path = None
+		else:
+			feature_order = _read_feature_order(features_path)
+		if feature_order is not None:
+			print(f"✅ Loaded feature order from {features_path or model_path}: {feature_order}")
+	except Exception as exc:
+		if strict:
+			raise ModelLoadError(f"Failed to load features list at {features_path}: {exc}")
+		print(f"⚠️ Failed to load features list at {features_path}: {exc}")
+		feature_order = None
+
+	try:
+		_validate_and_warm(model, feature_order)
+	except Exception as exc:
+		if strict:
+			raise ModelLoadError(str(exc))
+		print(f"⚠️ Model validation failed: {exc}")
+
+	_load_count += 1
+	return ModelVersion(f"v{_load_count}-{digest}", model, feature_order, model_path, features_path, artifact_path)
+
+
+def _activate(version: ModelVersion) -> None:
+	"""Atomically make version the active model and keep at most _keep_versions resident."""
+	global _active
+	if version not in _resident:
+		_resident.append(version)
+	_active = version
+	while len(_resident) > _keep_versions:
+		oldest = next(v for v in _resident if v is not _active)
+		_resident.remove(oldest)
+	# Keys carry the version too; clearing just frees the old version's entries at once
+	clear_prediction_cache()
+	print(f"🔁 Active ML model version: {version.version}")
+
+
+def load_ml_model() -> None:
+	"""Load the ML model and optional feature order from disk.
+	Respects env vars ML_MODEL_PATH and ML_FEATURES_PATH.
+	"""
+	global _seen_fingerprint
+	_resolve_paths()
+	_seen_fingerprint = _fingerprint()
+	_activate(_build_version(_model_path, _features_path, strict=False))
 
-	# Load feature order if provided
-	_feature_order = None
-	if _features_path and os.path.exists(_features_path):
+
+async def reload_ml_model() -> ModelVersion:
+	"""Load and warm the model files in a worker thread, then swap them in.
+
+	Raises ModelLoadError and keeps the current version if the candidate is invalid.
+	"""
+	global _reload_lock, _seen_fingerprint
+	if _reload_lock is None:
+		_reload_lock = asyncio.Lock()
+	async with _reload_lock:
+		_resolve_paths()
+		_seen_fingerprint = _fingerprint()
+		version = await asyncio.to_thread(_build_version, _model_path, _features_path, True)
+		_activate(version)
+		return version
+
+
+def rollback_ml_model(version: Optional[str] = None) -> ModelVersion:
+	"""Re-activate a resident version (default: the one loaded before the active one)."""
+	if version is not None:
+		target = next((v for v in _resident if v.version == version), None)
+		if target is None:
+			raise ModelLoadError(f"Version {version} is not resident")
+	else:
+		previous = [v for v in _resident if v is not _active]
+		if not previous:
+			raise ModelLoadError("No previous version is resident")
+		target = previous[-1]
+	_activate(target)
+	return target
+
+
+async def _watch_model_files(interval: float) -> None:
+	while True:
+		await asyncio.sleep(interval)
+		if _fingerprint() == _seen_fingerprint:
+			continue
 		try:
-			with open(_features_path, "r") as f:
-				data = json.load(f)
-				if isinstance(data, dict) and "features" in data and isinstance(data["features"], list):
-					_feature_order = [str(x) for x in data["features"]]
-				elif isinstance(data, list):
-					_feature_order = [str(x) for x in data]
-				print(f"✅ Loaded feature order from {_features_path}: {_feature_order}")
-		except Exception as exc:
-			print(f"⚠️ Failed to load features list at {_features_path}: {exc}")
+			await reload_ml_model()
+		except ModelLoadError as exc:
+			# The bad files' fingerprint is recorded, so we retry only once they change again
+			print(f"⚠️ Model reload skipped: {exc}")
+
+
+def start_model_watcher() -> None:
+	"""Poll ML_MODEL_PATH / ML_FEATURES_PATH every ML_MODEL_WATCH_INTERVAL seconds (0 disables)."""
+	global _watch_task
+	interval = float(os.getenv("ML_MODEL_WATCH_INTERVAL", "10"))
+	if interval <= 0 or _watch_task is not None:
+		return
+	_watch_task = asyncio.get_running_loop().create_task(_watch_model_files(interval))
+	print(f"👀 Watching model files every {interval:g}s")
+
+
+async def stop_model_watcher() -> None:
+	global _watch_task
+	if _watch_task is None:
+		return
+	_watch_task.cancel()
+	try:
+		await _watch_task
+	except asyncio.CancelledError:
+		pass
+	_watch_task = None
+
+
+def get_active_model_version() -> Optional[ModelVersion]:
+	return _active
+
+
+def list_model_versions() -> List[Dict[str, Any]]:
+	return [dict(v.describe(), active=v is _active) for v in _resident]
 
 
 def get_loaded_model() -> Any:
-	return _model
+	return _active.model if _active is not None else None
 
 
 def get_feature_order() -> Optional[List[str]]:
-	return _feature_order 
\ No newline at end of file
+	return _active.feature_order if _active is not None else None
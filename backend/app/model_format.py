@@ -0,0 +1,92 @@
+# app/model_format.py
+import json
+import os
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.simple_models import LinearSumModel
+
+
+# Pickle-free linear model artifact: a .npz holding only plain arrays, read with
+# allow_pickle=False, so loading it can never execute code. Zip members cannot be
+# memory-mapped, so each process holds its own copy of the weights; it is only
+# used when ML_MODEL_PATH names it explicitly.
+LINEAR_FORMAT = "linear-v1"
+LINEAR_SUFFIX = ".npz"
+
+
+class ModelFormatError(ValueError):
+	"""The file is not a valid linear model artifact, or the estimator cannot be exported."""
+
+
+def is_linear_artifact(path: str) -> bool:
+	return path.lower().endswith(LINEAR_SUFFIX)
+
+
+def save_linear_model(path: str, model: LinearSumModel, feature_order: Optional[Sequence[str]] = None) -> None:
+	"""Write weights, intercept and feature order as one .npz (write-then-rename)."""
+	weights = np.ascontiguousarray(model.weights, dtype=np.float64).reshape(-1)
+	if feature_order is not None and len(feature_order) != weights.shape[0]:
+		raise ModelFormatError(f"{len(feature_order)} feature names for {weights.shape[0]} weights")
+	meta = {"format": LINEAR_FORMAT, "features": list(feature_order) if feature_order is not None else None}
+	tmp_path = path + ".tmp"
+	with open(tmp_path, "wb") as f:
+		np.savez(
+			f,
+			weights=weights,
+			intercept=np.float64(model.intercept),
+			meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+		)
+	os.replace(tmp_path, path)
+
+
+def load_linear_model(path: str) -> Tuple[LinearSumModel, Optional[List[str]]]:
+	"""Read a linear artifact; returns the model and its feature order (None if not stored)."""
+	try:
+		with np.load(path, allow_pickle=False) as archive:
+			meta = json.loads(archive["meta"].tobytes().decode("utf-8"))
+			weights = np.array(archive["weights"], dtype=np.float64)
+			intercept = float(archive["intercept"])
+	except (KeyError, ValueError, OSError) as exc:
+		raise ModelFormatError(f"Invalid linear model artifact {path}: {exc}")
+	if meta.get("format") != LINEAR_FORMAT:
+		raise ModelFormatError(f"Unsupported model format {meta.get('format')!r} in {path}")
+	if weights.ndim != 1:
+		raise ModelFormatError(f"Expected 1-D weights, got shape {weights.shape}")
+	features = meta.get("features")
+	if features is not None and len(features) != weights.shape[0]:
+		raise ModelFormatError(f"{len(features)} feature names for {weights.shape[0]} weights")
+	return LinearSumModel(weights, intercept), [str(x) for x in features] if features is not None else None
+
+
+def from_sklearn(estimator: Any) -> Tuple[LinearSumModel, Optional[List[str]]]:
+	"""Convert a fitted single-output sklearn linear regressor (LinearRegression, Ridge,
+	Lasso, ElasticNet, SGDRegressor, ...) into a LinearSumModel plus its feature names."""
+	name = type(estimator).__name__
+	if not _is_regressor(estimator):
+		# Classifiers (LogisticRegression, LinearSVC, ...) also have coef_, but X @ coef_ is a
+		# decision function, not a prediction
+		raise ModelFormatError(f"{name} is not a regressor; only linear regressors can be exported")
+	coef = getattr(estimator, "coef_", None)
+	if coef is None:
+		raise ModelFormatError(f"{name} has no coef_; only fitted linear estimators can be exported")
+	coef = np.asarray(coef, dtype=np.float64)
+	if coef.ndim == 2 and coef.shape[0] == 1:
+		coef = coef[0]
+	if coef.ndim != 1:
+		raise ModelFormatError(f"{name} predicts {coef.shape[0]} targets (coef_ shape {coef.shape}); only single-output regressors can be exported")
+	intercept = np.asarray(getattr(estimator, "intercept_", 0.0), dtype=np.float64).reshape(-1)
+	if intercept.size > 1:
+		raise ModelFormatError(f"Only single-output estimators are supported (intercept_ shape {intercept.shape})")
+	names = getattr(estimator, "feature_names_in_", None)
+	features = [str(x) for x in names] if names is not None else None
+	return LinearSumModel(coef, float(intercept[0]) if intercept.size else 0.0), features
+
+
+def _is_regressor(estimator: Any) -> bool:
+	try:
+		from sklearn.base import is_regressor
+	except ImportError:
+		return getattr(estimator, "_estimator_type", None) == "regressor"
+	return is_regressor(estimator)
@@ -1,5 +1,5 @@
 # app/models.py
-from pydantic import BaseModel, Field, ConfigDict, field_validator
+from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator
 from typing import Optional, Literal, Dict, List
 from datetime import datetime
 from bson import ObjectId
@@ -69,12 +69,36 @@ class PredictRequest(BaseModel):
 
 
 class PredictBatchRequest(BaseModel):
-    batch: List[Dict[str, float]] = Field(..., description="List of feature mappings for batch prediction")
+    """Batch prediction input in one of three layouts:
+
+    - batch: list of {feature: value} mappings (row-wise dicts)
+    - columns + rows: column names once, then each row as an array in that column order
+    - data: {feature: [values...]} with one array per feature
+    """
+    batch: Optional[List[Dict[str, float]]] = Field(default=None, description="List of feature mappings for batch prediction")
+    columns: Optional[List[str]] = Field(default=None, description="Column names for the arrays in rows")
+    rows: Optional[List[List[float]]] = Field(default=None, description="Rows as arrays ordered like columns")
+    data: Optional[Dict[str, List[float]]] = Field(default=None, description="Per-feature value arrays of equal length")
+
+    @model_validator(mode="after")
+    def check_layout(self):
+        layouts = [self.batch is not None, self.rows is not None, self.data is not None]
+        if sum(layouts) != 1:
+            raise ValueError("Provide exactly one of 'batch', 'columns'+'rows' or 'data'")
+        if self.rows is not None:
+            if not self.columns:
+                raise ValueError("'rows' requires 'columns'")
+            if len(set(self.columns)) != len(self.columns):
+                raise ValueError("'columns' contains duplicate names")
+        elif self.columns is not None:
+            raise ValueError("'columns' is only valid together with 'rows'")
+        return self
 
 
 class PredictResponse(BaseModel):
     predictions: List[float]
     used_feature_order: Optional[List[str]] = None
+    model_version: Optional[str] = None
 
 
 # Loan/IOU Models
@@ -133,4 +157,10 @@ class NotificationModel(BaseModel):
             return str(value)
         if isinstance(value, str) and ObjectId.is_valid(value):
             return str(ObjectId(value))
-        return value
\ No newline at end of file
+        return value
+
+
+# Savings Models
+class SavingsBatchRequest(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, max_length=1000)
+    days: int = Field(30, ge=7, le=365)
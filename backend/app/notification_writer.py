@@ -0,0 +1,201 @@
+# app/notification_writer.py
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.repository import get_repository
+
+
+class NotificationWriter:
+	"""Write-behind buffer that turns per-event notification inserts into bulk inserts.
+
+	Rows are flushed when max_batch rows are buffered or flush_interval seconds
+	have passed since the first buffered row, whichever comes first. When
+	max_buffer rows are waiting, enqueue() blocks until the flusher catches up.
+
+	A failed insert is retried up to max_retries times with exponential backoff;
+	a batch that still fails is appended to dead_letter_path (JSON lines) so the
+	rows can be replayed instead of being lost.
+	"""
+
+	def __init__(
+		self,
+		max_batch: int = 500,
+		flush_interval: float = 1.0,
+		max_buffer: int = 10000,
+		max_retries: int = 5,
+		retry_base_delay: float = 0.5,
+		retry_max_delay: float = 30.0,
+		dead_letter_path: Optional[str] = None,
+	):
+		self.max_batch = max(1, max_batch)
+		self.flush_interval = flush_interval
+		self.max_buffer = max(self.max_batch, max_buffer)
+		self.max_retries = max(0, max_retries)
+		self.retry_base_delay = retry_base_delay
+		self.retry_max_delay = retry_max_delay
+		self.dead_letter_path = dead_letter_path
+		self._queue: Optional["asyncio.Queue[Dict[str, Any]]"] = None
+		self._task: Optional["asyncio.Task[None]"] = None
+		self._stopping = False
+		self.flushes = 0
+		self.rows_flushed = 0
+		self.rows_failed = 0
+		self.rows_dead_lettered = 0
+		self.retries = 0
+		self.blocked_enqueues = 0
+		self.last_flush_ms = 0.0
+		self.max_flush_ms = 0.0
+		self._total_flush_ms = 0.0
+
+	@property
+	def running(self) -> bool:
+		return self._task is not None and not self._task.done()
+
+	def start(self) -> None:
+		if self.running:
+			return
+		self._queue = asyncio.Queue(maxsize=self.max_buffer)
+		self._stopping = False
+		self._task = asyncio.get_running_loop().create_task(self._run())
+
+	async def stop(self) -> None:
+		"""Flush everything still buffered, then stop the flusher task."""
+		if self._task is None:
+			return
+		self._stopping = True
+		await self._task
+		self._task = None
+
+	async def enqueue(self, row: Dict[str, Any]) -> None:
+		if self._queue.full():
+			self.blocked_enqueues += 1
+		await self._queue.put(row)
+
+	def _drain(self, limit: int) -> List[Dict[str, Any]]:
+		batch: List[Dict[str, Any]] = []
+		while len(batch) < limit and not self._queue.empty():
+			batch.append(self._queue.get_nowait())
+		return batch
+
+	async def _run(self) -> None:
+		loop = asyncio.get_running_loop()
+		while True:
+			batch = self._drain(self.max_batch)
+			deadline = loop.time() + self.flush_interval
+			while len(batch) < self.max_batch and not self._stopping:
+				remaining = deadline - loop.time()
+				if remaining <= 0:
+					break
+				try:
+					batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+				except asyncio.TimeoutError:
+					break
+				batch.extend(self._drain(self.max_batch - len(batch)))
+			if batch:
+				await self._flush(batch)
+			elif self._stopping:
+				return
+
+	async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+		started = time.perf_counter()
+		attempt = 0
+		while True:
+			try:
+				repo = get_repository()
+				if repo is None:
+					raise RuntimeError("Supabase client not initialized")
+				await repo.insert_notifications(batch)
+				self.rows_flushed += len(batch)
+				break
+			except Exception as exc:
+				if attempt >= self.max_retries:
+					self.rows_failed += len(batch)
+					print(f"❌ Failed to flush {len(batch)} notifications after {attempt + 1} attempts: {exc}")
+					self._dead_letter(batch)
+					break
+				delay = min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt))
+				attempt += 1
+				self.retries += 1
+				print(f"⚠️ Notification flush failed ({exc}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+				await asyncio.sleep(delay)
+		elapsed_ms = (time.perf_counter() - started) * 1000
+		self.flushes += 1
+		self.last_flush_ms = elapsed_ms
+		self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+		self._total_flush_ms += elapsed_ms
+
+	def _dead_letter(self, batch: List[Dict[str, Any]]) -> None:
+		if not self.dead_letter_path:
+			return
+		try:
+			with open(self.dead_letter_path, "a", encoding="utf-8") as fh:
+				for row in batch:
+					fh.write(json.dumps(row, default=str) + "\n")
+				fh.flush()
+				os.fsync(fh.fileno())
+			self.rows_dead_lettered += len(batch)
+			print(f"📝 {len(batch)} notifications written to {self.dead_letter_path} for replay")
+		except OSError as exc:
+			print(f"❌ Could not write notification dead-letter file {self.dead_letter_path}: {exc}")
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"running": self.running,
+			"buffer_depth": self._queue.qsize() if self._queue is not None else 0,
+			"max_buffer": self.max_buffer,
+			"max_batch": self.max_batch,
+			"flushes": self.flushes,
+			"rows_flushed": self.rows_flushed,
+			"rows_failed": self.rows_failed,
+			"rows_dead_lettered": self.rows_dead_lettered,
+			"retries": self.retries,
+			"blocked_enqueues": self.blocked_enqueues,
+			"last_flush_ms": round(self.last_flush_ms, 2),
+			"avg_flush_ms": round(self._total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+			"max_flush_ms": round(self.max_flush_ms, 2),
+		}
+
+
+writer = NotificationWriter(
+	max_batch=int(os.getenv("NOTIFICATION_BATCH_SIZE", "500")),
+	flush_interval=float(os.getenv("NOTIFICATION_FLUSH_INTERVAL", "1.0")),
+	max_buffer=int(os.getenv("NOTIFICATION_BUFFER_SIZE", "10000")),
+	max_retries=int(os.getenv("NOTIFICATION_FLUSH_RETRIES", "5")),
+	dead_letter_path=os.getenv("NOTIFICATION_DEAD_LETTER_PATH", "notifications_dead_letter.jsonl") or None,
+)
+
+
+async def enqueue_notification(user_id: str, loan_id: Optional[str], type_: str, message: str) -> None:
+	row = {
+		"user_id": user_id,
+		"loan_id": loan_id,
+		"type": type_,
+		"message": message,
+		"created_at": datetime.utcnow().isoformat(),
+		"read": False,
+	}
+	if writer.running:
+		await writer.enqueue(row)
+		return
+	# Writer not started (e.g. scripts): fall back to a direct insert
+	repo = get_repository()
+	if repo is not None:
+		await repo.insert_notifications([row])
+
+
+def start_notification_writer() -> None:
+	writer.start()
+	print(f"📬 Notification writer started (batch={writer.max_batch}, interval={writer.flush_interval}s)")
+
+
+async def shutdown_notification_writer() -> None:
+	await writer.stop()
+	print(f"📬 Notification writer flushed and stopped ({writer.rows_flushed} rows written)")
+
+
+def get_notification_writer_stats() -> Dict[str, Any]:
+	return writer.stats()
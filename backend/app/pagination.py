@@ -0,0 +1,40 @@
+# app/pagination.py
+import base64
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+
+
+# Response header carrying the cursor of the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+	"""Opaque cursor for the sort key of the last row of a page."""
+	raw = json.dumps([str(v) for v in values], separators=(",", ":")).encode("utf-8")
+	return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[Tuple[str, ...]]:
+	"""Sort key encoded in cursor, or None for the first page; 400 if it was not issued by us."""
+	if not cursor:
+		return None
+	try:
+		raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+		values = json.loads(raw)
+	except (ValueError, TypeError):
+		raise HTTPException(status_code=400, detail="Invalid cursor")
+	if not isinstance(values, list) or len(values) != size or not all(isinstance(v, str) for v in values):
+		raise HTTPException(status_code=400, detail="Invalid cursor")
+	return tuple(values)
+
+
+def finish_page(rows: List[Dict[str, Any]], limit: int, sort_columns: Sequence[str], response: Response) -> List[Dict[str, Any]]:
+	"""Trim a limit + 1 fetch to limit rows and set the next-page cursor header when more rows exist."""
+	if len(rows) <= limit:
+		return rows
+	rows = rows[:limit]
+	response.headers[NEXT_CURSOR_HEADER] = encode_cursor([rows[-1][column] for column in sort_columns])
+	return rows
@@ -0,0 +1,48 @@
+# app/prediction_cache.py
+import hashlib
+import os
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.cache import TTLCache
+
+
+# Opt-in: PREDICT_CACHE_SIZE=0 (the default) disables the cache entirely
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "0"))
+PREDICT_CACHE_TTL = float(os.getenv("PREDICT_CACHE_TTL", "300"))
+
+_cache: Optional[TTLCache] = TTLCache(PREDICT_CACHE_SIZE, PREDICT_CACHE_TTL) if PREDICT_CACHE_SIZE > 0 else None
+_invalidations = 0
+
+
+def _key(model_version: str, row: Sequence[float]) -> Tuple[str, bytes]:
+	# Adding 0.0 folds -0.0 into 0.0 so equal rows hash the same
+	values = np.asarray(row, dtype=np.float64) + 0.0
+	return model_version, hashlib.blake2b(values.tobytes(), digest_size=16).digest()
+
+
+def get_cached_prediction(model_version: str, row: Sequence[float]) -> Optional[float]:
+	"""Prediction for an ordered feature row under model_version, if cached."""
+	if _cache is None:
+		return None
+	return _cache.get(_key(model_version, row))
+
+
+def cache_prediction(model_version: str, row: Sequence[float], value: float) -> None:
+	if _cache is not None:
+		_cache.set(_key(model_version, row), value)
+
+
+def clear_prediction_cache() -> None:
+	"""Drop every cached prediction; called whenever the active model changes."""
+	global _invalidations
+	if _cache is not None and len(_cache):
+		_cache.clear()
+		_invalidations += 1
+
+
+def get_prediction_cache_stats() -> Dict[str, Any]:
+	if _cache is None:
+		return {"enabled": False}
+	return {"enabled": True, "invalidations": _invalidations, **_cache.stats()}
@@ -0,0 +1,449 @@
+# app/repository.py
+import os
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+try:
+	import httpx
+except Exception:  # Allow import-time failures during install steps
+	httpx = None  # type: ignore
+
+
+load_dotenv()
+
+Params = List[Tuple[str, str]]
+
+# Max ids per in.() filter; keeps request URLs well under proxy limits
+USER_FILTER_CHUNK = 200
+
+
+class RepositoryError(Exception):
+	"""Raised when Supabase (PostgREST) rejects a request."""
+
+
+def _quote(value: Any) -> str:
+	"""Quote a value for use inside a PostgREST or=() / in.() list."""
+	text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+	return f'"{text}"'
+
+
+def _iso(value: datetime) -> str:
+	return value.isoformat()
+
+
+def _keyset(column: str, after: Tuple[str, str], descending: bool) -> Tuple[str, str]:
+	"""Filter param for rows strictly past (column, id) = after in (column, id) order."""
+	op = "lt" if descending else "gt"
+	value, id_ = _quote(after[0]), _quote(after[1])
+	return "or", f"({column}.{op}.{value},and({column}.eq.{value},id.{op}.{id_}))"
+
+
+class SupabaseRepository:
+	"""Async data access over Supabase's PostgREST API.
+
+	A single pooled, keep-alive httpx.AsyncClient is shared by every request so
+	handlers never block the event loop on database round trips.
+	"""
+
+	def __init__(self, url: str, key: str, timeout: float = 10.0, max_connections: int = 50):
+		self._client = httpx.AsyncClient(
+			base_url=url.rstrip("/") + "/rest/v1",
+			headers={
+				"apikey": key,
+				"Authorization": f"Bearer {key}",
+				"Content-Type": "application/json",
+			},
+			timeout=timeout,
+			limits=httpx.Limits(
+				max_connections=max_connections,
+				max_keepalive_connections=max_connections,
+				keepalive_expiry=30.0,
+			),
+		)
+
+	async def close(self) -> None:
+		await self._client.aclose()
+
+	# ---------- low-level helpers ----------
+	async def _request(self, method: str, table: str, params: Optional[Params] = None, json: Any = None, prefer: Optional[str] = None) -> Any:
+		headers = {"Prefer": prefer} if prefer else None
+		res = await self._client.request(method, f"/{table}", params=params, json=json, headers=headers)
+		if res.status_code >= 400:
+			raise RepositoryError(f"{method} {table} failed ({res.status_code}): {res.text}")
+		if not res.content:
+			return None
+		return res.json()
+
+	async def _select(self, table: str, params: Params) -> List[Dict[str, Any]]:
+		return await self._request("GET", table, params=params) or []
+
+	async def _select_with_count(self, table: str, params: Params) -> Tuple[List[Dict[str, Any]], int]:
+		"""Select rows plus the exact total matching count (from the Content-Range header)."""
+		res = await self._client.get(f"/{table}", params=params, headers={"Prefer": "count=exact"})
+		if res.status_code >= 400:
+			raise RepositoryError(f"GET {table} failed ({res.status_code}): {res.text}")
+		total = res.headers.get("content-range", "*/0").rsplit("/", 1)[-1]
+		return res.json() or [], int(total) if total.isdigit() else 0
+
+	async def _insert(self, table: str, rows: Any, returning: bool = True) -> List[Dict[str, Any]]:
+		prefer = "return=representation" if returning else "return=minimal"
+		return await self._request("POST", table, json=rows, prefer=prefer) or []
+
+	async def _update(self, table: str, params: Params, values: Dict[str, Any], returning: bool = True) -> List[Dict[str, Any]]:
+		prefer = "return=representation" if returning else "return=minimal"
+		return await self._request("PATCH", table, params=params, json=values, prefer=prefer) or []
+
+	async def _rpc(self, function: str, args: Dict[str, Any]) -> Any:
+		"""Call a Postgres function exposed by PostgREST (POST /rpc/<function>)."""
+		return await self._request("POST", f"rpc/{function}", json=args)
+
+	async def ping(self) -> int:
+		rows = await self._select("users", [("select", "id"), ("limit", "1")])
+		return len(rows)
+
+	# ---------- users ----------
+	async def get_user(self, user_identifier: str, columns: str = "*") -> Optional[Dict[str, Any]]:
+		ident = _quote(user_identifier)
+		rows = await self._select("users", [
+			("select", columns),
+			("or", f"(clerkUserId.eq.{ident},email.eq.{ident})"),
+			("limit", "1"),
+		])
+		return rows[0] if rows else None
+
+	async def get_user_id(self, user_identifier: str) -> Optional[str]:
+		row = await self.get_user(user_identifier, columns="id")
+		return row["id"] if row else None
+
+	async def find_user(self, clerk_user_id: Optional[str], email: str) -> Optional[Dict[str, Any]]:
+		conditions = [f"email.eq.{_quote(email)}"]
+		if clerk_user_id:
+			conditions.insert(0, f"clerkUserId.eq.{_quote(clerk_user_id)}")
+		rows = await self._select("users", [("select", "*"), ("or", f"({','.join(conditions)})"), ("limit", "1")])
+		return rows[0] if rows else None
+
+	async def insert_user(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+		rows = await self._insert("users", payload)
+		return rows[0] if rows else None
+
+	async def list_users(self, limit: int = 100, after_id: Optional[str] = None) -> List[Dict[str, Any]]:
+		"""One keyset page of users ordered by id."""
+		params: Params = [("select", "id,clerkUserId,email,name")]
+		if after_id is not None:
+			params.append(("id", f"gt.{after_id}"))
+		params += [("order", "id.asc"), ("limit", str(limit))]
+		return await self._select("users", params)
+
+	# ---------- accounts ----------
+	async def list_accounts(self, user_id: str, columns: str = "id,name,type,balance,isDefault") -> List[Dict[str, Any]]:
+		return await self._select("accounts", [
+			("select", columns),
+			("userId", f"eq.{user_id}"),
+			("order", "createdAt.desc"),
+		])
+
+	async def get_default_account(self, user_id: str, columns: str = "id,name,type,balance,isDefault") -> Optional[Dict[str, Any]]:
+		rows = await self._select("accounts", [
+			("select", columns),
+			("userId", f"eq.{user_id}"),
+			("isDefault", "eq.true"),
+			("limit", "1"),
+		])
+		return rows[0] if rows else None
+
+	async def insert_account(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+		rows = await self._insert("accounts", payload)
+		return rows[0] if rows else None
+
+	async def increment_account_balance(self, account_id: str, delta: float) -> Optional[float]:
+		"""Atomically add delta to an account's balance; returns the new balance (None if no such account)."""
+		result = await self._rpc("increment_account_balance", {"p_account_id": account_id, "p_delta": delta})
+		return float(result) if result is not None else None
+
+	async def get_balance_total(self, user_id: str) -> Optional[Dict[str, Any]]:
+		rows = await self._select("user_balance_totals", [
+			("select", "total_balance,account_count,updated_at"),
+			("user_id", f"eq.{user_id}"),
+			("limit", "1"),
+		])
+		return rows[0] if rows else None
+
+	async def reconcile_balance_totals(self, fix: bool = False) -> List[Dict[str, Any]]:
+		"""Users whose stored balance total differs from a full recompute (corrected when fix)."""
+		return await self._rpc("reconcile_user_balance_totals", {"p_fix": fix}) or []
+
+	# ---------- transactions ----------
+	async def insert_transaction(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+		rows = await self._insert("transactions", payload)
+		return rows[0] if rows else None
+
+	async def insert_transactions(self, rows: List[Dict[str, Any]]) -> int:
+		"""Insert many transactions in one request; all rows must share the same keys."""
+		if not rows:
+			return 0
+		await self._insert("transactions", rows, returning=False)
+		return len(rows)
+
+	async def get_transactions(
+		self,
+		user_id: str,
+		since: Optional[datetime] = None,
+		until: Optional[datetime] = None,
+		type_: Optional[str] = None,
+		columns: str = "*",
+		descending: bool = True,
+		limit: Optional[int] = None,
+	) -> List[Dict[str, Any]]:
+		params: Params = [("select", columns), ("userId", f"eq.{user_id}")]
+		if type_:
+			params.append(("type", f"eq.{type_}"))
+		if since is not None:
+			params.append(("date", f"gte.{_iso(since)}"))
+		if until is not None:
+			params.append(("date", f"lte.{_iso(until)}"))
+		params.append(("order", "date.desc" if descending else "date.asc"))
+		if limit is not None:
+			params.append(("limit", str(limit)))
+		return await self._select("transactions", params)
+
+	async def list_transactions_page(self, user_id: str, limit: int = 100, after: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+		"""One keyset page of a user's transactions, newest first by (date, id)."""
+		params: Params = [("select", "*"), ("userId", f"eq.{user_id}")]
+		if after is not None:
+			params.append(_keyset("date", after, descending=True))
+		params += [("order", "date.desc,id.desc"), ("limit", str(limit))]
+		return await self._select("transactions", params)
+
+	async def iter_transaction_pages(
+		self,
+		user_id: str,
+		columns: str = "*",
+		page_size: int = 1000,
+		since: Optional[datetime] = None,
+		type_: Optional[str] = None,
+	) -> AsyncIterator[List[Dict[str, Any]]]:
+		"""Every transaction of a user (dated since / of type_, if given), oldest first, one page at a time.
+
+		Keyset-paged on (date, id), so each page is an index range scan however
+		deep into the history it is; columns must include date and id.
+		"""
+		after: Optional[Tuple[str, str]] = None
+		while True:
+			params: Params = [("select", columns), ("userId", f"eq.{user_id}")]
+			if since is not None:
+				params.append(("date", f"gte.{_iso(since)}"))
+			if type_:
+				params.append(("type", f"eq.{type_}"))
+			if after is not None:
+				params.append(_keyset("date", after, descending=False))
+			params += [("order", "date.asc,id.asc"), ("limit", str(page_size))]
+			page = await self._select("transactions", params)
+			if page:
+				yield page
+			if len(page) < page_size:
+				return
+			after = (page[-1]["date"], page[-1]["id"])
+
+	async def get_expense_rows_for_users(
+		self,
+		user_ids: Sequence[str],
+		since: datetime,
+		until: datetime,
+		page_size: int = 1000,
+	) -> List[Dict[str, Any]]:
+		"""All EXPENSE rows (userId, date, amount) for many users, keyset-paged by id.
+
+		Users are queried in chunks so the in.() filter stays within URL length limits.
+		"""
+		rows: List[Dict[str, Any]] = []
+		for start in range(0, len(user_ids), USER_FILTER_CHUNK):
+			chunk = user_ids[start:start + USER_FILTER_CHUNK]
+			rows.extend(await self._expense_rows_page_walk(chunk, since, until, page_size))
+		return rows
+
+	async def _expense_rows_page_walk(self, user_ids: Sequence[str], since: datetime, until: datetime, page_size: int) -> List[Dict[str, Any]]:
+		rows: List[Dict[str, Any]] = []
+		user_filter = f"in.({','.join(_quote(u) for u in user_ids)})"
+		after_id: Optional[str] = None
+		while True:
+			params: Params = [
+				("select", "id,userId,date,amount"),
+				("userId", user_filter),
+				("type", "eq.EXPENSE"),
+				("date", f"gte.{_iso(since)}"),
+				("date", f"lte.{_iso(until)}"),
+			]
+			if after_id is not None:
+				params.append(("id", f"gt.{after_id}"))
+			params += [("order", "id.asc"), ("limit", str(page_size))]
+			page = await self._select("transactions", params)
+			rows.extend(page)
+			if len(page) < page_size:
+				return rows
+			after_id = page[-1]["id"]
+
+	async def get_transaction_watermark(self, user_id: str) -> Tuple[Optional[str], int]:
+		"""Latest transaction date and total transaction count for a user.
+
+		Any insert changes at least one of the two, so the pair identifies the data version.
+		"""
+		rows, count = await self._select_with_count("transactions", [
+			("select", "date"),
+			("userId", f"eq.{user_id}"),
+			("order", "date.desc"),
+			("limit", "1"),
+		])
+		return (rows[0]["date"] if rows else None), count
+
+	async def get_daily_expense_totals(self, user_id: str, since: datetime, until: datetime) -> List[Dict[str, Any]]:
+		"""(day, total, tx_count) rows of EXPENSE transactions in [since, until], oldest day first."""
+		return await self._rpc("daily_expense_totals", {"p_user_id": user_id, "p_since": _iso(since), "p_until": _iso(until)}) or []
+
+	async def get_monthly_category_spend(self, user_id: str, since: date) -> List[Dict[str, Any]]:
+		"""(month, category, total, tx_count) rows from the spending rollups, oldest month first."""
+		return await self._rpc("monthly_category_spend", {"p_user_id": user_id, "p_since": since.isoformat()}) or []
+
+	async def get_transaction_version(self, user_id: str) -> int:
+		"""Per-user counter bumped by a trigger on every statement that writes the user's transactions."""
+		rows = await self._select("user_transaction_versions", [("select", "version"), ("user_id", f"eq.{user_id}"), ("limit", "1")])
+		return int(rows[0]["version"]) if rows else 0
+
+	# ---------- spending state ----------
+	async def get_spending_state(self, user_id: str) -> Optional[Dict[str, Any]]:
+		rows = await self._select("user_spending_state", [("select", "state"), ("user_id", f"eq.{user_id}"), ("limit", "1")])
+		return rows[0]["state"] if rows else None
+
+	async def upsert_spending_state(self, user_id: str, state: Dict[str, Any]) -> None:
+		await self._request(
+			"POST",
+			"user_spending_state",
+			params=[("on_conflict", "user_id")],
+			json={"user_id": user_id, "state": state, "updated_at": _iso(datetime.utcnow())},
+			prefer="resolution=merge-duplicates,return=minimal",
+		)
+
+	async def delete_spending_state(self, user_id: str) -> None:
+		await self._request("DELETE", "user_spending_state", params=[("user_id", f"eq.{user_id}")])
+
+	# ---------- loans ----------
+	async def insert_loan(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+		rows = await self._insert("loans", payload)
+		return rows[0] if rows else None
+
+	async def get_loan(self, loan_id: str) -> Optional[Dict[str, Any]]:
+		rows = await self._select("loans", [("select", "*"), ("id", f"eq.{loan_id}"), ("limit", "1")])
+		return rows[0] if rows else None
+
+	async def update_loan(self, loan_id: str, values: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+		rows = await self._update("loans", [("id", f"eq.{loan_id}")], values)
+		return rows[0] if rows else None
+
+	async def list_loans_for_user(self, user_id: str, limit: int = 200, after: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+		"""One keyset page of loans the user lent or borrowed, newest first by (created_at, id)."""
+		params: Params = [("select", "*")]
+		party = f"or(lender_id.eq.{user_id},borrower_id.eq.{user_id})"
+		if after is not None:
+			# Two or() groups must be combined under and(); repeated or params are not ANDed reliably
+			key, condition = _keyset("created_at", after, descending=True)
+			params.append(("and", f"({party},{key}{condition})"))
+		else:
+			params.append(("or", party[2:]))
+		params += [("order", "created_at.desc,id.desc"), ("limit", str(limit))]
+		return await self._select("loans", params)
+
+	async def find_overdue_loans(self, now: datetime, after_id: Optional[str] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+		"""One keyset page (ordered by id) of loans past due that are not yet repaid/overdue."""
+		params: Params = [
+			("select", "id,amount,due_date,status,borrower_id"),
+			("due_date", f"lt.{_iso(now)}"),
+			("status", "not.in.(repaid,overdue)"),
+		]
+		if after_id is not None:
+			params.append(("id", f"gt.{after_id}"))
+		params += [("order", "id.asc"), ("limit", str(limit))]
+		return await self._select("loans", params)
+
+	async def mark_loans_overdue(self, loan_ids: Sequence[str]) -> List[Dict[str, Any]]:
+		"""Flip a set of loans to overdue in one statement; returns the rows actually changed.
+
+		The status guard skips loans repaid between the read and this update.
+		"""
+		if not loan_ids:
+			return []
+		return await self._update("loans", [
+			("select", "id,amount,due_date,borrower_id"),
+			("id", f"in.({','.join(_quote(i) for i in loan_ids)})"),
+			("status", "not.in.(repaid,overdue)"),
+		], {"status": "overdue"})
+
+	# ---------- notifications ----------
+	async def insert_notification(self, user_id: str, loan_id: Optional[str], type_: str, message: str, created_at: Optional[datetime] = None) -> None:
+		await self.insert_notifications([{
+			"user_id": user_id,
+			"loan_id": loan_id,
+			"type": type_,
+			"message": message,
+			"created_at": _iso(created_at or datetime.utcnow()),
+			"read": False,
+		}])
+
+	async def insert_notifications(self, rows: Sequence[Dict[str, Any]]) -> None:
+		if rows:
+			await self._insert("notifications", list(rows), returning=False)
+
+	async def list_notifications(self, user_id: str, limit: int = 200, after: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+		"""One keyset page of a user's notifications, newest first by (created_at, id)."""
+		params: Params = [("select", "*"), ("user_id", f"eq.{user_id}")]
+		if after is not None:
+			params.append(_keyset("created_at", after, descending=True))
+		params += [("order", "created_at.desc,id.desc"), ("limit", str(limit))]
+		return await self._select("notifications", params)
+
+
+class RepositoryStore:
+	repo: Optional[SupabaseRepository] = None
+
+
+store = RepositoryStore()
+
+
+def connect_repository() -> None:
+	"""Create the shared repository from env vars.
+
+	Requires SUPABASE_URL and one of SUPABASE_SERVICE_ROLE_KEY or SUPABASE_ANON_KEY.
+	For server-side usage, the service role key is recommended.
+	"""
+	if httpx is None:
+		print("⚠️ httpx not available yet; run 'pip install httpx' to enable DB access.")
+		return
+
+	url = os.getenv("SUPABASE_URL")
+	key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_ANON_KEY")
+	if not url or not key:
+		print("⚠️ SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY/ANON_KEY are not set; database access disabled.")
+		return
+
+	try:
+		store.repo = SupabaseRepository(
+			url,
+			key,
+			timeout=float(os.getenv("SUPABASE_HTTP_TIMEOUT", "10")),
+			max_connections=int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", "50")),
+		)
+		print("✅ Connected to Supabase successfully!")
+	except Exception as exc:
+		store.repo = None
+		print(f"❌ Error connecting to Supabase: {exc}")
+
+
+async def close_repository() -> None:
+	if store.repo is not None:
+		await store.repo.close()
+		store.repo = None
+		print("Disconnected from Supabase")
+
+
+def get_repository() -> Optional[SupabaseRepository]:
+	return store.repo
@@ -0,0 +1,70 @@
+# app/rollups.py
+from datetime import date, datetime
+from typing import Any, Dict, List
+
+from app.repository import RepositoryError, get_repository
+from app.transaction_columns import CATEGORIES, load_transaction_columns
+
+
+def month_starts(months: int, today: date) -> List[date]:
+	"""First day of each of the last `months` calendar months, oldest first (current month included)."""
+	year, month = today.year, today.month
+	starts: List[date] = []
+	for _ in range(months):
+		starts.append(date(year, month, 1))
+		year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+	return starts[::-1]
+
+
+async def _monthly_category_spend_from_transactions(repo: Any, user_id: str, since: date) -> List[Dict[str, Any]]:
+	"""Same rows as the monthly_category_spend RPC, from columnar transactions."""
+	columns = await load_transaction_columns(repo, user_id, since=datetime(since.year, since.month, since.day))
+	months, categories, totals, counts = columns.expenses().monthly_category_totals()
+	return [
+		{"month": f"{month}-01", "category": category, "total": cents / 100, "tx_count": count}
+		for month, category, cents, count in zip(
+			months.astype(str).tolist(), CATEGORIES.decode(categories), totals.tolist(), counts.tolist()
+		)
+	]
+
+
+async def spend_by_category_by_month(user_id: str, months: int = 6) -> Dict[str, Any]:
+	"""Expense totals per month and category for the last `months` months (user_id is a users.id UUID).
+
+	Answered from the per-day rollups maintained by the transactions triggers, so
+	the cost is proportional to days x categories in the window, not to transactions.
+	"""
+	repo = get_repository()
+	if repo is None:
+		raise ValueError("Supabase client not initialized")
+
+	starts = month_starts(months, datetime.utcnow().date())
+	try:
+		rows = await repo.get_monthly_category_spend(user_id, starts[0])
+	except RepositoryError:
+		# spending_rollups not deployed yet: aggregate the window's transactions here
+		rows = await _monthly_category_spend_from_transactions(repo, user_id, starts[0])
+
+	by_month: Dict[str, Dict[str, Any]] = {
+		start.isoformat()[:7]: {"month": start.isoformat()[:7], "total": 0.0, "transactions": 0, "categories": {}}
+		for start in starts
+	}
+	category_totals: Dict[str, float] = {}
+	for row in rows:
+		bucket = by_month.get(str(row["month"])[:7])
+		if bucket is None:
+			continue
+		total = float(row["total"])
+		bucket["categories"][row["category"]] = total
+		bucket["total"] += total
+		bucket["transactions"] += int(row["tx_count"])
+		category_totals[row["category"]] = category_totals.get(row["category"], 0.0) + total
+
+	return {
+		"months": list(by_month.values()),
+		"categories": [
+			{"category": category, "total": total}
+			for category, total in sorted(category_totals.items(), key=lambda item: item[1], reverse=True)
+		],
+		"total_spent": sum(category_totals.values()),
+	}
@@ -1,86 +1,69 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional, Dict, Any
-from app.supabase_client import get_supabase
+from app.auth import require_admin
+from app.repository import RepositoryError, get_repository
+from app.user_resolver import require_user_id
+from app.account_cache import get_user_accounts
+from app.scheduler import reconcile_balance_totals
 
 
 router = APIRouter()
 
 
-def _resolve_user_uuid(user_identifier: str):
-	sb = get_supabase()
-	if sb is None:
-		raise HTTPException(status_code=500, detail="Supabase client not initialized")
-	res = sb.table("users").select("id").or_(f"clerkUserId.eq.{user_identifier},email.eq.{user_identifier}").limit(1).execute()
-	if not res.data:
-		raise HTTPException(status_code=404, detail="User not found")
-	return res.data[0]["id"]
-
-
 @router.get("/accounts/user/{user_id}")
 async def list_user_accounts(user_id: str) -> List[Dict[str, Any]]:
-	"""List accounts for a user (id resolved by clerkUserId or email)."""
-	sb = get_supabase()
-	if sb is None:
+	"""List accounts for a user (id resolved by clerkUserId or email).
+
+	Served from the account cache: balances changed outside this API may be up to
+	ACCOUNT_CACHE_TTL (default 5) seconds old.
+	"""
+	repo = get_repository()
+	if repo is None:
 		raise HTTPException(status_code=500, detail="Supabase client not initialized")
 
-	resolved_user_id = _resolve_user_uuid(user_id)
-	res = sb.table("accounts").select("id,name,type,balance,isDefault").eq("userId", resolved_user_id).order("createdAt", desc=True).execute()
-	rows = res.data or []
-	# Convert numeric balances to float
-	for row in rows:
-		if row.get("balance") is not None:
-			try:
-				row["balance"] = float(row["balance"])
-			except Exception:
-				pass
-	return rows
+	resolved_user_id = await require_user_id(user_id)
+	return (await get_user_accounts(resolved_user_id)).list()
 
 
 @router.get("/accounts/default/{user_id}")
 async def get_default_account(user_id: str) -> Optional[Dict[str, Any]]:
-	sb = get_supabase()
-	if sb is None:
+	repo = get_repository()
+	if repo is None:
 		raise HTTPException(status_code=500, detail="Supabase client not initialized")
 
-	resolved_user_id = _resolve_user_uuid(user_id)
-	res = sb.table("accounts").select("id,name,type,balance,isDefault").eq("userId", resolved_user_id).eq("isDefault", True).limit(1).execute()
-	if not res.data:
-		return None
-	row = res.data[0]
-	if row.get("balance") is not None:
-		try:
-			row["balance"] = float(row["balance"])
-		except Exception:
-			pass
-	return row
+	resolved_user_id = await require_user_id(user_id)
+	return (await get_user_accounts(resolved_user_id)).default_account()
 
 
 @router.get("/accounts/balance/{user_id}")
 async def get_user_balance(user_id: str, total: bool = Query(True, description="Sum across all accounts if true; default account only if false")) -> Dict[str, Any]:
-	"""Return user's balance. If total=true, sum all accounts; otherwise default account balance."""
-	sb = get_supabase()
-	if sb is None:
+	"""Return user's balance. If total=true, sum all accounts; otherwise default account balance.
+
+	The total is read from the trigger-maintained aggregate; the default account's
+	balance comes from the account cache (see list_user_accounts).
+	"""
+	repo = get_repository()
+	if repo is None:
 		raise HTTPException(status_code=500, detail="Supabase client not initialized")
 
-	resolved_user_id = _resolve_user_uuid(user_id)
+	resolved_user_id = await require_user_id(user_id)
 	if total:
-		res = sb.table("accounts").select("balance").eq("userId", resolved_user_id).execute()
-		balances = [row.get("balance") for row in (res.data or [])]
-		total_balance = 0.0
-		for b in balances:
-			try:
-				total_balance += float(b)
-			except Exception:
-				pass
-		return {"userId": resolved_user_id, "total_balance": total_balance}
-	else:
-		res = sb.table("accounts").select("balance").eq("userId", resolved_user_id).eq("isDefault", True).limit(1).execute()
-		if not res.data:
-			return {"userId": resolved_user_id, "default_balance": 0.0}
+		# Single-row read of the trigger-maintained aggregate (see user_balance_totals)
 		try:
-			balance = float(res.data[0].get("balance", 0))
-		except Exception:
-			balance = 0.0
-		return {"userId": resolved_user_id, "default_balance": balance}
+			row = await repo.get_balance_total(resolved_user_id)
+			return {"userId": resolved_user_id, "total_balance": float(row["total_balance"]) if row else 0.0}
+		except RepositoryError as e:
+			print(f"⚠️ Balance aggregate unavailable, summing accounts instead: {e}")
+			accounts = await get_user_accounts(resolved_user_id)
+			total_balance = sum(a["balance"] for a in accounts.accounts if a["balance"] is not None)
+			return {"userId": resolved_user_id, "total_balance": float(total_balance)}
+	else:
+		row = (await get_user_accounts(resolved_user_id)).default_account()
+		return {"userId": resolved_user_id, "default_balance": (row or {}).get("balance") or 0.0}
 
 
+@router.post("/accounts/balance/reconcile", dependencies=[Depends(require_admin)])
+async def trigger_balance_reconcile(fix: bool = Query(False, description="Correct drifted totals to the recomputed values")) -> Dict[str, Any]:
+	"""Check every stored balance total against a full recompute from accounts (admin only)."""
+	stats = await reconcile_balance_totals(fix=fix)
+	return {"status": "ok", **stats}
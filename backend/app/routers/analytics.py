@@ -0,0 +1,21 @@
+# app/routers/analytics.py
+from fastapi import APIRouter, HTTPException, Query
+from typing import Any, Dict
+from app.rollups import spend_by_category_by_month
+from app.user_resolver import require_user_id
+
+router = APIRouter()
+
+
+@router.get("/analytics/spending_by_category/{user_id}")
+async def get_spending_by_category(
+    user_id: str,
+    months: int = Query(6, description="Number of calendar months, including the current one", ge=1, le=36)
+) -> Dict[str, Any]:
+    """Expense totals by category for each of the last N months, read from the spending rollups"""
+    resolved_user_id = await require_user_id(user_id)
+    try:
+        breakdown = await spend_by_category_by_month(resolved_user_id, months)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Category breakdown failed: {str(e)}")
+    return {"userId": resolved_user_id, **breakdown}
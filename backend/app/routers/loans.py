@@ -1,41 +1,34 @@
 # app/routers/loans.py
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import List
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Response
+from typing import List, Optional
 from datetime import datetime
 from app.models import LoanModel, LoanCreate, LoanRepayRequest, NotificationModel
 from app.scheduler import check_overdue_loans
-from app.supabase_client import get_supabase
+from app.notification_writer import enqueue_notification
+from app.repository import get_repository
+from app.user_resolver import require_user_id
+from app.pagination import MAX_PAGE_SIZE, decode_cursor, finish_page
 
 router = APIRouter()
 
 
 async def create_notification(user_id: str, loan_id: str, type_: str, message: str) -> None:
-	sb = get_supabase()
-	if sb is None:
-		return
-	sb.table("notifications").insert({
-		"user_id": user_id,
-		"loan_id": loan_id,
-		"type": type_,
-		"message": message,
-		"created_at": datetime.utcnow().isoformat(),
-		"read": False,
-	}).execute()
+	await enqueue_notification(user_id, loan_id, type_, message)
 
 
 @router.post("/create_loan", response_model=LoanModel, status_code=201)
 async def create_loan(payload: LoanCreate, background_tasks: BackgroundTasks):
-	sb = get_supabase()
-	if sb is None:
+	repo = get_repository()
+	if repo is None:
 		raise HTTPException(status_code=500, detail="Supabase client not initialized")
 	try:
 		loan_doc = payload.model_dump()
 		loan_doc["status"] = "pending"
 		loan_doc["created_at"] = datetime.utcnow().isoformat()
-		res = sb.table("loans").insert(loan_doc).select("*").limit(1).execute()
-		if not res.data:
+		loan_doc["due_date"] = payload.due_date.isoformat()
+		created = await repo.insert_loan(loan_doc)
+		if not created:
 			raise HTTPException(status_code=500, detail="Failed to create loan")
-		created = res.data[0]
 
 		# Notify borrower and lender
 		background_tasks.add_task(
@@ -61,19 +54,19 @@ async def create_loan(payload: LoanCreate, background_tasks: BackgroundTasks):
 
 @router.post("/repay_loan", response_model=LoanModel)
 async def repay_loan(payload: LoanRepayRequest, background_tasks: BackgroundTasks):
-	sb = get_supabase()
-	if sb is None:
+	repo = get_repository()
+	if repo is None:
 		raise HTTPException(status_code=500, detail="Supabase client not initialized")
 	try:
-		loan_res = sb.table("loans").select("*").eq("id", payload.loan_id).limit(1).execute()
-		if not loan_res.data:
+		loan = await repo.get_loan(payload.loan_id)
+		if not loan:
 			raise HTTPException(status_code=404, detail="Loan not found")
-		loan = loan_res.data[0]
 		if loan.get("status") == "repaid":
 			raise HTTPException(status_code=400, detail="Loan already repaid")
 
-		update_res = sb.table("loans").update({"status": "repaid", "repaid_at": datetime.utcnow().isoformat()}).eq("id", payload.loan_id).select("*").limit(1).execute()
-		updated = update_res.data[0]
+		updated = await repo.update_loan(payload.loan_id, {"status": "repaid", "repaid_at": datetime.utcnow().isoformat()})
+		if not updated:
+			raise HTTPException(status_code=404, detail="Loan not found")
 
 		# Notify lender that borrower repaid
 		background_tasks.add_task(
@@ -91,40 +84,42 @@ async def repay_loan(payload: LoanRepayRequest, background_tasks: BackgroundTask
 
 
 @router.get("/loans/user/{user_id}", response_model=List[LoanModel])
-async def list_user_loans(user_id: str):
-	sb = get_supabase()
-	if sb is None:
+async def list_user_loans(
+	user_id: str,
+	response: Response,
+	after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+	limit: int = Query(200, ge=1, le=MAX_PAGE_SIZE),
+):
+	"""Loans the user lent or borrowed, newest first; X-Next-Cursor is set when more exist."""
+	repo = get_repository()
+	if repo is None:
 		raise HTTPException(status_code=500, detail="Supabase client not initialized")
+	cursor = decode_cursor(after, 2)
 	# Resolve UUID
-	user_res = sb.table("users").select("id").or_(f"clerkUserId.eq.{user_id},email.eq.{user_id}").limit(1).execute()
-	if not user_res.data:
-		raise HTTPException(status_code=404, detail="User not found")
-	resolved_user_id = user_res.data[0]["id"]
-	loans = (
-		sb.table("loans")
-		.select("*")
-		.or_(f"lender_id.eq.{resolved_user_id},borrower_id.eq.{resolved_user_id}")
-		.limit(200)
-		.execute()
-	)
-	return [LoanModel(**doc) for doc in (loans.data or [])]
+	resolved_user_id = await require_user_id(user_id)
+	loans = await repo.list_loans_for_user(resolved_user_id, limit=limit + 1, after=cursor)
+	return [LoanModel(**doc) for doc in finish_page(loans, limit, ("created_at", "id"), response)]
 
 
 @router.get("/notifications/{user_id}", response_model=List[NotificationModel])
-async def get_notifications(user_id: str):
-	sb = get_supabase()
-	if sb is None:
+async def get_notifications(
+	user_id: str,
+	response: Response,
+	after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+	limit: int = Query(200, ge=1, le=MAX_PAGE_SIZE),
+):
+	"""The user's notifications, newest first; X-Next-Cursor is set when more exist."""
+	repo = get_repository()
+	if repo is None:
 		raise HTTPException(status_code=500, detail="Supabase client not initialized")
+	cursor = decode_cursor(after, 2)
 	# Resolve UUID
-	user_res = sb.table("users").select("id").or_(f"clerkUserId.eq.{user_id},email.eq.{user_id}").limit(1).execute()
-	if not user_res.data:
-		raise HTTPException(status_code=404, detail="User not found")
-	resolved_user_id = user_res.data[0]["id"]
-	notifs = sb.table("notifications").select("*").eq("user_id", resolved_user_id).order("created_at", desc=True).limit(200).execute()
-	return [NotificationModel(**doc) for doc in (notifs.data or [])]
+	resolved_user_id = await require_user_id(user_id)
+	notifs = await repo.list_notifications(resolved_user_id, limit=limit + 1, after=cursor)
+	return [NotificationModel(**doc) for doc in finish_page(notifs, limit, ("created_at", "id"), response)]
 
 
 @router.post("/loans/check_overdue")
 async def trigger_check_overdue():
-	await check_overdue_loans()
-	return {"status": "ok"}
\ No newline at end of file
+	stats = await check_overdue_loans()
+	return {"status": "ok", **stats}
\ No newline at end of file
@@ -1,11 +1,27 @@
 # app/routers/predict.py
-from fastapi import APIRouter, HTTPException
-from typing import Dict, List, Any, Optional
-from app.ml_model import get_loaded_model, get_feature_order
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from functools import lru_cache
+import itertools
+from typing import Dict, List, Any, Optional, Tuple
+import os
+import numpy as np
+from app import bulk_codec
+from app.auth import require_admin
+from app.ml_model import get_active_model_version, list_model_versions, reload_ml_model, rollback_ml_model, ModelLoadError
 from app.models import PredictRequest, PredictBatchRequest, PredictResponse
+from app.inference_batcher import batcher
+from app.inference_executor import executor, ExecutorSaturated
+from app.prediction_cache import get_cached_prediction, cache_prediction
 
 router = APIRouter()
 
+BULK_CHUNK_ROWS = int(os.getenv("PREDICT_BULK_CHUNK_ROWS", "65536"))
+
+
+def _saturated(exc: ExecutorSaturated) -> HTTPException:
+	return HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
+
 
 def _row_from_features(feature_mapping: Dict[str, float], feature_order: Optional[List[str]]) -> List[float]:
 	if feature_order:
@@ -14,36 +30,170 @@ def _row_from_features(feature_mapping: Dict[str, float], feature_order: Optiona
 	return [float(value) for _, value in sorted(feature_mapping.items(), key=lambda kv: kv[0])]
 
 
+@lru_cache(maxsize=64)
+def _column_permutation(columns: Tuple[str, ...], feature_order: Tuple[str, ...]) -> Tuple[np.ndarray, np.ndarray]:
+	"""Indices mapping payload columns (src) onto model feature positions (dst); extra columns are ignored."""
+	position = {name: i for i, name in enumerate(columns)}
+	dst = [j for j, name in enumerate(feature_order) if name in position]
+	src = [position[feature_order[j]] for j in dst]
+	return np.asarray(src, dtype=np.intp), np.asarray(dst, dtype=np.intp)
+
+
+def _matrix_from_columns(columns: List[str], values: np.ndarray, feature_order: Optional[List[str]]) -> np.ndarray:
+	"""Reorder a (n_rows, len(columns)) float64 array into model feature order; missing features are 0.0."""
+	order = tuple(feature_order) if feature_order else tuple(sorted(columns))
+	src, dst = _column_permutation(tuple(columns), order)
+	if len(dst) == len(order) and np.array_equal(src, np.arange(len(columns))):
+		return values
+	matrix = np.zeros((values.shape[0], len(order)), dtype=np.float64)
+	matrix[:, dst] = values[:, src]
+	return matrix
+
+
+def _matrix_from_payload(payload: PredictBatchRequest, feature_order: Optional[List[str]]) -> Any:
+	if payload.batch is not None:
+		return [_row_from_features(item, feature_order) for item in payload.batch]
+
+	if payload.rows is not None:
+		width = len(payload.columns)
+		if any(len(row) != width for row in payload.rows):
+			raise HTTPException(status_code=422, detail=f"Every row must have {width} values")
+		try:
+			values = np.asarray(payload.rows, dtype=np.float64) if payload.rows else np.empty((0, width))
+		except (TypeError, ValueError) as exc:
+			raise HTTPException(status_code=422, detail=f"Rows must contain only numbers: {exc}")
+		return _matrix_from_columns(payload.columns, values, feature_order)
+
+	columns = list(payload.data.keys())
+	lengths = {len(v) for v in payload.data.values()}
+	if len(lengths) > 1:
+		raise HTTPException(status_code=422, detail="All 'data' arrays must have the same length")
+	order = feature_order or sorted(columns)
+	n_rows = lengths.pop() if lengths else 0
+	matrix = np.zeros((n_rows, len(order)), dtype=np.float64)
+	for j, name in enumerate(order):
+		if name in payload.data:
+			matrix[:, j] = payload.data[name]
+	return matrix
+
+
 @router.post("/predict_spending", response_model=PredictResponse)
 async def predict_spending(payload: PredictRequest) -> Any:
-	model = get_loaded_model()
-	if model is None:
+	# Pin one model version for the whole request so a hot reload cannot swap it mid-flight
+	version = get_active_model_version()
+	if version is None:
 		raise HTTPException(status_code=500, detail="Model not loaded")
 
-	feature_order = get_feature_order()
+	feature_order = version.feature_order
 	row = _row_from_features(payload.features, feature_order)
+	cached = get_cached_prediction(version.version, row)
+	if cached is not None:
+		return PredictResponse(predictions=[cached], used_feature_order=feature_order, model_version=version.version)
 
 	try:
-		pred = model.predict([row])
-		# Convert numpy types to native floats if needed
-		pred_floats = [float(x) for x in (pred.tolist() if hasattr(pred, "tolist") else pred)]
-		return PredictResponse(predictions=pred_floats, used_feature_order=feature_order)
+		# Concurrent requests share one model.predict call; rows only line up with a fixed feature order
+		if batcher.running and feature_order:
+			pred_floats = [float(await batcher.submit(row, version))]
+		else:
+			pred_floats = (await executor.predict(version, [row])).tolist()
+		cache_prediction(version.version, row, pred_floats[0])
+		return PredictResponse(predictions=pred_floats, used_feature_order=feature_order, model_version=version.version)
+	except ExecutorSaturated as exc:
+		raise _saturated(exc)
 	except Exception as exc:
 		raise HTTPException(status_code=500, detail=f"Prediction failed: {exc}")
 
 
 @router.post("/predict_spending_batch", response_model=PredictResponse)
 async def predict_spending_batch(payload: PredictBatchRequest) -> Any:
-	model = get_loaded_model()
-	if model is None:
+	version = get_active_model_version()
+	if version is None:
 		raise HTTPException(status_code=500, detail="Model not loaded")
 
-	feature_order = get_feature_order()
-	matrix = [_row_from_features(item, feature_order) for item in payload.batch]
+	feature_order = version.feature_order
+	matrix = _matrix_from_payload(payload, feature_order)
 
 	try:
-		pred = model.predict(matrix)
-		pred_floats = [float(x) for x in (pred.tolist() if hasattr(pred, "tolist") else pred)]
-		return PredictResponse(predictions=pred_floats, used_feature_order=feature_order)
+		pred_floats = (await executor.predict(version, matrix)).tolist()
+		return PredictResponse(predictions=pred_floats, used_feature_order=feature_order, model_version=version.version)
+	except ExecutorSaturated as exc:
+		raise _saturated(exc)
 	except Exception as exc:
-		raise HTTPException(status_code=500, detail=f"Prediction failed: {exc}") 
\ No newline at end of file
+		raise HTTPException(status_code=500, detail=f"Prediction failed: {exc}") 
+
+
+@router.post("/predict_spending_bulk")
+async def predict_spending_bulk(request: Request) -> Any:
+	"""Score a binary body for offline jobs and reply in the same format.
+
+	Content-Type selects the format:
+	- application/x-npy: 2-D array; columns follow the model feature order unless
+	  an X-Feature-Columns header (comma-separated names) says otherwise
+	- application/x-npz: one named 1-D array per feature
+	- application/vnd.apache.arrow.stream: Arrow IPC stream with one column per feature
+	Rows are scored in chunks of PREDICT_BULK_CHUNK_ROWS; .npy and Arrow replies are streamed.
+	Errors on the first chunk get a normal error status; a streamed body that ends
+	before X-Row-Count predictions means a later chunk failed.
+	"""
+	version = get_active_model_version()
+	if version is None:
+		raise HTTPException(status_code=500, detail="Model not loaded")
+
+	media_type = bulk_codec.media_type_of(request.headers.get("content-type"))
+	header = request.headers.get("x-feature-columns")
+	header_columns = [c.strip() for c in header.split(",")] if header else None
+	body = await request.body()
+	try:
+		matrix, order = bulk_codec.decode_matrix(media_type, body, version.feature_order, header_columns)
+	except bulk_codec.BulkFormatError as exc:
+		status = 415 if "Unsupported content type" in str(exc) else 422
+		raise HTTPException(status_code=status, detail=str(exc))
+
+	headers = {"X-Feature-Order": ",".join(order), "X-Row-Count": str(matrix.shape[0]), "X-Model-Version": version.version}
+	try:
+		if executor.uses_pool(version):
+			# Scored up front across the pool; only the encoding is streamed
+			predictions = await executor.predict(version, matrix)
+			chunks = (predictions[i:i + BULK_CHUNK_ROWS] for i in range(0, predictions.shape[0], BULK_CHUNK_ROWS))
+		else:
+			# Score the first chunk before committing to a 200, so model errors on it still get a proper status
+			lazy = bulk_codec.score_in_chunks(version.model, matrix, BULK_CHUNK_ROWS)
+			first = next(lazy, None)
+			chunks = itertools.chain([] if first is None else [first], lazy)
+		if media_type == bulk_codec.NPY_MEDIA_TYPE:
+			return StreamingResponse(bulk_codec.encode_npy_stream(matrix.shape[0], chunks), media_type=media_type, headers=headers)
+		if media_type == bulk_codec.ARROW_STREAM_MEDIA_TYPE:
+			return StreamingResponse(bulk_codec.encode_arrow_stream(chunks), media_type=media_type, headers=headers)
+		predictions = np.concatenate(list(chunks)) if matrix.shape[0] else np.empty(0)
+		return Response(bulk_codec.encode_npz(predictions), media_type=media_type, headers=headers)
+	except ExecutorSaturated as exc:
+		raise _saturated(exc)
+	except Exception as exc:
+		raise HTTPException(status_code=500, detail=f"Prediction failed: {exc}")
+
+
+@router.get("/model")
+async def get_model_info() -> Dict[str, Any]:
+	"""Active model version and the versions kept resident for rollback."""
+	version = get_active_model_version()
+	return {"active": version.version if version else None, "versions": list_model_versions()}
+
+
+@router.post("/model/reload", dependencies=[Depends(require_admin)])
+async def reload_model() -> Dict[str, Any]:
+	"""Load, validate and warm the model files in the background, then swap atomically (admin only)."""
+	try:
+		version = await reload_ml_model()
+	except ModelLoadError as exc:
+		raise HTTPException(status_code=422, detail=f"Model reload rejected: {exc}")
+	return {"status": "reloaded", "active": version.describe()}
+
+
+@router.post("/model/rollback", dependencies=[Depends(require_admin)])
+async def rollback_model(version: Optional[str] = None) -> Dict[str, Any]:
+	"""Switch back to a resident version (default: the previously active one; admin only)."""
+	try:
+		target = rollback_ml_model(version)
+	except ModelLoadError as exc:
+		raise HTTPException(status_code=409, detail=str(exc))
+	return {"status": "rolled_back", "active": target.describe()}
@@ -1,7 +1,10 @@
 # app/routers/savings.py
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Dict, Optional
 from app.smart_saving_agent import analyze_user_savings
+from app.savings_engine import analyze_many
+from app.models import SavingsBatchRequest
+from app.auth import require_admin
 
 router = APIRouter()
 
@@ -42,4 +45,13 @@ async def get_savings_summary(
         
         return summary
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Summary generation failed: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Summary generation failed: {str(e)}")
+
+
+@router.post("/savings_analysis/batch", dependencies=[Depends(require_admin)])
+async def get_savings_analysis_batch(payload: SavingsBatchRequest) -> Dict:
+    """Vectorized savings statistics for many users (users.id UUIDs) in one pass, for reporting jobs (admin only)"""
+    try:
+        return await analyze_many(payload.user_ids, payload.days)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
@@ -1,63 +1,115 @@
 # app/routers/transactions.py
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from app.models import TransactionModel, TransactionCreate
-from typing import List
-from app.supabase_client import get_supabase
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+from app.repository import get_repository
+from app.user_resolver import require_user_id
+from app.account_cache import get_user_accounts, invalidate_user_accounts
+from app.smart_saving_agent import invalidate_user_analysis
+from app.spending_state import record_transaction
+from app.pagination import MAX_PAGE_SIZE, decode_cursor, finish_page
+from app.transaction_import import ImportFormatError, parse_import_body, build_insert_rows
 from datetime import datetime
+import csv
+import io
+import json
+import os
+import time
 
 router = APIRouter()
 
+EXPORT_PAGE_SIZE = int(os.getenv("TRANSACTION_EXPORT_PAGE_SIZE", "1000"))
+EXPORT_COLUMNS = ["id", "date", "type", "amount", "category", "description", "accountId", "status"]
+IMPORT_CHUNK_ROWS = int(os.getenv("TRANSACTION_IMPORT_CHUNK_ROWS", "500"))
+IMPORT_MAX_ROWS = int(os.getenv("TRANSACTION_IMPORT_MAX_ROWS", "50000"))
+
+
+async def _apply_balance_delta(repo: Any, resolved_user_id: str, account_id: str, delta: float) -> None:
+    """Book a transaction's amount on its account; the accounts trigger keeps the user's total in step."""
+    try:
+        await repo.increment_account_balance(account_id, delta)
+    except Exception as e:
+        # The transaction row is already written; failing the request would invite a duplicate retry
+        print(f"⚠️ Balance update for account {account_id} failed: {e}")
+    invalidate_user_accounts(resolved_user_id)
+
+
+async def _resolve_account_id(repo: Any, resolved_user_id: str) -> Optional[str]:
+    """The user's default account, else any account, else a newly created default account."""
+    accounts = await get_user_accounts(resolved_user_id)
+    if accounts.primary_account_id:
+        return accounts.primary_account_id
+    # Create a default account if none exists
+    acct_insert = await repo.insert_account({
+        "name": "Default Account",
+        "type": "CURRENT",
+        "userId": resolved_user_id,
+        "isDefault": True,
+    })
+    invalidate_user_accounts(resolved_user_id)
+    return acct_insert["id"] if acct_insert else None
+
+
+def _ndjson_page(rows: List[Dict[str, Any]]) -> str:
+    return "".join(json.dumps(row, default=str) + "\n" for row in rows)
+
+
+def _csv_page(rows: List[Dict[str, Any]]) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerows([row.get(column) for column in EXPORT_COLUMNS] for row in rows)
+    return buf.getvalue()
+
+
+async def _export_stream(repo: Any, user_id: str, fmt: str) -> AsyncIterator[str]:
+    """One encoded chunk per keyset page; memory stays at one page whatever the history size."""
+    if fmt == "csv":
+        yield ",".join(EXPORT_COLUMNS) + "\r\n"
+    encode = _csv_page if fmt == "csv" else _ndjson_page
+    try:
+        async for page in repo.iter_transaction_pages(user_id, columns=",".join(EXPORT_COLUMNS), page_size=EXPORT_PAGE_SIZE):
+            yield encode(page)
+    except Exception as e:
+        # Headers are already sent; all we can do is end the body early and log it
+        print(f"❌ Transaction export for {user_id} aborted: {e}")
+        raise
+
 @router.post("/", response_model=TransactionModel, status_code=201)
 async def create_transaction(transaction: TransactionCreate, user_id: str = Query(..., description="User ID (clerkUserId or email)")):
     """Create a new transaction for a user in Supabase."""
-    sb = get_supabase()
-    if sb is None:
+    repo = get_repository()
+    if repo is None:
         raise HTTPException(status_code=500, detail="Supabase client not initialized")
 
     try:
         # Resolve user id (UUID) by clerkUserId/email
-        user_res = sb.table("users").select("id").or_(f"clerkUserId.eq.{user_id},email.eq.{user_id}").limit(1).execute()
-        if not user_res.data:
-            raise HTTPException(status_code=404, detail="User not found")
-        resolved_user_id = user_res.data[0]["id"]
+        resolved_user_id = await require_user_id(user_id)
 
         # For simplicity, associate with the user's default account if exists, else create a placeholder account
-        acct_res = sb.table("accounts").select("id").eq("userId", resolved_user_id).eq("isDefault", True).limit(1).execute()
-        account_id = None
-        if acct_res.data:
-            account_id = acct_res.data[0]["id"]
-        else:
-            # Fallback: pick any account
-            any_acct = sb.table("accounts").select("id").eq("userId", resolved_user_id).limit(1).execute()
-            if any_acct.data:
-                account_id = any_acct.data[0]["id"]
-            else:
-                # Create a default account if none exists
-                acct_insert = sb.table("accounts").insert({
-                    "name": "Default Account",
-                    "type": "CURRENT",
-                    "userId": resolved_user_id,
-                    "isDefault": True,
-                }).select("id").limit(1).execute()
-                if acct_insert.data:
-                    account_id = acct_insert.data[0]["id"]
+        account_id = await _resolve_account_id(repo, resolved_user_id)
 
         # Map fields to Prisma schema in frontend
+        created_at = datetime.utcnow()
         insert_payload = {
             "type": "INCOME" if transaction.transaction_type == "income" else "EXPENSE",
             "amount": str(transaction.amount),
             "description": transaction.description,
-            "date": datetime.utcnow().isoformat(),
+            "date": created_at.isoformat(),
             "category": transaction.category,
             "userId": resolved_user_id,
         }
         if account_id:
             insert_payload["accountId"] = account_id
 
-        res = sb.table("transactions").insert(insert_payload).select("*").limit(1).execute()
-        if not res.data:
+        created = await repo.insert_transaction(insert_payload)
+        if not created:
             raise HTTPException(status_code=500, detail="Failed to create transaction")
-        created = res.data[0]
+        await record_transaction(resolved_user_id, insert_payload["type"], float(transaction.amount), created_at)
+        if account_id:
+            delta = -float(transaction.amount) if insert_payload["type"] == "EXPENSE" else float(transaction.amount)
+            await _apply_balance_delta(repo, resolved_user_id, account_id, delta)
+        invalidate_user_analysis(resolved_user_id)
 
         # Map Supabase row to TransactionModel fields (approximate)
         return TransactionModel(
@@ -74,22 +126,88 @@ async def create_transaction(transaction: TransactionCreate, user_id: str = Quer
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating transaction: {str(e)}")
 
+@router.post("/import")
+async def import_transactions(request: Request, user_id: str = Query(..., description="User ID (clerkUserId or email)")):
+    """Bulk-create transactions from a JSON list (or {"transactions": [...]}) or a CSV body (Content-Type: text/csv).
+
+    Columns: amount, category, transaction_type (income/expense; "type" also accepted),
+    optional description and date (ISO 8601, defaults to now). Valid rows are inserted
+    in multi-row batches of TRANSACTION_IMPORT_CHUNK_ROWS; invalid rows are skipped and
+    reported by their 0-based row number.
+    """
+    repo = get_repository()
+    if repo is None:
+        raise HTTPException(status_code=500, detail="Supabase client not initialized")
+
+    started = time.perf_counter()
+    media_type = (request.headers.get("content-type") or "").split(";", 1)[0].strip().lower()
+    try:
+        frame = parse_import_body(media_type, await request.body())
+    except ImportFormatError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if len(frame) > IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {IMPORT_MAX_ROWS} rows per import")
+
+    try:
+        # One user and one account lookup for the whole import
+        resolved_user_id = await require_user_id(user_id)
+        account_id = await _resolve_account_id(repo, resolved_user_id) if len(frame) else None
+
+        rows, row_numbers, errors = build_insert_rows(frame, resolved_user_id, account_id, datetime.utcnow())
+        inserted = 0
+        inserted_expense = False
+        balance_delta = 0.0
+        for start in range(0, len(rows), IMPORT_CHUNK_ROWS):
+            chunk = rows[start:start + IMPORT_CHUNK_ROWS]
+            try:
+                inserted += await repo.insert_transactions(chunk)
+                inserted_expense = inserted_expense or any(row["type"] == "EXPENSE" for row in chunk)
+                balance_delta += sum(float(row["amount"]) * (-1.0 if row["type"] == "EXPENSE" else 1.0) for row in chunk)
+            except Exception as e:
+                # A rejected batch fails only its own rows; earlier batches stay committed
+                errors.extend({"row": n, "errors": [f"insert failed: {e}"]} for n in row_numbers[start:start + IMPORT_CHUNK_ROWS])
+
+        if inserted:
+            if account_id and balance_delta:
+                # Every imported row is booked to the same account, so one balance update covers the import
+                await _apply_balance_delta(repo, resolved_user_id, account_id, balance_delta)
+            if inserted_expense:
+                # Imported rows may be backdated, which the running state cannot fold in; rebuild on next read
+                await repo.delete_spending_state(resolved_user_id)
+            invalidate_user_analysis(resolved_user_id)
+
+        errors.sort(key=lambda error: error["row"])
+        return {
+            "received": len(frame),
+            "inserted": inserted,
+            "failed": len(errors),
+            "errors": errors,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error importing transactions: {str(e)}")
+
 @router.get("/user/{user_id}", response_model=List[TransactionModel])
-async def get_user_transactions(user_id: str):
-    """Get transactions for a specific user from Supabase."""
-    sb = get_supabase()
-    if sb is None:
+async def get_user_transactions(
+    user_id: str,
+    response: Response,
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Get a user's transactions from Supabase, newest first; X-Next-Cursor is set when more exist."""
+    repo = get_repository()
+    if repo is None:
         raise HTTPException(status_code=500, detail="Supabase client not initialized")
 
+    cursor = decode_cursor(after, 2)
     try:
         # Resolve UUID
-        user_res = sb.table("users").select("id").or_(f"clerkUserId.eq.{user_id},email.eq.{user_id}").limit(1).execute()
-        if not user_res.data:
-            raise HTTPException(status_code=404, detail="User not found")
-        resolved_user_id = user_res.data[0]["id"]
+        resolved_user_id = await require_user_id(user_id)
 
-        res = sb.table("transactions").select("*").eq("userId", resolved_user_id).order("date", desc=True).limit(100).execute()
-        rows = res.data or []
+        rows = await repo.list_transactions_page(resolved_user_id, limit=limit + 1, after=cursor)
+        rows = finish_page(rows, limit, ("date", "id"), response)
         return [
             TransactionModel(
                 id=row.get("id"),
@@ -102,5 +220,23 @@ async def get_user_transactions(user_id: str):
             )
             for row in rows
         ]
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching transactions: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error fetching transactions: {str(e)}")
+
+@router.get("/user/{user_id}/export")
+async def export_user_transactions(user_id: str, format: Literal["ndjson", "csv"] = Query("ndjson", description="ndjson or csv")):
+    """Stream a user's full transaction history, oldest first, as NDJSON or CSV."""
+    repo = get_repository()
+    if repo is None:
+        raise HTTPException(status_code=500, detail="Supabase client not initialized")
+
+    # Resolve before streaming so an unknown user still gets a proper 404
+    resolved_user_id = await require_user_id(user_id)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_stream(repo, resolved_user_id, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions-{resolved_user_id}.{format}"'},
+    )
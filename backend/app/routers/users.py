@@ -1,24 +1,26 @@
 # app/routers/users.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from app.models import UserModel, UserCreate
-from typing import List
-from app.supabase_client import get_supabase
+from typing import List, Optional
+from app.repository import get_repository
+from app.user_resolver import remember_user
+from app.pagination import MAX_PAGE_SIZE, decode_cursor, finish_page
 
 router = APIRouter()
 
 @router.post("/", response_model=UserModel, status_code=201)
 async def create_user(user: UserCreate):
     """Create a new user in Supabase (users table)."""
-    sb = get_supabase()
-    if sb is None:
+    repo = get_repository()
+    if repo is None:
         raise HTTPException(status_code=500, detail="Supabase client not initialized")
 
     try:
         # Check if exists by clerkUserId or email
-        exists = sb.table("users").select("*").or_(f"clerkUserId.eq.{user.clerk_user_id},email.eq.{user.email}").limit(1).execute()
-        if exists.data:
+        data = await repo.find_user(user.clerk_user_id, user.email)
+        if data:
             # Return the existing user
-            data = exists.data[0]
+            remember_user(data.get("id"), data.get("clerkUserId"), data.get("email"))
             # Map to UserModel fields expected by frontend models
             return UserModel(
                 id=data.get("id"),
@@ -32,10 +34,10 @@ async def create_user(user: UserCreate):
             "email": user.email,
             "name": user.name,
         }
-        result = sb.table("users").insert(insert_payload).select("*").limit(1).execute()
-        if not result.data:
+        data = await repo.insert_user(insert_payload)
+        if not data:
             raise HTTPException(status_code=500, detail="Failed to create user in Supabase")
-        data = result.data[0]
+        remember_user(data.get("id"), data.get("clerkUserId"), data.get("email"))
         return UserModel(
             id=data.get("id"),
             clerk_user_id=data.get("clerkUserId"),
@@ -50,16 +52,16 @@ async def create_user(user: UserCreate):
 @router.get("/{user_id}", response_model=UserModel)
 async def get_user(user_id: str):
     """Get user by clerkUserId or email from Supabase."""
-    sb = get_supabase()
-    if sb is None:
+    repo = get_repository()
+    if repo is None:
         raise HTTPException(status_code=500, detail="Supabase client not initialized")
 
     try:
         # Search by clerkUserId then email
-        res = sb.table("users").select("*").or_(f"clerkUserId.eq.{user_id},email.eq.{user_id}").limit(1).execute()
-        if not res.data:
+        data = await repo.get_user(user_id)
+        if not data:
             raise HTTPException(status_code=404, detail="User not found")
-        data = res.data[0]
+        remember_user(data.get("id"), data.get("clerkUserId"), data.get("email"))
         return UserModel(
             id=data.get("id"),
             clerk_user_id=data.get("clerkUserId"),
@@ -72,14 +74,20 @@ async def get_user(user_id: str):
         raise HTTPException(status_code=500, detail=f"Error fetching user: {str(e)}")
 
 @router.get("/", response_model=List[UserModel])
-async def get_all_users():
-    """Get all users from Supabase (limited)."""
-    sb = get_supabase()
-    if sb is None:
+async def get_all_users(
+    response: Response,
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Get users from Supabase one page at a time, ordered by id; X-Next-Cursor is set when more exist."""
+    repo = get_repository()
+    if repo is None:
         raise HTTPException(status_code=500, detail="Supabase client not initialized")
 
+    cursor = decode_cursor(after, 1)
     try:
-        res = sb.table("users").select("id, clerkUserId, email, name").limit(100).execute()
+        users = await repo.list_users(limit=limit + 1, after_id=cursor[0] if cursor else None)
+        users = finish_page(users, limit, ("id",), response)
         return [
             UserModel(
                 id=u.get("id"),
@@ -87,7 +95,7 @@ async def get_all_users():
                 email=u.get("email"),
                 name=u.get("name") or "",
             )
-            for u in (res.data or [])
+            for u in users
         ]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching users: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,206 @@
+# app/savings_engine.py
+from datetime import datetime, timedelta
+from typing import Any, Dict, Sequence, Tuple
+
+import numpy as np
+
+from app.repository import get_repository
+from app.transaction_columns import decode_cents, decode_epoch_days
+
+
+def build_expense_matrix(user_ids: Sequence[str], rows: Sequence[Dict[str, Any]], start_day: np.datetime64, days: int) -> np.ndarray:
+	"""Bucket expense rows into a dense users x days matrix of daily totals.
+
+	Calendar days with no expenses are 0, unlike the per-user pandas path, which
+	only keeps days that have transactions.
+	"""
+	if not rows:
+		return np.zeros((len(user_ids), days), dtype=np.float64)
+	user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+	users = np.fromiter((user_index.get(r.get("userId"), -1) for r in rows), dtype=np.int64, count=len(rows))
+	offsets = decode_epoch_days([r.get("date") for r in rows]).astype(np.int64) - start_day.astype(np.int64)
+	cents = decode_cents([r.get("amount") for r in rows])
+
+	# Summed as integer cents, so daily totals carry no float rounding
+	totals = np.zeros((len(user_ids), days), dtype=np.int64)
+	keep = (users >= 0) & (offsets >= 0) & (offsets < days)
+	np.add.at(totals, (users[keep], offsets[keep]), cents[keep])
+	return totals / 100.0
+
+
+def ewma_weights(days: int, span: int = 7) -> np.ndarray:
+	"""Lower-triangular weights W so that X @ W.T equals ewm(span, adjust=False).mean() per row."""
+	alpha = 2.0 / (span + 1.0)
+	decay = 1.0 - alpha
+	lags = np.subtract.outer(np.arange(days), np.arange(days))
+	weights = np.where(lags >= 0, alpha * decay ** np.maximum(lags, 0), 0.0)
+	# The recursion is seeded with the first value, which therefore carries weight decay**t
+	weights[:, 0] = decay ** np.arange(days)
+	return weights
+
+
+def ewma_matrix(matrix: np.ndarray, span: int = 7) -> np.ndarray:
+	return matrix @ ewma_weights(matrix.shape[1], span).T
+
+
+def linear_forecast_matrix(matrix: np.ndarray, future_days: int = 7) -> np.ndarray:
+	"""Least-squares linear trend per row, extrapolated future_days past the last column."""
+	days = matrix.shape[1]
+	x = np.arange(days, dtype=np.float64)
+	x_centered = x - x.mean()
+	denom = float(x_centered @ x_centered) or 1.0
+	slope = (matrix - matrix.mean(axis=1, keepdims=True)) @ x_centered / denom
+	intercept = matrix.mean(axis=1) - slope * x.mean()
+	future_x = np.arange(days, days + future_days, dtype=np.float64)
+	return intercept[:, None] + slope[:, None] * future_x[None, :]
+
+
+def summarize_matrix(matrix: np.ndarray) -> Dict[str, np.ndarray]:
+	"""Per-user totals plus mean/max/min over active (non-zero) days."""
+	active = matrix > 0
+	active_days = active.sum(axis=1)
+	total = matrix.sum(axis=1)
+	with np.errstate(invalid="ignore", divide="ignore"):
+		average = np.where(active_days > 0, total / np.maximum(active_days, 1), 0.0)
+	max_daily = matrix.max(axis=1, initial=0.0)
+	min_daily = np.where(active_days > 0, np.where(active, matrix, np.inf).min(axis=1), 0.0)
+	return {
+		"total_spent": total,
+		"active_days": active_days,
+		"average_daily_expense": average,
+		"max_daily_expense": max_daily,
+		"min_daily_expense": min_daily,
+	}
+
+
+# ---------- per-user pipeline on plain arrays ----------
+# Unlike the matrix functions above, these keep only days that have expenses, like
+# compute_ewma / forecast_expenses in smart_saving_agent, and give bit-identical results.
+
+def bucket_daily(epoch_days: np.ndarray, cents: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+	"""Sum integer-cent amounts per epoch day; returns (sorted int32 days, int64 cent totals)."""
+	epoch_days = np.asarray(epoch_days, dtype=np.int32)
+	cents = np.asarray(cents, dtype=np.int64)
+	if epoch_days.size == 0:
+		return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+	days, inverse = np.unique(epoch_days, return_inverse=True)
+	totals = np.zeros(days.size, dtype=np.int64)
+	np.add.at(totals, inverse, cents)
+	return days, totals
+
+
+def ewma_recursive(values: np.ndarray, span: int = 7) -> np.ndarray:
+	"""ewm(span, adjust=False).mean() as pandas computes it, operation for operation.
+
+	The recursion is inherently sequential; for a few hundred days a plain loop over
+	Python floats beats any vectorised rewrite, which would also change the rounding.
+	"""
+	alpha = 1.0 / (1.0 + (span - 1) / 2.0)
+	decay = 1.0 - alpha
+	xs = np.asarray(values, dtype=np.float64).tolist()
+	if not xs:
+		return np.empty(0, dtype=np.float64)
+	out = [0.0] * len(xs)
+	weighted = out[0] = xs[0]
+	for i in range(1, len(xs)):
+		cur = xs[i]
+		if weighted != cur:
+			weighted = (decay * weighted + alpha * cur) / (decay + alpha)
+		out[i] = weighted
+	return np.array(out)
+
+
+def linear_forecast(values: np.ndarray, future_days: int = 7) -> np.ndarray:
+	"""np.polyfit trend over day index 0..n-1, evaluated at n..n+future_days-1 (empty below 2 points)."""
+	n = len(values)
+	if n < 2:
+		return np.empty(0, dtype=np.float64)
+	coef = np.polyfit(np.arange(n), values, 1)
+	return np.polyval(coef, np.arange(n, n + future_days))
+
+
+def summarize_daily(values: np.ndarray) -> Dict[str, float]:
+	if len(values) == 0:
+		return {"total_spent": 0, "average_daily_expense": 0, "max_daily_expense": 0, "min_daily_expense": 0}
+	total = values.sum()
+	return {
+		"total_spent": float(total),
+		"average_daily_expense": float(total / len(values)),
+		"max_daily_expense": float(values.max()),
+		"min_daily_expense": float(values.min()),
+	}
+
+
+def analyze_daily(epoch_days: np.ndarray, cents: np.ndarray, span: int = 7, future_days: int = 7) -> Dict[str, Any]:
+	"""Bucket, smooth, forecast and summarise one user's expenses.
+
+	epoch_days are days since 1970-01-01 (one per expense, any order) and cents are
+	integer amounts, so the daily totals are exact; amounts become floats only once
+	per day. Forecast days follow the last active day.
+	"""
+	days, totals = bucket_daily(epoch_days, cents)
+	expense = totals / 100.0
+	return {
+		"days": days,
+		"expense": expense,
+		"ewma": ewma_recursive(expense, span),
+		"forecast_days": (days[-1] + 1 + np.arange(future_days, dtype=np.int32)) if days.size >= 2 else np.empty(0, dtype=np.int32),
+		"forecast": linear_forecast(expense, future_days),
+		**summarize_daily(expense),
+	}
+
+
+def _window(days: int) -> Tuple[datetime, datetime, np.datetime64]:
+	end_date = datetime.utcnow()
+	start_date = end_date - timedelta(days=days - 1)
+	start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+	return start_date, end_date, np.datetime64(start_date.date(), "D")
+
+
+def analyze_matrix(user_ids: Sequence[str], matrix: np.ndarray, start_day: np.datetime64, span: int = 7, future_days: int = 7) -> Dict[str, Dict[str, Any]]:
+	ewma = ewma_matrix(matrix, span)
+	forecast = linear_forecast_matrix(matrix, future_days)
+	stats = summarize_matrix(matrix)
+	last_day = start_day + np.timedelta64(matrix.shape[1] - 1, "D")
+	forecast_dates = [str(last_day + np.timedelta64(i + 1, "D")) for i in range(future_days)]
+
+	results: Dict[str, Dict[str, Any]] = {}
+	for i, user_id in enumerate(user_ids):
+		results[user_id] = {
+			"user_id": user_id,
+			"total_spent": float(stats["total_spent"][i]),
+			"active_days": int(stats["active_days"][i]),
+			"average_daily_expense": float(stats["average_daily_expense"][i]),
+			"max_daily_expense": float(stats["max_daily_expense"][i]),
+			"min_daily_expense": float(stats["min_daily_expense"][i]),
+			"latest_ewma": float(ewma[i, -1]) if matrix.shape[1] else 0.0,
+			"forecast": [
+				{"date": date, "forecast_expense": float(value)}
+				for date, value in zip(forecast_dates, forecast[i])
+			],
+		}
+	return results
+
+
+async def analyze_many(user_ids: Sequence[str], days: int = 30, span: int = 7, future_days: int = 7) -> Dict[str, Any]:
+	"""Savings statistics for many users at once (user_ids are users.id UUIDs).
+
+	Expense rows for every user are loaded in one keyset-paged pass, bucketed into
+	a dense users x days matrix, and EWMA, linear-trend forecasts and summary
+	stats are computed for all users with a handful of matrix operations.
+	"""
+	repo = get_repository()
+	if repo is None:
+		raise ValueError("Supabase client not initialized")
+
+	user_ids = list(dict.fromkeys(user_ids))
+	start_date, end_date, start_day = _window(days)
+	rows = await repo.get_expense_rows_for_users(user_ids, start_date, end_date)
+	matrix = build_expense_matrix(user_ids, rows, start_day, days)
+	return {
+		"analysis_period_days": days,
+		"users": len(user_ids),
+		"rows_scanned": len(rows),
+		"results": analyze_matrix(user_ids, matrix, start_day, span, future_days),
+		"analysis_date": end_date.isoformat(),
+	}
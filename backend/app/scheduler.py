@@ -1,34 +1,83 @@
 # app/scheduler.py
+import os
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
-from app.supabase_client import get_supabase
+from app.repository import get_repository
 
 scheduler: Optional[AsyncIOScheduler] = None
 
+OVERDUE_PAGE_SIZE = int(os.getenv("OVERDUE_SWEEP_PAGE_SIZE", "1000"))
+BALANCE_RECONCILE_FIX = os.getenv("BALANCE_RECONCILE_FIX", "true").strip().lower() in ("1", "true", "yes")
 
-async def check_overdue_loans() -> None:
-	sb = get_supabase()
-	if sb is None:
-		return
+
+async def check_overdue_loans() -> Dict[str, Any]:
+	"""Mark past-due loans overdue and notify borrowers, one keyset page at a time.
+
+	Each page costs three round trips (select, bulk update, bulk insert) regardless of size.
+	"""
+	stats: Dict[str, Any] = {"loans_marked": 0, "pages": 0, "elapsed_ms": 0.0}
+	repo = get_repository()
+	if repo is None:
+		return stats
+	started = time.perf_counter()
 	now = datetime.utcnow()
-	# Find loans with due_date < now and status not repaid/overdue
-	res = sb.table("loans").select("id, amount, due_date, status, borrower_id").lt("due_date", now.isoformat()).not_.in_("status", ["repaid", "overdue"]).execute()
-	for loan in res.data or []:
-		# Mark overdue
-		sb.table("loans").update({"status": "overdue"}).eq("id", loan["id"]).execute()
-		# Notify borrower
-		sb.table("notifications").insert({
-			"user_id": loan["borrower_id"],
-			"loan_id": loan["id"],
-			"type": "loan_overdue",
-			"message": f"Loan of {loan['amount']} is overdue. Due date was {loan['due_date']}.",
-			"created_at": now.isoformat(),
-			"read": False,
-		}).execute()
+	after_id: Optional[str] = None
+	while True:
+		# Find loans with due_date < now and status not repaid/overdue
+		page = await repo.find_overdue_loans(now, after_id=after_id, limit=OVERDUE_PAGE_SIZE)
+		if not page:
+			break
+		after_id = page[-1]["id"]
+		stats["pages"] += 1
+
+		marked = await repo.mark_loans_overdue([loan["id"] for loan in page])
+		await repo.insert_notifications([
+			{
+				"user_id": loan["borrower_id"],
+				"loan_id": loan["id"],
+				"type": "loan_overdue",
+				"message": f"Loan of {loan['amount']} is overdue. Due date was {loan['due_date']}.",
+				"created_at": now.isoformat(),
+				"read": False,
+			}
+			for loan in marked
+		])
+		stats["loans_marked"] += len(marked)
+		if len(page) < OVERDUE_PAGE_SIZE:
+			break
+
+	stats["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+	print(f"🕒 Overdue sweep: {stats['loans_marked']} loans in {stats['pages']} pages ({stats['elapsed_ms']} ms)")
+	return stats
+
+
+async def reconcile_balance_totals(fix: bool = True) -> Dict[str, Any]:
+	"""Compare the maintained per-user balance totals with a full recompute from accounts.
+
+	Drift means a write bypassed the accounts trigger (e.g. a bulk SQL fix); with fix
+	each drifted total is corrected under row locks. The comparison runs inside
+	Postgres in one call.
+	"""
+	stats: Dict[str, Any] = {"drifted_users": 0, "fixed": False, "elapsed_ms": 0.0}
+	repo = get_repository()
+	if repo is None:
+		return stats
+	started = time.perf_counter()
+	drifted = await repo.reconcile_balance_totals(fix=fix)
+	stats["drifted_users"] = len(drifted)
+	stats["fixed"] = fix and bool(drifted)
+	stats["sample"] = drifted[:10]
+	stats["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+	if drifted:
+		print(f"⚠️ Balance totals drifted for {len(drifted)} users{' (fixed)' if fix else ''}: {drifted[:3]}")
+	else:
+		print(f"✅ Balance totals reconciled in {stats['elapsed_ms']}ms: no drift")
+	return stats
 
 
 def start_scheduler() -> None:
@@ -36,8 +85,9 @@ def start_scheduler() -> None:
 	scheduler = AsyncIOScheduler()
 	# Run nightly at midnight UTC
 	scheduler.add_job(check_overdue_loans, CronTrigger(hour=0, minute=0))
+	scheduler.add_job(reconcile_balance_totals, CronTrigger(hour=0, minute=30), kwargs={"fix": BALANCE_RECONCILE_FIX})
 	scheduler.start()
-	print("🕒 APScheduler started: nightly overdue loan checks enabled")
+	print("🕒 APScheduler started: nightly overdue loan checks and balance reconciliation enabled")
 
 
 def shutdown_scheduler() -> None:
@@ -1,17 +1,24 @@
 # app/simple_models.py
-from typing import List, Sequence
+from typing import Sequence
 import numpy as np
 
 
 class LinearSumModel:
 	"""Minimal linear regression-like model for inference only.
-	Stores weights and intercept and implements .predict(X) -> List[float].
+	Stores weights and intercept and implements .predict(X) -> np.ndarray.
 	"""
 
 	def __init__(self, weights: Sequence[float], intercept: float = 0.0):
-		self.weights = np.asarray(list(weights), dtype=float)
+		# Keep arrays as-is (no list() copy) so read-only memory-mapped weights stay shared
+		self.weights = np.asarray(weights, dtype=float)
 		self.intercept = float(intercept)
 
-	def predict(self, X):
-		X_arr = np.asarray(X, dtype=float)
-		return (X_arr @ self.weights + self.intercept).tolist() 
\ No newline at end of file
+	def predict(self, X) -> np.ndarray:
+		# float64 ndarrays (bulk, columnar and batched paths) are used without a copy
+		X_arr = X if isinstance(X, np.ndarray) and X.dtype == np.float64 else np.asarray(X, dtype=np.float64)
+		out = X_arr @ self.weights
+		out += self.intercept
+		return out
+
+	def __repr__(self) -> str:
+		return f"<LinearSumModel: {self.weights.shape[0]} weights>"
@@ -0,0 +1,158 @@
+# app/spending_state.py
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.repository import RepositoryError, get_repository
+
+
+# Day buckets kept per user; covers the longest analysis window (365 days)
+BUCKET_DAYS = 366
+STATE_VERSION = 3
+# Rebuild attempts before serving an unpersisted state (the data kept changing under the read)
+REBUILD_ATTEMPTS = 3
+REBUILD_PAGE_SIZE = 1000
+
+
+class SpendingState:
+	"""Per-day expense totals for a user's last BUCKET_DAYS days.
+
+	The savings analysis reads its window straight from the buckets (EWMA,
+	forecast and summary stats are computed over those daily totals), so any
+	window up to a year costs the same, and recording an expense is one bucket
+	update.
+
+	data_version is the user's transaction version (user_transaction_versions)
+	the state reflects exactly; any other version means the state is stale.
+	"""
+
+	def __init__(self, user_id: str):
+		self.user_id = user_id
+		self.data_version: Optional[int] = None
+		self.last_day: Optional[str] = None
+		self.buckets: Dict[str, float] = {}
+
+	def add_expense(self, amount: float, day: date) -> None:
+		key = day.isoformat()
+		self.buckets[key] = self.buckets.get(key, 0.0) + amount
+		if self.last_day is None or key > self.last_day:
+			self.last_day = key
+			self._prune()
+
+	def _prune(self) -> None:
+		cutoff = (date.fromisoformat(self.last_day) - timedelta(days=BUCKET_DAYS)).isoformat()
+		for key in [k for k in self.buckets if k < cutoff]:
+			del self.buckets[key]
+
+	def daily_series(self, since: date) -> List[Tuple[str, float]]:
+		"""(day, total) pairs on or after since, oldest first."""
+		start = since.isoformat()
+		return sorted((k, v) for k, v in self.buckets.items() if k >= start)
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {
+			"version": STATE_VERSION,
+			"data_version": self.data_version,
+			"last_day": self.last_day,
+			"buckets": self.buckets,
+		}
+
+	@classmethod
+	def from_dict(cls, user_id: str, data: Dict[str, Any]) -> Optional["SpendingState"]:
+		if not data or data.get("version") != STATE_VERSION:
+			return None
+		state = cls(user_id)
+		state.data_version = data.get("data_version")
+		state.last_day = data.get("last_day")
+		state.buckets = {k: float(v) for k, v in (data.get("buckets") or {}).items()}
+		return state
+
+
+def _row_day(value: Any) -> date:
+	if isinstance(value, datetime):
+		return value.date()
+	return date.fromisoformat(str(value)[:10])
+
+
+# Striped locks only avoid duplicate rebuilds within this process; correctness across
+# workers and writers comes from comparing data versions, which the database maintains.
+_locks = [asyncio.Lock() for _ in range(64)]
+
+
+def _user_lock(user_id: str) -> asyncio.Lock:
+	return _locks[hash(user_id) % len(_locks)]
+
+
+async def _fold_history(repo: Any, state: SpendingState, since: datetime) -> None:
+	"""Fill the buckets from daily_expense_totals (one row per day); raw expense rows,
+	keyset-paged, only when the RPC is not deployed."""
+	try:
+		# No upper bound, so future-dated expenses land in their buckets as rows do
+		days = await repo.get_daily_expense_totals(state.user_id, since, datetime(9999, 12, 31))
+	except RepositoryError:
+		async for page in repo.iter_transaction_pages(
+			state.user_id, columns="id,date,amount", page_size=REBUILD_PAGE_SIZE, since=since, type_="EXPENSE"
+		):
+			for row in page:
+				state.add_expense(float(row.get("amount") or 0), _row_day(row.get("date")))
+		return
+	for row in days:
+		state.add_expense(float(row.get("total") or 0), _row_day(row.get("day")))
+
+
+async def _rebuild(repo: Any, user_id: str) -> SpendingState:
+	"""Rebuild the last BUCKET_DAYS of day buckets and persist the result.
+
+	The version is read before and after the read; the state is only persisted
+	when no write landed in between, so a persisted state always matches its version.
+	"""
+	since = datetime.utcnow() - timedelta(days=BUCKET_DAYS)
+	for _ in range(REBUILD_ATTEMPTS):
+		version = await repo.get_transaction_version(user_id)
+		state = SpendingState(user_id)
+		await _fold_history(repo, state, since)
+		if await repo.get_transaction_version(user_id) == version:
+			state.data_version = version
+			await repo.upsert_spending_state(user_id, state.to_dict())
+			return state
+	# Writes keep landing; serve this read's state without persisting it
+	return state
+
+
+async def load_spending_state(user_id: str) -> SpendingState:
+	"""Read a user's persisted state, rebuilding it when missing or stale."""
+	repo = get_repository()
+	if repo is None:
+		raise ValueError("Supabase client not initialized")
+	async with _user_lock(user_id):
+		stored, version = await asyncio.gather(repo.get_spending_state(user_id), repo.get_transaction_version(user_id))
+		state = SpendingState.from_dict(user_id, stored)
+		if state is None or state.data_version != version:
+			state = await _rebuild(repo, user_id)
+		return state
+
+
+async def record_transaction(user_id: str, type_: str, amount: float, when: datetime) -> None:
+	"""Bring the persisted state up to date with one transaction the API just inserted.
+
+	Only applied when the insert is the single write since the state was built
+	(version moved by exactly one); otherwise the next read rebuilds. Expenses
+	are added to their day bucket; other types just advance data_version, so an
+	income does not leave the state one version behind.
+	"""
+	repo = get_repository()
+	if repo is None:
+		return
+	async with _user_lock(user_id):
+		try:
+			stored, version = await asyncio.gather(repo.get_spending_state(user_id), repo.get_transaction_version(user_id))
+			state = SpendingState.from_dict(user_id, stored)
+			if state is None or state.data_version is None or state.data_version != version - 1:
+				return
+			if type_ == "EXPENSE":
+				state.add_expense(amount, when.date())
+			state.data_version = version
+			await repo.upsert_spending_state(user_id, state.to_dict())
+		except Exception as exc:
+			# The version check makes a missed update harmless: the next read sees the state is stale
+			print(f"⚠️ Spending state update failed for {user_id}: {exc}")
@@ -0,0 +1,216 @@
+# app/transaction_columns.py
+from datetime import datetime
+from itertools import repeat
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Columns a TransactionColumns page is decoded from (id and date drive the keyset paging)
+PAGE_COLUMNS = "id,date,type,amount,category"
+UNKNOWN_CATEGORY = "unknown"
+
+
+# Below this magnitude x * 100 of a float64 2-decimal amount is within far less than
+# ON_GRID_TOLERANCE of its whole number of cents
+EXACT_FLOAT_LIMIT = 1e9
+# Amounts further than this (in cents) from a whole cent carry real sub-cent digits
+ON_GRID_TOLERANCE = 1e-3
+
+
+def decode_cents(values: Sequence[Any]) -> np.ndarray:
+	"""Exact int64 cents from PostgREST numeric values (JSON numbers or strings); None counts as 0.
+
+	"19.99" / 19.99 is always 1999 and "0.30000000000000004" is 30. Digits past the
+	cents are rounded half away from zero, like Postgres round(numeric, 2): "1.005"
+	and 1.005 are both 101. Amounts that are whole cents take a float fast path;
+	the rest, and anything beyond EXACT_FLOAT_LIMIT, are rounded from their decimal text.
+	"""
+	if len(values) == 0:
+		return np.empty(0, dtype=np.int64)
+	try:
+		amounts = np.nan_to_num(np.fromiter(values, dtype=np.float64, count=len(values)), nan=0.0)
+	except (TypeError, ValueError):
+		amounts = None
+	if amounts is None or np.abs(amounts).max() >= EXACT_FLOAT_LIMIT:
+		return _decode_cents_text(values)
+	scaled = amounts * 100
+	nearest = np.rint(scaled)
+	cents = nearest.astype(np.int64)
+	# Off-grid values could be ties, which only the decimal text can settle
+	off_grid = np.abs(scaled - nearest) > ON_GRID_TOLERANCE
+	if off_grid.any():
+		cents[off_grid] = _decode_cents_text(np.asarray(values, dtype=object)[off_grid])
+	return cents
+
+
+def _decode_cents_text(values: Sequence[Any]) -> np.ndarray:
+	"""Digit-wise decimal parse, rounding half away from zero past the cents.
+
+	Floats are read through str(), their shortest round-tripping decimal.
+	"""
+	text = np.char.strip(np.asarray(values, dtype=object).astype(str))
+	text = np.where(text == "None", "0", text)
+	negative = np.char.startswith(text, "-")
+	body = np.char.lstrip(text, "+-")
+	# Exponent notation (tiny/huge JSON floats) is rare enough to go through float
+	scientific = np.char.find(np.char.lower(body), "e") >= 0
+	parts = np.char.partition(np.where(scientific, "0", body), ".")
+	whole = np.where(parts[:, 0] == "", "0", parts[:, 0]).astype(np.int64)
+	thousandths = np.char.ljust(parts[:, 2], 3, "0").astype("U3").astype(np.int64)
+	cents = whole * 100 + thousandths // 10 + (thousandths % 10 >= 5)
+	if scientific.any():
+		cents[scientific] = np.rint(body[scientific].astype(np.float64) * 100).astype(np.int64)
+	return np.where(negative, -cents, cents)
+
+
+def decode_epoch_days(values: Sequence[Any]) -> np.ndarray:
+	"""int32 days since 1970-01-01 from ISO dates or timestamps (the date part as stored).
+
+	The column is truncated to "YYYY-MM-DD" bytes in one conversion and parsed by
+	numpy; parsing the same prefixes as unicode ("U10") is several times slower.
+	"""
+	if len(values) == 0:
+		return np.empty(0, dtype=np.int32)
+	try:
+		prefixes = np.array(values, dtype="S10")
+	except UnicodeEncodeError:
+		# Not an ISO date; numpy's parser reports it
+		prefixes = np.array([str(value) for value in values], dtype="U10")
+	return prefixes.astype("datetime64[D]").astype(np.int32)
+
+
+class CategoryDictionary:
+	"""Interns category names to int32 codes; a code never changes once assigned.
+
+	Shared by every TransactionColumns in the process, so codes from different
+	users and pages can be compared and grouped directly.
+	"""
+
+	def __init__(self):
+		self._codes: Dict[str, int] = {}
+		self.names: List[str] = []
+
+	def __len__(self) -> int:
+		return len(self.names)
+
+	def _intern(self, name: str) -> int:
+		code = self._codes.get(name)
+		if code is None:
+			code = self._codes[name] = len(self.names)
+			self.names.append(name)
+		return code
+
+	def encode(self, values: Sequence[Any]) -> np.ndarray:
+		"""Codes for a column of names (None is UNKNOWN_CATEGORY); each new name is interned once."""
+		if len(values) == 0:
+			return np.empty(0, dtype=np.int32)
+		try:
+			# Steady state: every name is already interned
+			return np.fromiter(map(self._codes.__getitem__, values), dtype=np.int32, count=len(values))
+		except KeyError:
+			pass
+		lookup = {name: self._intern(UNKNOWN_CATEGORY if name is None else str(name)) for name in dict.fromkeys(values)}
+		return np.fromiter(map(lookup.__getitem__, values), dtype=np.int32, count=len(values))
+
+	def decode(self, codes: np.ndarray) -> List[str]:
+		return [self.names[code] for code in np.asarray(codes).tolist()]
+
+
+CATEGORIES = CategoryDictionary()
+
+
+class TransactionColumns:
+	"""A batch of transactions as four parallel arrays, 17 bytes per transaction.
+
+	cents     int64  signed amount in cents: income positive, expense negative
+	               (the same sign convention as account balance deltas)
+	day       int32  days since 1970-01-01
+	category  int32  codes into CATEGORIES
+	expense   bool   type == "EXPENSE" (a zero amount carries no sign)
+
+	Compared with a page of PostgREST dicts (hundreds of bytes per row) this is
+	what analytics should hold on to; amounts stay exact integers until the end.
+	"""
+
+	def __init__(self, cents: np.ndarray, day: np.ndarray, category: np.ndarray, expense: np.ndarray):
+		self.cents = cents
+		self.day = day
+		self.category = category
+		self.expense = expense
+
+	@classmethod
+	def empty(cls) -> "TransactionColumns":
+		return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32), np.empty(0, dtype=bool))
+
+	@classmethod
+	def from_rows(cls, rows: Sequence[Dict[str, Any]]) -> "TransactionColumns":
+		"""Decode one result page (rows need date, type, amount and category)."""
+		if not rows:
+			return cls.empty()
+		cents = decode_cents(_column(rows, "amount"))
+		expense = np.array(_column(rows, "type"), dtype=object) == "EXPENSE"
+		return cls(
+			np.where(expense, -np.abs(cents), np.abs(cents)),
+			decode_epoch_days(_column(rows, "date")),
+			CATEGORIES.encode(_column(rows, "category")),
+			expense,
+		)
+
+	@classmethod
+	def concat(cls, parts: Sequence["TransactionColumns"]) -> "TransactionColumns":
+		if not parts:
+			return cls.empty()
+		return cls(
+			np.concatenate([p.cents for p in parts]),
+			np.concatenate([p.day for p in parts]),
+			np.concatenate([p.category for p in parts]),
+			np.concatenate([p.expense for p in parts]),
+		)
+
+	def __len__(self) -> int:
+		return len(self.cents)
+
+	@property
+	def nbytes(self) -> int:
+		return self.cents.nbytes + self.day.nbytes + self.category.nbytes + self.expense.nbytes
+
+	def select(self, mask: np.ndarray) -> "TransactionColumns":
+		return TransactionColumns(self.cents[mask], self.day[mask], self.category[mask], self.expense[mask])
+
+	def expenses(self) -> "TransactionColumns":
+		"""Only expenses (zero amounts included), with positive cents."""
+		selected = self.select(self.expense)
+		selected.cents = -selected.cents
+		return selected
+
+	def monthly_category_totals(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+		"""(month datetime64[M], category code, int64 cents total, count) per month x category, oldest first."""
+		if len(self) == 0:
+			return np.empty(0, dtype="datetime64[M]"), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+		n_categories = max(len(CATEGORIES), 1)
+		months = self.day.astype("datetime64[D]").astype("datetime64[M]")
+		# One int64 key per (month, category); sorting the keys orders by month, then category code
+		keys = months.astype(np.int64) * n_categories + self.category
+		uniques, inverse = np.unique(keys, return_inverse=True)
+		inverse = inverse.reshape(-1)
+		totals = np.zeros(len(uniques), dtype=np.int64)
+		np.add.at(totals, inverse, self.cents)
+		counts = np.bincount(inverse, minlength=len(uniques)).astype(np.int64)
+		return (uniques // n_categories).astype("datetime64[M]"), (uniques % n_categories).astype(np.int32), totals, counts
+
+
+def _column(rows: Sequence[Dict[str, Any]], key: str) -> List[Any]:
+	return list(map(dict.get, rows, repeat(key)))
+
+
+async def load_transaction_columns(repo: Any, user_id: str, since: Optional[datetime] = None, page_size: int = 1000) -> TransactionColumns:
+	"""A user's transactions (since a date, else all) decoded page by page.
+
+	Only one page of dicts is alive at a time; what is kept is the 17-byte rows.
+	"""
+	parts = [
+		TransactionColumns.from_rows(page)
+		async for page in repo.iter_transaction_pages(user_id, columns=PAGE_COLUMNS, page_size=page_size, since=since)
+	]
+	return TransactionColumns.concat(parts)
@@ -0,0 +1,129 @@
+# app/transaction_import.py
+import io
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+CSV_MEDIA_TYPES = ("text/csv", "application/csv")
+REQUIRED_COLUMNS = ("amount", "category", "transaction_type")
+# Bank exports often say "type"; description and date are optional
+COLUMN_ALIASES = {"type": "transaction_type"}
+
+
+class ImportFormatError(ValueError):
+	"""The import body cannot be read as a table of transactions at all (as opposed to bad rows)."""
+
+
+def parse_import_body(media_type: str, body: bytes) -> pd.DataFrame:
+	"""Read a CSV body (header row required) or a JSON list / {"transactions": [...]} into string-ish columns."""
+	if media_type in CSV_MEDIA_TYPES:
+		try:
+			frame = pd.read_csv(io.BytesIO(body), dtype=str, keep_default_na=False, skipinitialspace=True)
+		except (ValueError, pd.errors.ParserError) as exc:
+			raise ImportFormatError(f"Invalid CSV body: {exc}")
+	else:
+		try:
+			data = json.loads(body or b"null")
+		except ValueError as exc:
+			raise ImportFormatError(f"Invalid JSON body: {exc}")
+		if isinstance(data, dict):
+			data = data.get("transactions")
+		if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+			raise ImportFormatError('Expected a JSON list of transactions or {"transactions": [...]}')
+		frame = pd.DataFrame.from_records(data)
+
+	frame = _normalize_columns(frame)
+	missing = [c for c in REQUIRED_COLUMNS if c not in frame.columns]
+	if missing and len(frame):
+		raise ImportFormatError(f"Missing required columns: {', '.join(missing)}")
+	return frame.reset_index(drop=True)
+
+
+def _normalize_columns(frame: pd.DataFrame) -> pd.DataFrame:
+	"""Lower-case, trimmed, alias-resolved column names.
+
+	Columns that end up with the same name (JSON rows mixing "type" and
+	"transaction_type") are merged: each row takes the first non-blank value,
+	canonical spellings before aliases.
+	"""
+	names = [str(c).strip().lower() for c in frame.columns]
+	canonical = [COLUMN_ALIASES.get(name, name) for name in names]
+	if len(set(canonical)) == len(canonical):
+		return frame.set_axis(canonical, axis=1)
+	merged: Dict[str, pd.Series] = {}
+	for position in sorted(range(len(names)), key=lambda i: names[i] in COLUMN_ALIASES):
+		name, values = canonical[position], frame.iloc[:, position]
+		merged[name] = merged[name].where(~_blank(merged[name]), values) if name in merged else values
+	return pd.DataFrame(merged, index=frame.index)
+
+
+def _blank(values: pd.Series) -> np.ndarray:
+	return (values.isna() | (values.astype(str).str.strip() == "")).to_numpy()
+
+
+def build_insert_rows(frame: pd.DataFrame, user_id: str, account_id: Any, now: datetime) -> Tuple[List[Dict[str, Any]], List[int], List[Dict[str, Any]]]:
+	"""Validate every row with column-wide operations and map valid ones to insert payloads.
+
+	Returns (payloads, their row numbers, per-row errors); row numbers are 0-based
+	positions in the submitted list / CSV data rows. Payloads match create_transaction's.
+	"""
+	n_rows = len(frame)
+	if n_rows == 0:
+		return [], [], []
+
+	amount = pd.to_numeric(frame["amount"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+	bad_amount = ~np.isfinite(amount) | (amount <= 0)
+
+	kind = frame["transaction_type"].astype(str).str.strip().str.lower()
+	bad_type = ~kind.isin(["income", "expense"]).to_numpy()
+
+	category = frame["category"].where(~_blank(frame["category"]), "").astype(str).str.strip()
+	bad_category = (category == "").to_numpy()
+
+	if "date" in frame.columns:
+		no_date = _blank(frame["date"])
+		parsed = pd.to_datetime(frame["date"].where(~no_date), errors="coerce", utc=True, format="ISO8601")
+		bad_date = ~no_date & parsed.isna().to_numpy()
+		# Stored like create_transaction: naive UTC ISO timestamps
+		dates = parsed.dt.tz_convert(None).dt.strftime("%Y-%m-%dT%H:%M:%S.%f").where(~no_date, now.isoformat())
+	else:
+		bad_date = np.zeros(n_rows, dtype=bool)
+		dates = pd.Series(now.isoformat(), index=frame.index)
+
+	# Built with numpy: pandas would turn the None fill back into NaN
+	description = np.full(n_rows, None, dtype=object)
+	if "description" in frame.columns:
+		present = ~_blank(frame["description"])
+		description[present] = frame["description"].to_numpy(dtype=object)[present]
+
+	checks = (
+		(bad_amount, "amount must be a positive number"),
+		(bad_type, "transaction_type must be 'income' or 'expense'"),
+		(bad_category, "category is required"),
+		(bad_date, "date must be an ISO 8601 date or timestamp"),
+	)
+	invalid = bad_amount | bad_type | bad_category | bad_date
+	errors = [
+		{"row": int(i), "errors": [message for mask, message in checks if mask[i]]}
+		for i in np.flatnonzero(invalid)
+	]
+
+	valid = np.flatnonzero(~invalid)
+	columns = zip(
+		np.where(kind.to_numpy()[valid] == "income", "INCOME", "EXPENSE").tolist(),
+		amount[valid].tolist(),
+		description[valid].tolist(),
+		dates.to_numpy()[valid].tolist(),
+		category.to_numpy()[valid].tolist(),
+	)
+	# Every payload has the same keys, as PostgREST multi-row inserts require
+	extra = {"userId": user_id, **({"accountId": account_id} if account_id else {})}
+	rows = [
+		{"type": type_, "amount": str(value), "description": text, "date": when, "category": cat, **extra}
+		for type_, value, text, when, cat in columns
+	]
+	return rows, valid.tolist(), errors
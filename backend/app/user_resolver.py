@@ -0,0 +1,61 @@
+# app/user_resolver.py
+import os
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+
+from app.cache import SingleFlight, TTLCache
+from app.repository import get_repository
+
+
+# Identifier (clerkUserId or email) -> users.id UUID
+_cache = TTLCache(
+	maxsize=int(os.getenv("USER_RESOLVER_CACHE_SIZE", "10000")),
+	ttl=float(os.getenv("USER_RESOLVER_CACHE_TTL", "300")),
+)
+_inflight = SingleFlight()
+
+
+async def _lookup_user_id(user_identifier: str) -> Optional[str]:
+	repo = get_repository()
+	if repo is None:
+		return None
+	return await repo.get_user_id(user_identifier)
+
+
+async def resolve_user_id(user_identifier: str) -> Optional[str]:
+	"""Resolve a clerkUserId or email to the users.id UUID, or None if unknown.
+
+	Positive results are cached; concurrent lookups for the same identifier share one query.
+	Misses are not cached so a user created elsewhere becomes visible immediately.
+	"""
+	cached = _cache.get(user_identifier)
+	if cached is not None:
+		return cached
+
+	resolved = await _inflight.do(user_identifier, lambda: _lookup_user_id(user_identifier))
+	if resolved is not None:
+		_cache.set(user_identifier, resolved)
+	return resolved
+
+
+async def require_user_id(user_identifier: str) -> str:
+	"""Like resolve_user_id but raises 404 when the user does not exist."""
+	resolved = await resolve_user_id(user_identifier)
+	if resolved is None:
+		raise HTTPException(status_code=404, detail="User not found")
+	return resolved
+
+
+def remember_user(user_id: str, *identifiers: Optional[str]) -> None:
+	"""Populate the cache for every known identifier of a user."""
+	for identifier in identifiers:
+		if identifier:
+			_cache.set(identifier, user_id)
+
+
+def get_resolver_stats() -> Dict[str, Any]:
+	stats = _cache.stats()
+	stats["inflight"] = len(_inflight)
+	stats["deduplicated"] = _inflight.shared
+	return stats
@@ -0,0 +1,59 @@
+# benchmarks/bench_bulk_inference.py
+"""Compare JSON batch inference with the binary bulk endpoint (.npy, Arrow IPC).
+
+Run from the backend directory:  python -m benchmarks.bench_bulk_inference [rows]
+"""
+import io
+import json
+import sys
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.ml_model import get_feature_order
+
+try:
+	import pyarrow as pa
+except Exception:
+	pa = None  # type: ignore
+
+
+def timed(label: str, fn, payload_bytes: int) -> None:
+	started = time.perf_counter()
+	response = fn()
+	elapsed = time.perf_counter() - started
+	response.raise_for_status()
+	print(f"{label:<22} {elapsed * 1000:9.1f} ms  request={payload_bytes / 1e6:7.2f} MB  response={len(response.content) / 1e6:7.2f} MB")
+
+
+def main() -> None:
+	n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+	with TestClient(app) as client:
+		features = get_feature_order() or ["income", "rent", "groceries", "utilities"]
+		X = np.random.default_rng(0).uniform(0, 10_000, size=(n_rows, len(features)))
+		print(f"{n_rows} rows x {len(features)} features")
+
+		body = json.dumps({"batch": [dict(zip(features, row)) for row in X.tolist()]})
+		timed("json batch (dicts)", lambda: client.post("/api/predict_spending_batch", content=body, headers={"content-type": "application/json"}), len(body))
+
+		body = json.dumps({"columns": features, "rows": X.tolist()})
+		timed("json columnar", lambda: client.post("/api/predict_spending_batch", content=body, headers={"content-type": "application/json"}), len(body))
+
+		buf = io.BytesIO()
+		np.save(buf, X)
+		npy = buf.getvalue()
+		timed("bulk .npy", lambda: client.post("/api/predict_spending_bulk", content=npy, headers={"content-type": "application/x-npy"}), len(npy))
+
+		if pa is not None:
+			sink = pa.BufferOutputStream()
+			table = pa.table({name: X[:, i] for i, name in enumerate(features)})
+			with pa.ipc.new_stream(sink, table.schema) as writer:
+				writer.write_table(table)
+			arrow = sink.getvalue().to_pybytes()
+			timed("bulk arrow", lambda: client.post("/api/predict_spending_bulk", content=arrow, headers={"content-type": "application/vnd.apache.arrow.stream"}), len(arrow))
+
+
+if __name__ == "__main__":
+	main()
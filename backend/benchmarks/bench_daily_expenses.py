@@ -0,0 +1,139 @@
+# benchmarks/bench_daily_expenses.py
+"""Compare fetching raw expense rows and grouping in pandas with the daily_expense_totals RPC.
+
+Run from the backend directory:
+	python -m benchmarks.bench_daily_expenses                  # synthetic PostgREST, 80 expenses/day
+	python -m benchmarks.bench_daily_expenses <users.id> [days] # live, needs SUPABASE_URL and a key
+
+The synthetic server adds SIMULATED_RTT per request plus the wire time of the
+body at SIMULATED_MBPS, so the numbers reflect the bytes each path ships.
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import httpx
+import numpy as np
+
+from app import repository
+from app.smart_saving_agent import _daily_expenses_from_rows
+
+DAYS = 365
+PER_DAY = 80
+SIMULATED_RTT = 0.02
+SIMULATED_MBPS = 50.0
+LEGACY_COLUMNS = "date,amount,category,description,type"
+
+
+def _synthetic_rows(since: datetime, until: datetime):
+	rng = np.random.default_rng(0)
+	day = since
+	while day <= until:
+		for i in range(PER_DAY):
+			yield {
+				"date": (day + timedelta(seconds=int(rng.integers(0, 86_400)))).isoformat(),
+				"amount": f"{rng.uniform(1, 200):.2f}",
+				"category": "groceries",
+				"description": f"Card payment #{i} at a local store",
+				"type": "EXPENSE",
+			}
+		day += timedelta(days=1)
+
+
+@lru_cache(maxsize=None)
+def _synthetic_body(path: str, since: str, until: str, select: str) -> bytes:
+	"""Response bodies are built once, so timings exclude the fake server's own work."""
+	rows = _synthetic_rows(datetime.fromisoformat(since), datetime.fromisoformat(until))
+	if path == "rpc/daily_expense_totals":
+		totals = {}
+		for row in rows:
+			day = row["date"][:10]
+			total, count = totals.get(day, (0.0, 0))
+			totals[day] = (total + float(row["amount"]), count + 1)
+		body = [{"day": day, "total": round(total, 2), "tx_count": count} for day, (total, count) in sorted(totals.items())]
+	else:
+		columns = select.split(",")
+		body = [{c: row[c] for c in columns} for row in rows]
+	return json.dumps(body).encode()
+
+
+async def _synthetic_handler(request: httpx.Request) -> httpx.Response:
+	path = request.url.path.split("/rest/v1/", 1)[1]
+	if path == "rpc/daily_expense_totals":
+		args = json.loads(request.content)
+		content = _synthetic_body(path, args["p_since"], args["p_until"], "")
+	else:
+		params = request.url.params
+		since, until = (value.split(".", 1)[1] for value in params.get_list("date"))
+		content = _synthetic_body(path, since, until, params["select"])
+	await asyncio.sleep(SIMULATED_RTT + len(content) * 8 / (SIMULATED_MBPS * 1e6))
+	return httpx.Response(200, content=content, headers={"content-type": "application/json"})
+
+
+def _make_repository(live: bool) -> repository.SupabaseRepository:
+	if live:
+		repository.connect_repository()
+		repo = repository.get_repository()
+		if repo is None:
+			raise SystemExit("Set SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY / SUPABASE_ANON_KEY for a live run")
+		return repo
+	repo = repository.SupabaseRepository("http://bench.invalid", "bench")
+	repo._client = httpx.AsyncClient(base_url="http://bench.invalid/rest/v1", transport=httpx.MockTransport(_synthetic_handler))
+	return repo
+
+
+async def _legacy(repo, user_id, since, until):
+	"""The previous implementation: every column it used to select, list of dicts, then groupby."""
+	import pandas as pd
+	rows = await repo.get_transactions(user_id, since=since, until=until, type_="EXPENSE", columns=LEGACY_COLUMNS, descending=False)
+	df = pd.DataFrame([{"date": r["date"], "expense": float(r["amount"]), "category": r["category"], "description": r["description"]} for r in rows])
+	df["date"] = pd.to_datetime(df["date"])
+	return df.groupby(df["date"].dt.date)["expense"].sum()
+
+
+async def _rpc(repo, user_id, since, until):
+	return await repo.get_daily_expense_totals(user_id, since, until)
+
+
+async def _fallback(repo, user_id, since, until):
+	return await _daily_expenses_from_rows(repo, user_id, since, until)
+
+
+async def run(user_id: str, days: int, live: bool) -> None:
+	repo = _make_repository(live)
+	received = {"bytes": 0}
+
+	async def count_bytes(response: httpx.Response) -> None:
+		await response.aread()
+		received["bytes"] += len(response.content)
+
+	repo._client.event_hooks["response"].append(count_bytes)
+	until = datetime.utcnow()
+	since = until - timedelta(days=days)
+	print(f"window={days} days  {'live' if live else f'synthetic {PER_DAY} expenses/day'}")
+	for label, fn in (("raw rows (old columns)", _legacy), ("raw rows (date,amount)", _fallback), ("daily_expense_totals", _rpc)):
+		received["bytes"] = 0
+		timings = []
+		for _ in range(3):
+			started = time.perf_counter()
+			result = await fn(repo, user_id, since, until)
+			timings.append(time.perf_counter() - started)
+		print(f"{label:<24} {min(timings) * 1000:9.1f} ms  received={received['bytes'] / 3 / 1e3:9.1f} kB  days={len(result)}")
+	await repo.close()
+
+
+def main() -> None:
+	live = len(sys.argv) > 1
+	user_id = sys.argv[1] if live else "bench-user"
+	days = int(sys.argv[2]) if len(sys.argv) > 2 else DAYS
+	if live and not os.getenv("SUPABASE_URL"):
+		raise SystemExit("SUPABASE_URL is not set")
+	asyncio.run(run(user_id, days, live))
+
+
+if __name__ == "__main__":
+	main()
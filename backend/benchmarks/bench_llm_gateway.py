@@ -0,0 +1,52 @@
+# benchmarks/bench_llm_gateway.py
+"""Benchmark the LLM gateway against the old inline call pattern, without network.
+
+Run from the backend directory:  python -m benchmarks.bench_llm_gateway
+"""
+import asyncio
+import time
+
+from app.llm_gateway import LLMGateway, StubProvider
+
+LATENCY = 0.2
+REQUESTS = 200
+DISTINCT_PROMPTS = 20
+
+
+async def inline_baseline(prompts) -> float:
+	"""Old behaviour: each request performs its own blocking call on the event loop."""
+	started = time.perf_counter()
+	for _ in prompts:
+		time.sleep(LATENCY)
+	return time.perf_counter() - started
+
+
+async def gateway_run(prompts, max_concurrency: int):
+	provider = StubProvider(latency=LATENCY)
+	gateway = LLMGateway(provider, max_concurrency=max_concurrency, timeout=30.0)
+	started = time.perf_counter()
+	await asyncio.gather(*[gateway.generate(p) for p in prompts])
+	cold = time.perf_counter() - started
+
+	started = time.perf_counter()
+	await asyncio.gather(*[gateway.generate(p) for p in prompts])
+	warm = time.perf_counter() - started
+	return cold, warm, gateway.stats()
+
+
+def main() -> None:
+	prompts = [f"prompt for user {i % DISTINCT_PROMPTS}" for i in range(REQUESTS)]
+	# The baseline is linear in request count; time a slice and extrapolate
+	sample = prompts[:10]
+	baseline = asyncio.run(inline_baseline(sample)) * (REQUESTS / len(sample))
+	print(f"inline blocking (extrapolated): {baseline:8.2f}s for {REQUESTS} requests")
+	for concurrency in (1, 4, 16):
+		cold, warm, stats = asyncio.run(gateway_run(prompts, concurrency))
+		print(
+			f"gateway concurrency={concurrency:<3} cold={cold:6.2f}s warm={warm * 1000:7.2f}ms "
+			f"provider_calls={stats['provider_calls']} deduplicated={stats['deduplicated']}"
+		)
+
+
+if __name__ == "__main__":
+	main()
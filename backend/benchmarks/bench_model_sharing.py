@@ -0,0 +1,83 @@
+# benchmarks/bench_model_sharing.py
+"""Per-worker memory and cold-start time with and without memory-mapped model arrays.
+
+Starts N worker processes (spawned, like uvicorn --workers) that each load the
+same model file and hold it while every worker reports its memory. RSS counts
+shared pages in every process; PSS splits them between the processes that map
+them, so it shows the real per-worker cost. Linux only (reads /proc).
+
+Run from the backend directory:  python -m benchmarks.bench_model_sharing [workers] [weights]
+"""
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+from app.ml_model import load_model_file
+from app.simple_models import LinearSumModel
+
+
+def _proc_kb(path: str, field: str) -> int:
+	with open(path) as f:
+		for line in f:
+			if line.startswith(field + ":"):
+				return int(line.split()[1])
+	return 0
+
+
+def _worker(path: str, mmap_mode, barrier, results) -> None:
+	started = time.perf_counter()
+	model = load_model_file(path, mmap_mode=mmap_mode)
+	# One full pass over the weights, as the first request would do
+	model.predict(np.ones((1, len(model.weights))))
+	cold_start = time.perf_counter() - started
+	barrier.wait()
+	results.put((
+		cold_start,
+		_proc_kb("/proc/self/status", "VmRSS"),
+		_proc_kb("/proc/self/smaps_rollup", "Pss"),
+	))
+	# Stay alive until everyone has measured, so shared pages are counted as shared
+	barrier.wait()
+
+
+def run(path: str, workers: int, mmap_mode) -> None:
+	ctx = mp.get_context("spawn")
+	barrier = ctx.Barrier(workers)
+	results = ctx.Queue()
+	procs = [ctx.Process(target=_worker, args=(path, mmap_mode, barrier, results)) for _ in range(workers)]
+	for proc in procs:
+		proc.start()
+	rows = [results.get() for _ in procs]
+	for proc in procs:
+		proc.join()
+	cold = [r[0] for r in rows]
+	rss = [r[1] / 1024 for r in rows]
+	pss = [r[2] / 1024 for r in rows]
+	label = f"mmap_mode={mmap_mode!r}"
+	print(f"{label:<16} cold start avg {np.mean(cold) * 1000:8.1f} ms  RSS/worker {np.mean(rss):8.1f} MB  PSS/worker {np.mean(pss):8.1f} MB  PSS total {np.sum(pss):8.1f} MB")
+
+
+def main() -> None:
+	workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+	n_weights = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000_000
+	with tempfile.TemporaryDirectory() as tmp:
+		path = os.path.join(tmp, "model.pkl")
+		weights = np.random.default_rng(0).standard_normal(n_weights)
+		joblib.dump(LinearSumModel(weights, 1.0), path)
+		del weights
+		print(f"{workers} workers, model file {os.path.getsize(path) / 1e6:.1f} MB ({n_weights} float64 weights)")
+		# Warm the page cache so both modes start from the same state
+		with open(path, "rb") as f:
+			while f.read(1 << 24):
+				pass
+		run(path, workers, None)
+		run(path, workers, "r")
+
+
+if __name__ == "__main__":
+	main()
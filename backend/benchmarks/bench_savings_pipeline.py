@@ -0,0 +1,82 @@
+# benchmarks/bench_savings_pipeline.py
+"""Compare the pandas savings pipeline with the NumPy one (savings_engine.analyze_daily).
+
+Run from the backend directory:  python -m benchmarks.bench_savings_pipeline [days] [runs]
+
+Both paths get the same daily totals; tests/test_savings_engine.py checks that
+their EWMA, forecast and summary stats are bit-for-bit equal.
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from app.savings_engine import analyze_daily
+from app.smart_saving_agent import compute_ewma, forecast_expenses
+
+EXPENSES_PER_DAY = 6
+
+
+def sample_expenses(days: int, seed: int):
+	"""Epoch days and integer cents for one user: a few expenses on ~70% of days."""
+	rng = np.random.default_rng(seed)
+	start = 20_000
+	active = np.flatnonzero(rng.random(days) < 0.7) + start
+	epoch_days = np.repeat(active, EXPENSES_PER_DAY).astype(np.int32)
+	cents = rng.integers(100, 20_000, size=epoch_days.size, dtype=np.int64)
+	return epoch_days, cents
+
+
+def pandas_path(epoch_days: np.ndarray, cents: np.ndarray):
+	"""What _run_analysis does with the DataFrame from get_daily_expenses (one row per day)."""
+	df = pd.DataFrame({"date": pd.to_datetime(epoch_days, unit="D"), "expense": cents / 100.0})
+	expenses = df.groupby("date")["expense"].sum().reset_index()
+	expenses = compute_ewma(expenses)
+	forecast_df = forecast_expenses(expenses)
+	return {
+		"expense": expenses["expense"].to_numpy(),
+		"ewma": expenses["ewma"].to_numpy(),
+		"forecast": forecast_df["forecast_expense"].to_numpy(dtype=np.float64),
+		"forecast_dates": forecast_df["date"].tolist(),
+		"total_spent": float(expenses["expense"].sum()),
+		"average_daily_expense": float(expenses["expense"].mean()),
+		"max_daily_expense": float(expenses["expense"].max()),
+		"min_daily_expense": float(expenses["expense"].min()),
+		"recent_expenses": expenses.tail(10).to_dict("records"),
+		"forecast_records": forecast_df.to_dict("records"),
+	}
+
+
+def numpy_path(epoch_days: np.ndarray, cents: np.ndarray):
+	return analyze_daily(epoch_days, cents)
+
+
+def timed(fn, inputs, runs: int):
+	started = time.perf_counter()
+	for _ in range(runs):
+		for epoch_days, cents in inputs:
+			fn(epoch_days, cents)
+	elapsed = time.perf_counter() - started
+	# Separate pass: tracemalloc slows allocation-heavy code down a lot
+	tracemalloc.start()
+	fn(*inputs[0])
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return elapsed / (runs * len(inputs)), peak
+
+
+def main() -> None:
+	days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+	runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+	inputs = [sample_expenses(days, seed) for seed in range(20)]
+	print(f"window={days} days, {len(inputs)} users x {runs} runs")
+
+	for label, fn in (("pandas", pandas_path), ("numpy", numpy_path)):
+		per_call, peak = timed(fn, inputs, runs)
+		print(f"{label:<7} {per_call * 1e6:9.1f} us/analysis  peak alloc={peak / 1e3:8.1f} kB")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_transaction_columns.py
+"""Memory and decode cost of PostgREST transaction pages vs TransactionColumns.
+
+Run from the backend directory:  python -m benchmarks.bench_transaction_columns [rows]
+"""
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.transaction_columns import PAGE_COLUMNS, TransactionColumns
+
+PAGE_SIZE = 1000
+REPEAT = 5
+CATEGORY_NAMES = ["groceries", "rent", "transport", "dining", "utilities", "health", "shopping", "salary"]
+
+
+def synthetic_pages(n_rows: int):
+	"""JSON bodies as PostgREST returns them for PAGE_COLUMNS."""
+	rng = np.random.default_rng(0)
+	columns = PAGE_COLUMNS.split(",")
+	pages = []
+	for start in range(0, n_rows, PAGE_SIZE):
+		rows = []
+		for i in range(start, min(start + PAGE_SIZE, n_rows)):
+			row = {
+				"id": f"{i:08d}-7c1e-4f0b-9a51-3d2f5e6a7b8c",
+				"date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:15:00",
+				"type": "INCOME" if i % 10 == 0 else "EXPENSE",
+				"amount": round(float(rng.integers(1, 50_000)) / 100, 2),
+				"category": CATEGORY_NAMES[i % len(CATEGORY_NAMES)],
+			}
+			rows.append({c: row[c] for c in columns})
+		pages.append(json.dumps(rows).encode())
+	return pages
+
+
+def retained_bytes(build):
+	gc.collect()
+	tracemalloc.start()
+	result = build()
+	retained = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	return result, retained
+
+
+def best_of(run, repeat: int = REPEAT) -> float:
+	"""Fastest of several timed runs; a single run on a shared machine is mostly noise."""
+	timings = []
+	for _ in range(repeat):
+		started = time.perf_counter()
+		run()
+		timings.append(time.perf_counter() - started)
+	return min(timings)
+
+
+def main() -> None:
+	n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+	pages = synthetic_pages(n_rows)
+	parsed = [json.loads(body) for body in pages]
+
+	rows, dict_bytes = retained_bytes(lambda: [row for body in pages for row in json.loads(body)])
+	print(f"list of dicts        {dict_bytes / n_rows:8.1f} B/transaction")
+	columns, col_bytes = retained_bytes(lambda: TransactionColumns.concat([TransactionColumns.from_rows(json.loads(body)) for body in pages]))
+	print(f"TransactionColumns   {col_bytes / n_rows:8.1f} B/transaction  (arrays alone: {columns.nbytes / len(columns):.1f} B)")
+
+	decode = best_of(lambda: TransactionColumns.concat([TransactionColumns.from_rows(page) for page in parsed]))
+	per_row = best_of(lambda: [[(float(r["amount"]), str(r["date"])[:10], r["category"], r["type"]) for r in page] for page in parsed])
+	print(f"decode pages: vectorized {decode * 1e9 / n_rows:6.0f} ns/row   per-row float/str parsing {per_row * 1e9 / n_rows:6.0f} ns/row")
+
+	# Drift: daily expense totals accumulated as floats row by row vs exact cents
+	float_daily = {}
+	for row in rows:
+		if row["type"] == "EXPENSE":
+			day = row["date"][:10]
+			float_daily[day] = float_daily.get(day, 0.0) + row["amount"]
+	expenses = columns.expenses()
+	days, inverse = np.unique(expenses.day, return_inverse=True)
+	cents_daily = np.zeros(len(days), dtype=np.int64)
+	np.add.at(cents_daily, inverse.reshape(-1), expenses.cents)
+	exact = dict(zip(days.astype("datetime64[D]").astype(str).tolist(), (cents_daily / 100).tolist()))
+	drifted = sum(1 for day, total in float_daily.items() if total != exact[day])
+	print(f"daily expense totals: {drifted} of {len(exact)} float sums differ from the exact cents total")
+
+
+if __name__ == "__main__":
+	main()
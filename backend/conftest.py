@@ -0,0 +1,2 @@
+# conftest.py
+# Makes the `app` package importable when pytest is run from the backend directory
@@ -0,0 +1,40 @@
+# export_linear_model.py
+"""Convert a pickled linear model (sklearn linear regressor or LinearSumModel) into
+the pickle-free .npz artifact the API loads without unpickling.
+
+Run offline, on a trusted pickle only:
+	python export_linear_model.py model.pkl model.npz [--features model_features.json]
+"""
+import argparse
+import json
+
+import joblib
+
+from app.model_format import from_sklearn, load_linear_model, save_linear_model
+from app.simple_models import LinearSumModel
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("source", help="joblib/pickle file with a fitted linear model")
+	parser.add_argument("target", help="output .npz path")
+	parser.add_argument("--features", help="JSON feature list; defaults to the estimator's feature_names_in_")
+	args = parser.parse_args()
+
+	estimator = joblib.load(args.source)
+	if isinstance(estimator, LinearSumModel):
+		model, features = LinearSumModel(estimator.weights, estimator.intercept), None
+	else:
+		model, features = from_sklearn(estimator)
+	if args.features:
+		with open(args.features, "r") as f:
+			data = json.load(f)
+		features = [str(x) for x in (data["features"] if isinstance(data, dict) else data)]
+
+	save_linear_model(args.target, model, features)
+	reloaded, stored = load_linear_model(args.target)
+	print(f"Saved {reloaded.weights.shape[0]} weights (intercept {reloaded.intercept:g}) -> {args.target}; features: {stored}")
+
+
+if __name__ == "__main__":
+	main()
@@ -21,6 +21,244 @@ create table if not exists public.notifications (
   read boolean not null default false
 );
 
+-- Incrementally maintained per-user spending state (daily expense totals for the last year)
+create table if not exists public.user_spending_state (
+  user_id uuid primary key,
+  state jsonb not null,
+  updated_at timestamp with time zone not null default now()
+);
+
+-- Per-user data version for transactions: bumped once per INSERT/UPDATE/DELETE statement
+-- that touches the user's rows, by any writer (this API, the web app's Prisma client, seeds).
+-- Derived state such as user_spending_state records the version it was built from.
+create table if not exists public.user_transaction_versions (
+  user_id text primary key,
+  version bigint not null default 0
+);
+
+create or replace function public.bump_transaction_versions() returns trigger
+language plpgsql as $$
+begin
+  if tg_op = 'INSERT' then
+    insert into public.user_transaction_versions as v (user_id, version)
+    select distinct n."userId", 1 from new_rows n
+    on conflict (user_id) do update set version = v.version + 1;
+  elsif tg_op = 'UPDATE' then
+    insert into public.user_transaction_versions as v (user_id, version)
+    select "userId", 1 from (select o."userId" from old_rows o union select n."userId" from new_rows n) touched
+    on conflict (user_id) do update set version = v.version + 1;
+  else
+    insert into public.user_transaction_versions as v (user_id, version)
+    select distinct o."userId", 1 from old_rows o
+    on conflict (user_id) do update set version = v.version + 1;
+  end if;
+  return null;
+end $$;
+
+drop trigger if exists transactions_version_insert on public.transactions;
+create trigger transactions_version_insert after insert on public.transactions
+  referencing new table as new_rows
+  for each statement execute function public.bump_transaction_versions();
+drop trigger if exists transactions_version_update on public.transactions;
+create trigger transactions_version_update after update on public.transactions
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function public.bump_transaction_versions();
+drop trigger if exists transactions_version_delete on public.transactions;
+create trigger transactions_version_delete after delete on public.transactions
+  referencing old table as old_rows
+  for each statement execute function public.bump_transaction_versions();
+
+-- Supports the nightly overdue sweep (keyset-paged by id over open loans)
+create index if not exists loans_open_id_idx on public.loans (id) where status not in ('repaid', 'overdue');
+
+-- Supports the full-history export and transaction list pages (keyset on (date, id) per user)
+create index if not exists transactions_user_date_id_idx on public.transactions ("userId", date, id);
+
+-- Keyset pagination of per-user loan and notification lists (newest first by (created_at, id))
+create index if not exists loans_lender_created_id_idx on public.loans (lender_id, created_at, id);
+create index if not exists loans_borrower_created_id_idx on public.loans (borrower_id, created_at, id);
+create index if not exists notifications_user_created_id_idx on public.notifications (user_id, created_at, id);
+
+-- Per-user sum of account balances, kept current by a trigger on accounts so any
+-- writer (this API or the web app) updates it; the balance endpoint reads one row
+create table if not exists public.user_balance_totals (
+  user_id text primary key,
+  total_balance numeric not null default 0,
+  account_count integer not null default 0,
+  updated_at timestamp with time zone not null default now()
+);
+
+create or replace function public.apply_account_balance_delta() returns trigger
+language plpgsql as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') then
+    insert into public.user_balance_totals as t (user_id, total_balance, account_count)
+    values (old."userId", -old.balance, -1)
+    on conflict (user_id) do update
+      set total_balance = t.total_balance + excluded.total_balance,
+          account_count = t.account_count + excluded.account_count,
+          updated_at = now();
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') then
+    insert into public.user_balance_totals as t (user_id, total_balance, account_count)
+    values (new."userId", new.balance, 1)
+    on conflict (user_id) do update
+      set total_balance = t.total_balance + excluded.total_balance,
+          account_count = t.account_count + excluded.account_count,
+          updated_at = now();
+  end if;
+  return null;
+end $$;
+
+drop trigger if exists accounts_balance_totals on public.accounts;
+create trigger accounts_balance_totals
+  after insert or update of balance, "userId" or delete on public.accounts
+  for each row execute function public.apply_account_balance_delta();
+
+-- One-time backfill for existing accounts (no-op for users already present)
+insert into public.user_balance_totals (user_id, total_balance, account_count)
+select "userId", sum(balance), count(*) from public.accounts group by "userId"
+on conflict (user_id) do nothing;
+
+-- Atomic balance change for a transaction written by the API (income +, expense -)
+create or replace function public.increment_account_balance(p_account_id text, p_delta numeric)
+returns numeric
+language sql as $$
+  update public.accounts set balance = balance + p_delta, "updatedAt" = now()
+  where id = p_account_id
+  returning balance;
+$$;
+
+-- Compares every stored total with a full recompute from accounts; with p_fix each
+-- drifted user is corrected under row locks. Returns only the users that drifted.
+create or replace function public.reconcile_user_balance_totals(p_fix boolean default false)
+returns table (user_id text, stored_total numeric, actual_total numeric, actual_count integer)
+language plpgsql as $$
+declare
+  r record;
+  v_stored numeric;
+  v_stored_count integer;
+  v_total numeric;
+  v_count integer;
+begin
+  for r in
+    with actual as (
+      select a."userId" as uid, sum(a.balance) as total, count(*)::integer as n
+      from public.accounts a group by a."userId"
+    )
+    select coalesce(t.user_id, actual.uid) as uid, t.total_balance as stored,
+           coalesce(actual.total, 0) as total, coalesce(actual.n, 0) as n
+    from public.user_balance_totals t
+    full outer join actual on actual.uid = t.user_id
+    where t.total_balance is distinct from coalesce(actual.total, 0)
+       or t.account_count is distinct from coalesce(actual.n, 0)
+  loop
+    user_id := r.uid;
+    stored_total := r.stored;
+    actual_total := r.total;
+    actual_count := r.n;
+    return next;
+
+    if p_fix then
+      -- Accounts first, then the total: the order the accounts trigger takes them in.
+      -- With both held no account update/delete can land between recompute and write.
+      perform 1 from public.accounts a where a."userId" = r.uid for share;
+      select t.total_balance, t.account_count into v_stored, v_stored_count
+      from public.user_balance_totals t where t.user_id = r.uid for update;
+      select coalesce(sum(a.balance), 0), count(*)::integer into v_total, v_count
+      from public.accounts a where a."userId" = r.uid;
+      -- Applied as a difference, so a concurrent first insert for this user (whose
+      -- account the recompute cannot see yet) keeps its own delta
+      insert into public.user_balance_totals as t (user_id, total_balance, account_count)
+      values (r.uid, v_total - coalesce(v_stored, 0), v_count - coalesce(v_stored_count, 0))
+      on conflict on constraint user_balance_totals_pkey do update
+        set total_balance = t.total_balance + excluded.total_balance,
+            account_count = t.account_count + excluded.account_count,
+            updated_at = now();
+    end if;
+  end loop;
+end $$;
+
+-- Expense rollups per user x day x category, maintained by statement-level triggers
+-- on transactions (one grouped upsert per INSERT/UPDATE/DELETE statement, so a
+-- multi-row bulk insert costs one upsert per touched bucket, not per row)
+create table if not exists public.spending_rollups (
+  user_id text not null,
+  day date not null,
+  category text not null,
+  total numeric not null default 0,
+  tx_count integer not null default 0,
+  primary key (user_id, day, category)
+);
+
+create or replace function public.apply_spending_rollups() returns trigger
+language plpgsql as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') then
+    insert into public.spending_rollups as r (user_id, day, category, total, tx_count)
+    select o."userId", o.date::date, o.category, -sum(o.amount), -count(*)::integer
+    from old_rows o where o.type = 'EXPENSE'
+    group by 1, 2, 3
+    on conflict (user_id, day, category) do update
+      set total = r.total + excluded.total, tx_count = r.tx_count + excluded.tx_count;
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') then
+    insert into public.spending_rollups as r (user_id, day, category, total, tx_count)
+    select n."userId", n.date::date, n.category, sum(n.amount), count(*)::integer
+    from new_rows n where n.type = 'EXPENSE'
+    group by 1, 2, 3
+    on conflict (user_id, day, category) do update
+      set total = r.total + excluded.total, tx_count = r.tx_count + excluded.tx_count;
+  end if;
+  return null;
+end $$;
+
+drop trigger if exists transactions_rollups_insert on public.transactions;
+create trigger transactions_rollups_insert after insert on public.transactions
+  referencing new table as new_rows
+  for each statement execute function public.apply_spending_rollups();
+drop trigger if exists transactions_rollups_update on public.transactions;
+create trigger transactions_rollups_update after update on public.transactions
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function public.apply_spending_rollups();
+drop trigger if exists transactions_rollups_delete on public.transactions;
+create trigger transactions_rollups_delete after delete on public.transactions
+  referencing old table as old_rows
+  for each statement execute function public.apply_spending_rollups();
+
+-- One-time backfill from existing transactions (no-op for buckets already present)
+insert into public.spending_rollups (user_id, day, category, total, tx_count)
+select "userId", date::date, category, sum(amount), count(*)
+from public.transactions where type = 'EXPENSE'
+group by 1, 2, 3
+on conflict (user_id, day, category) do nothing;
+
+-- Spend by month and category since p_since; reads (days x categories) rollup rows
+create or replace function public.monthly_category_spend(p_user_id text, p_since date)
+returns table (month date, category text, total numeric, tx_count bigint)
+language sql stable as $$
+  select date_trunc('month', r.day)::date, r.category, sum(r.total), sum(r.tx_count)::bigint
+  from public.spending_rollups r
+  where r.user_id = p_user_id and r.day >= p_since
+  group by 1, 2
+  having sum(r.tx_count) > 0
+  order by 1, 2;
+$$;
+
+-- Daily expense totals for the savings analysis: one row per day with spending,
+-- instead of shipping every expense row of the window to the API
+-- (served by transactions_user_date_id_idx)
+create or replace function public.daily_expense_totals(p_user_id text, p_since timestamp, p_until timestamp)
+returns table (day date, total numeric, tx_count bigint)
+language sql stable as $$
+  select t.date::date, sum(t.amount), count(*)
+  from public.transactions t
+  where t."userId" = p_user_id and t.type = 'EXPENSE'
+    and t.date >= p_since and t.date <= p_until
+  group by 1
+  order by 1;
+$$;
+
 -- Recommended foreign keys if users table exists as public.users
 -- alter table public.loans add constraint loans_lender_fk foreign key (lender_id) references public.users(id) on delete cascade;
 -- alter table public.loans add constraint loans_borrower_fk foreign key (borrower_id) references public.users(id) on delete cascade;
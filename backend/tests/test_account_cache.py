@@ -0,0 +1,64 @@
+import asyncio
+
+from app import account_cache
+
+
+class SlowRepo:
+	def __init__(self):
+		self.balance = 10
+		self.calls = 0
+		self.release = None
+
+	async def list_accounts(self, user_id):
+		self.calls += 1
+		balance = self.balance
+		if self.release is not None:
+			await self.release.wait()
+		return [{"id": "acc", "isDefault": True, "balance": str(balance)}]
+
+
+def _use(monkeypatch, repo):
+	monkeypatch.setattr(account_cache, "get_repository", lambda: repo)
+	account_cache.invalidate_user_accounts("u")
+
+
+def test_reads_are_served_from_the_cache_until_invalidated(monkeypatch):
+	repo = SlowRepo()
+	_use(monkeypatch, repo)
+
+	async def scenario():
+		first = await account_cache.get_user_accounts("u")
+		repo.balance = 25
+		cached = await account_cache.get_user_accounts("u")
+		account_cache.invalidate_user_accounts("u")
+		return first, cached, await account_cache.get_user_accounts("u")
+
+	first, cached, after = asyncio.run(scenario())
+	assert first.default_account()["balance"] == cached.default_account()["balance"] == 10.0
+	assert after.default_account()["balance"] == 25.0
+	assert repo.calls == 2
+
+
+def test_load_racing_an_invalidation_is_not_cached(monkeypatch):
+	repo = SlowRepo()
+	_use(monkeypatch, repo)
+
+	async def scenario():
+		repo.release = asyncio.Event()
+		stale_load = asyncio.create_task(account_cache.get_user_accounts("u"))
+		await asyncio.sleep(0)
+		# Our own write lands while the load (which read balance 10) is in flight
+		repo.balance = 25
+		account_cache.invalidate_user_accounts("u")
+		fresh_load = asyncio.create_task(account_cache.get_user_accounts("u"))
+		await asyncio.sleep(0)
+		repo.release.set()
+		stale, fresh = await asyncio.gather(stale_load, fresh_load)
+		return stale, fresh, await account_cache.get_user_accounts("u")
+
+	stale, fresh, cached = asyncio.run(scenario())
+	assert stale.default_account()["balance"] == 10.0
+	assert fresh.default_account()["balance"] == 25.0
+	assert cached.default_account()["balance"] == 25.0
+	assert repo.calls == 2
+	account_cache.invalidate_user_accounts("u")
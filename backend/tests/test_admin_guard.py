@@ -0,0 +1,27 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.auth import require_admin
+
+
+def _client():
+	app = FastAPI()
+
+	@app.post("/op", dependencies=[Depends(require_admin)])
+	async def op():
+		return {"ok": True}
+
+	return TestClient(app)
+
+
+def test_disabled_without_configured_token(monkeypatch):
+	monkeypatch.delenv("ADMIN_API_TOKEN", raising=False)
+	assert _client().post("/op", headers={"X-Admin-Token": "anything"}).status_code == 404
+
+
+def test_requires_matching_token(monkeypatch):
+	monkeypatch.setenv("ADMIN_API_TOKEN", "s3cret")
+	client = _client()
+	assert client.post("/op").status_code == 403
+	assert client.post("/op", headers={"X-Admin-Token": "wrong"}).status_code == 403
+	assert client.post("/op", headers={"X-Admin-Token": "s3cret"}).status_code == 200
@@ -0,0 +1,19 @@
+from app import smart_saving_agent as agent
+
+
+def test_invalidation_changes_the_cache_key():
+	before = agent._analysis_cache_key("u-1", "u-1", 30, ("w", 1))
+	assert agent._analysis_cache_key("u-1", "u-1", 30, ("w", 1)) == before
+	agent.invalidate_user_analysis("u-1")
+	assert agent._analysis_cache_key("u-1", "u-1", 30, ("w", 1)) != before
+
+
+def test_generation_map_is_bounded_and_eviction_never_reuses_a_generation():
+	limit = agent._analysis_generation.maxsize
+	first = agent._analysis_cache_key("evicted", "evicted", 30, ("w", 1))
+	for i in range(limit + 10):
+		agent.invalidate_user_analysis(f"other-{i}")
+	assert len(agent._analysis_generation) <= limit
+	assert "evicted" not in agent._analysis_generation
+	# The evicted user gets a new generation rather than falling back to an old one
+	assert agent._analysis_cache_key("evicted", "evicted", 30, ("w", 1)) != first
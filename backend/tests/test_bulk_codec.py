@@ -0,0 +1,43 @@
+import io
+
+import numpy as np
+import pytest
+
+from app import bulk_codec
+from app.bulk_codec import BulkFormatError, decode_matrix
+
+
+def _npy(array):
+	buf = io.BytesIO()
+	np.save(buf, array)
+	return buf.getvalue()
+
+
+def _npz(**arrays):
+	buf = io.BytesIO()
+	np.savez(buf, **arrays)
+	return buf.getvalue()
+
+
+def test_npy_in_feature_order_is_decoded():
+	matrix, order = decode_matrix(bulk_codec.NPY_MEDIA_TYPE, _npy(np.ones((3, 2))), ["a", "b"], None)
+	assert order == ["a", "b"] and matrix.shape == (3, 2)
+
+
+@pytest.mark.parametrize("body", [
+	_npy(np.array([["x", "y"]])),
+	_npy(np.zeros((2, 2), dtype=[("f", "<f8")])),
+])
+def test_non_numeric_npy_is_a_format_error(body):
+	with pytest.raises(BulkFormatError):
+		decode_matrix(bulk_codec.NPY_MEDIA_TYPE, body, ["a", "b"], None)
+
+
+@pytest.mark.parametrize("body", [
+	_npz(a=np.ones((2, 2)), b=np.ones(2)),
+	_npz(a=np.array(["x", "y"]), b=np.ones(2)),
+	_npz(a=np.float64(1.0)),
+])
+def test_bad_npz_columns_are_format_errors(body):
+	with pytest.raises(BulkFormatError):
+		decode_matrix(bulk_codec.NPZ_MEDIA_TYPE, body, ["a", "b"], None)
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app import cache
+from app.cache import SingleFlight, TTLCache
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+	now = [1000.0]
+	monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+	ttl = TTLCache(maxsize=4, ttl=30)
+	ttl.set("a", 1)
+	now[0] += 29
+	assert ttl.get("a") == 1
+	now[0] += 2
+	assert ttl.get("a") is None
+	assert "a" not in ttl
+	assert (ttl.hits, ttl.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+	lru = TTLCache(maxsize=2)
+	lru.set("a", 1)
+	lru.set("b", 2)
+	lru.get("a")
+	lru.set("c", 3)
+	assert "b" not in lru and lru.get("a") == 1 and lru.get("c") == 3
+	assert lru.evictions == 1
+
+
+def test_concurrent_calls_share_one_flight():
+	flight = SingleFlight()
+	calls = []
+
+	async def load():
+		calls.append(1)
+		await asyncio.sleep(0.01)
+		return "value"
+
+	async def scenario():
+		return await asyncio.gather(*(flight.do("k", load) for _ in range(5)))
+
+	assert asyncio.run(scenario()) == ["value"] * 5
+	assert len(calls) == 1 and flight.shared == 4 and len(flight) == 0
+
+
+def test_errors_are_shared_with_waiting_callers():
+	flight = SingleFlight()
+
+	async def boom():
+		await asyncio.sleep(0.01)
+		raise ValueError("down")
+
+	async def scenario():
+		return await asyncio.gather(*(flight.do("k", boom) for _ in range(3)), return_exceptions=True)
+
+	assert all(isinstance(r, ValueError) for r in asyncio.run(scenario()))
+
+
+def test_cancelled_leader_does_not_fail_followers():
+	flight = SingleFlight()
+	calls = []
+
+	async def load():
+		calls.append(1)
+		await asyncio.sleep(0.02)
+		return len(calls)
+
+	async def scenario():
+		leader = asyncio.create_task(flight.do("k", load))
+		await asyncio.sleep(0)
+		followers = [asyncio.create_task(flight.do("k", load)) for _ in range(3)]
+		await asyncio.sleep(0.005)
+		leader.cancel()
+		with pytest.raises(asyncio.CancelledError):
+			await leader
+		return await asyncio.gather(*followers)
+
+	# One follower re-runs the call; the others join it
+	assert asyncio.run(scenario()) == [2, 2, 2]
+	assert len(calls) == 2
@@ -0,0 +1,35 @@
+import asyncio
+
+import numpy as np
+
+from app import inference_batcher
+from app.inference_batcher import PredictionBatcher
+
+
+class HangingExecutor:
+	"""Scores on the loop (no pool) and never finishes, like a wedged model call."""
+
+	def uses_pool(self, version):
+		return False
+
+	async def predict(self, version, rows):
+		await asyncio.Event().wait()
+		return np.zeros(len(rows))
+
+
+def test_stop_fails_collected_and_queued_rows(monkeypatch):
+	monkeypatch.setattr(inference_batcher, "executor", HangingExecutor())
+
+	async def scenario():
+		batcher = PredictionBatcher(max_batch_size=2, max_wait_ms=50)
+		batcher.start()
+		version = object()
+		calls = [asyncio.create_task(batcher.submit([float(i)], version)) for i in range(5)]
+		await asyncio.sleep(0.01)  # first batch is being scored, the rest wait in the queue / collector
+		await batcher.stop()
+		return await asyncio.wait_for(asyncio.gather(*calls, return_exceptions=True), 1)
+
+	results = asyncio.run(scenario())
+	assert len(results) == 5
+	for result in results:
+		assert isinstance(result, RuntimeError)
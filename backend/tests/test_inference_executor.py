@@ -0,0 +1,66 @@
+import asyncio
+import os
+
+import numpy as np
+
+from app import ml_model
+from app.inference_executor import InferenceExecutor
+from app.model_format import save_linear_model
+from app.simple_models import LinearSumModel
+
+
+def _version(path, weights):
+	save_linear_model(str(path), LinearSumModel(np.array(weights, dtype=np.float64), 0.0), ["a", "b"])
+	return ml_model._build_version(str(path), None, strict=True)
+
+
+def test_pool_scores_each_version_from_its_own_pinned_artifact(tmp_path):
+	path = tmp_path / "model.npz"
+	first = _version(path, [1.0, 1.0])
+	second = _version(path, [2.0, 2.0])  # replaces model.npz on disk
+	assert first.artifact_path != second.artifact_path
+	assert os.path.exists(first.artifact_path)
+	rows = np.array([[1.0, 2.0], [3.0, 4.0]])
+
+	async def scenario(executor):
+		try:
+			# Active, rolled back to, and active again: the same pool serves all three calls
+			results = [await executor.predict(v, rows) for v in (second, first, second)]
+			return results, executor.pool_restarts
+		finally:
+			await executor.stop()
+
+	executor = InferenceExecutor(mode="process", workers=1)
+	(new, old, again), restarts = asyncio.run(scenario(executor))
+	assert new.tolist() == [6.0, 14.0]
+	assert old.tolist() == [3.0, 7.0]
+	assert again.tolist() == new.tolist()
+	assert restarts == 0
+
+
+def test_broken_pool_is_replaced(tmp_path):
+	version = _version(tmp_path / "model.npz", [1.0, 1.0])
+	rows = np.array([[1.0, 2.0]])
+
+	async def scenario(executor):
+		try:
+			await executor.predict(version, rows)
+			for process in list(executor._pool._processes.values()):
+				process.kill()
+				process.join()
+			return await executor.predict(version, rows), executor.pool_restarts
+		finally:
+			await executor.stop()
+
+	executor = InferenceExecutor(mode="process", workers=1)
+	result, restarts = asyncio.run(scenario(executor))
+	assert result.tolist() == [3.0]
+	assert restarts == 1
+
+
+def test_dummy_fallback_is_scored_inline(tmp_path):
+	version = ml_model._build_version(str(tmp_path / "missing.pkl"), None, strict=False)
+	executor = InferenceExecutor(mode="process", workers=1)
+	assert version.artifact_path is None and not executor.uses_pool(version)
+	assert asyncio.run(executor.predict(version, [[1.0, 2.0]])).tolist() == [3.0]
+	assert executor._pool is None
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from app.model_format import ModelFormatError, from_sklearn, load_linear_model, save_linear_model
+
+
+class FakeEstimator:
+	def __init__(self, estimator_type, coef, intercept=0.0):
+		self._estimator_type = estimator_type
+		self.coef_ = np.asarray(coef, dtype=np.float64)
+		self.intercept_ = intercept
+
+
+def test_regressor_round_trips(tmp_path):
+	model, features = from_sklearn(FakeEstimator("regressor", [[0.5, 2.0]], np.array([1.0])))
+	assert model.weights.tolist() == [0.5, 2.0] and model.intercept == 1.0 and features is None
+	path = str(tmp_path / "m.npz")
+	save_linear_model(path, model, ["a", "b"])
+	loaded, stored = load_linear_model(path)
+	assert loaded.predict([[2.0, 1.0]]).tolist() == [4.0] and stored == ["a", "b"]
+
+
+def test_classifiers_are_rejected():
+	with pytest.raises(ModelFormatError, match="not a regressor"):
+		from_sklearn(FakeEstimator("classifier", [[0.5, 2.0]]))
+
+
+def test_multi_output_regressors_are_rejected():
+	with pytest.raises(ModelFormatError, match="2 targets"):
+		from_sklearn(FakeEstimator("regressor", [[0.5, 2.0], [1.0, 1.0]], np.array([0.0, 0.0])))
@@ -0,0 +1,48 @@
+import asyncio
+import json
+
+from app import notification_writer
+from app.notification_writer import NotificationWriter
+
+
+class FlakyRepo:
+	def __init__(self, failures: int):
+		self.failures = failures
+		self.inserted = []
+
+	async def insert_notifications(self, rows):
+		if self.failures > 0:
+			self.failures -= 1
+			raise RuntimeError("connection reset")
+		self.inserted.extend(rows)
+
+
+def _run(writer, repo, monkeypatch, rows):
+	monkeypatch.setattr(notification_writer, "get_repository", lambda: repo)
+
+	async def main():
+		writer.start()
+		for row in rows:
+			await writer.enqueue(row)
+		await writer.stop()
+
+	asyncio.run(main())
+
+
+def test_failed_flush_is_retried(monkeypatch):
+	repo = FlakyRepo(failures=2)
+	writer = NotificationWriter(max_batch=10, flush_interval=0.01, max_retries=3, retry_base_delay=0.001)
+	_run(writer, repo, monkeypatch, [{"message": str(i)} for i in range(5)])
+	assert len(repo.inserted) == 5
+	assert writer.retries == 2
+	assert writer.rows_failed == 0
+
+
+def test_exhausted_retries_go_to_dead_letter_file(monkeypatch, tmp_path):
+	path = tmp_path / "dead.jsonl"
+	repo = FlakyRepo(failures=100)
+	writer = NotificationWriter(max_batch=10, flush_interval=0.01, max_retries=1, retry_base_delay=0.001, dead_letter_path=str(path))
+	_run(writer, repo, monkeypatch, [{"message": str(i)} for i in range(3)])
+	assert repo.inserted == []
+	assert writer.rows_dead_lettered == 3
+	assert [json.loads(line)["message"] for line in path.read_text().splitlines()] == ["0", "1", "2"]
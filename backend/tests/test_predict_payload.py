@@ -0,0 +1,17 @@
+import pytest
+from fastapi import HTTPException
+
+from app.models import PredictBatchRequest
+from app.routers.predict import _matrix_from_payload
+
+
+def test_ragged_rows_are_rejected_with_422():
+	payload = PredictBatchRequest(columns=["a", "b"], rows=[[1.0, 2.0], [3.0]])
+	with pytest.raises(HTTPException) as err:
+		_matrix_from_payload(payload, ["a", "b"])
+	assert err.value.status_code == 422
+
+
+def test_rows_are_reordered_into_feature_order():
+	payload = PredictBatchRequest(columns=["b", "a"], rows=[[1.0, 2.0], [3.0, 4.0]])
+	assert _matrix_from_payload(payload, ["a", "b"]).tolist() == [[2.0, 1.0], [4.0, 3.0]]
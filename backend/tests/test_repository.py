@@ -0,0 +1,32 @@
+import asyncio
+import json
+
+import httpx
+
+from app.repository import SupabaseRepository
+
+
+def _recording_repo(requests):
+	async def handler(request: httpx.Request) -> httpx.Response:
+		requests.append(request)
+		return httpx.Response(200, content=json.dumps([]).encode(), headers={"content-type": "application/json"})
+
+	repo = SupabaseRepository("http://test.invalid", "key")
+	repo._client = httpx.AsyncClient(base_url="http://test.invalid/rest/v1", transport=httpx.MockTransport(handler))
+	return repo
+
+
+def test_list_users_cursor_is_an_unquoted_top_level_filter():
+	requests = []
+	repo = _recording_repo(requests)
+
+	async def scenario():
+		await repo.list_users(limit=50, after_id="2b6f0c1e-1111-4a4a-9c9c-0123456789ab")
+		await repo.list_users(limit=50)
+		await repo.close()
+
+	asyncio.run(scenario())
+	with_cursor, first_page = (r.url.params for r in requests)
+	assert with_cursor.get_list("id") == ["gt.2b6f0c1e-1111-4a4a-9c9c-0123456789ab"]
+	assert with_cursor["order"] == "id.asc" and with_cursor["limit"] == "50"
+	assert "id" not in first_page
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.savings_engine import analyze_daily
+from app.smart_saving_agent import compute_ewma, forecast_expenses
+
+
+def _sample(days, seed):
+	"""A few expenses on ~70% of days, as epoch days and integer cents."""
+	rng = np.random.default_rng(seed)
+	active = np.flatnonzero(rng.random(days) < 0.7) + 20_000
+	epoch_days = np.repeat(active, 6).astype(np.int32)
+	return epoch_days, rng.integers(100, 20_000, size=epoch_days.size, dtype=np.int64)
+
+
+@pytest.mark.parametrize("days,seed", [(1, 0), (2, 1), (30, 2), (365, 3), (365, 4)])
+def test_numpy_pipeline_matches_pandas_on_the_same_daily_totals(days, seed):
+	epoch_days, cents = _sample(days, seed)
+	# The pandas path sums floats per day; feed it exact per-day totals so both start from the same numbers
+	unique_days, inverse = np.unique(epoch_days, return_inverse=True)
+	daily_cents = np.bincount(inverse, weights=cents).astype(np.int64)
+	expenses = compute_ewma(pd.DataFrame({"date": pd.to_datetime(unique_days, unit="D"), "expense": daily_cents / 100.0}))
+	forecast_df = forecast_expenses(expenses)
+
+	fast = analyze_daily(epoch_days, cents)
+	assert np.array_equal(expenses["expense"].to_numpy(), fast["expense"])
+	assert np.array_equal(expenses["ewma"].to_numpy(), fast["ewma"])
+	assert np.array_equal(forecast_df["forecast_expense"].to_numpy(dtype=np.float64), fast["forecast"])
+	assert float(expenses["expense"].sum()) == fast["total_spent"]
+	assert float(expenses["expense"].mean()) == fast["average_daily_expense"]
+	assert float(expenses["expense"].max()) == fast["max_daily_expense"]
+	assert float(expenses["expense"].min()) == fast["min_daily_expense"]
+	epoch = pd.Timestamp("1970-01-01")
+	assert forecast_df["date"].tolist() == [epoch + timedelta(days=int(d)) for d in fast["forecast_days"]]
+
+
+def test_matrix_path_matches_pandas_per_user():
+	from app.savings_engine import analyze_matrix, build_expense_matrix
+
+	days = 30
+	start_day = np.datetime64("2025-03-01", "D")
+	rng = np.random.default_rng(5)
+	user_ids = ["u1", "u2", "u3"]
+	rows = [
+		{"userId": user, "date": f"{start_day + int(rng.integers(0, days))}T{int(rng.integers(0, 24)):02d}:00:00", "amount": f"{rng.uniform(1, 80):.2f}"}
+		for user in user_ids[:2]
+		for _ in range(40)
+	] + [{"userId": "stranger", "date": "2025-03-02", "amount": "5.00"}]
+	matrix = build_expense_matrix(user_ids, rows, start_day, days)
+	results = analyze_matrix(user_ids, matrix, start_day)
+
+	calendar = pd.date_range(str(start_day), periods=days, freq="D")
+	for user in user_ids:
+		df = pd.DataFrame([r for r in rows if r["userId"] == user], columns=["userId", "date", "amount"])
+		daily = df.assign(date=pd.to_datetime(df["date"]).dt.normalize(), amount=df["amount"].astype(float)).groupby("date")["amount"].sum()
+		dense = daily.reindex(calendar, fill_value=0.0)
+		active = dense[dense > 0]
+		got = results[user]
+		assert np.isclose(got["total_spent"], dense.sum())
+		assert got["active_days"] == len(active)
+		assert np.isclose(got["average_daily_expense"], active.mean() if len(active) else 0.0)
+		assert np.isclose(got["max_daily_expense"], dense.max())
+		assert np.isclose(got["min_daily_expense"], active.min() if len(active) else 0.0)
+		assert np.isclose(got["latest_ewma"], dense.ewm(span=7, adjust=False).mean().iloc[-1])
+		trend = np.poly1d(np.polyfit(np.arange(days), dense.to_numpy(), 1))(np.arange(days, days + 7))
+		assert np.allclose([f["forecast_expense"] for f in got["forecast"]], trend)
+		assert [f["date"] for f in got["forecast"]] == [str(d.date()) for d in pd.date_range(calendar[-1], periods=8, freq="D")[1:]]
@@ -0,0 +1,172 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app import spending_state
+from app.repository import RepositoryError
+from app.spending_state import SpendingState, load_spending_state, record_transaction
+
+
+class FakeRepo:
+	"""In-memory stand-in for the repository calls spending_state makes."""
+
+	def __init__(self, rows):
+		self.rows = list(rows)
+		self.version = 1
+		self.stored = None
+		self.page_calls = 0
+		self.upserts = 0
+		self.bump_during_read = 0
+		self.rpc_missing = False
+		self.rpc_calls = 0
+
+	async def get_transaction_version(self, user_id):
+		return self.version
+
+	async def get_spending_state(self, user_id):
+		return self.stored
+
+	async def upsert_spending_state(self, user_id, state):
+		self.upserts += 1
+		self.stored = state
+
+	async def get_daily_expense_totals(self, user_id, since, until):
+		if self.rpc_missing:
+			raise RepositoryError("Could not find the function public.daily_expense_totals")
+		self.rpc_calls += 1
+		if self.bump_during_read:
+			self.bump_during_read -= 1
+			self.version += 1
+		totals = {}
+		for row in self.rows:
+			day = row["date"][:10]
+			totals[day] = totals.get(day, 0.0) + float(row["amount"])
+		return [{"day": day, "total": f"{total:.2f}", "tx_count": 1} for day, total in sorted(totals.items())]
+
+	async def iter_transaction_pages(self, user_id, columns="*", page_size=1000, since=None, type_=None):
+		rows = sorted(self.rows, key=lambda r: r["date"])
+		for start in range(0, len(rows), page_size):
+			self.page_calls += 1
+			if self.bump_during_read:
+				self.bump_during_read -= 1
+				self.version += 1
+			yield rows[start:start + page_size]
+
+	def insert(self, amount, when):
+		self.rows.append({"date": when.isoformat(), "amount": str(amount)})
+		self.version += 1
+
+
+def _rows(n_days=40, per_day=3):
+	today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+	rng = np.random.default_rng(7)
+	return [
+		{"date": (today - timedelta(days=n_days - d, minutes=i)).isoformat(), "amount": f"{rng.uniform(1, 90):.2f}"}
+		for d in range(n_days) if d % 4 != 1
+		for i in range(per_day)
+	]
+
+
+def _total(state):
+	return round(sum(state.buckets.values()), 2)
+
+
+def _expected_total(repo):
+	return round(sum(float(r["amount"]) for r in repo.rows), 2)
+
+
+def _use(monkeypatch, repo):
+	monkeypatch.setattr(spending_state, "get_repository", lambda: repo)
+
+
+def test_buckets_match_pandas_daily_totals():
+	rows = _rows()
+	state = SpendingState("u")
+	for row in rows:
+		state.add_expense(float(row["amount"]), date.fromisoformat(row["date"][:10]))
+	df = pd.DataFrame({"date": [r["date"][:10] for r in rows], "expense": [float(r["amount"]) for r in rows]})
+	daily = df.groupby("date")["expense"].sum()
+	series = state.daily_series(date(1970, 1, 1))
+	assert [d for d, _ in series] == list(daily.index)
+	assert np.allclose([v for _, v in series], daily.to_numpy())
+	assert state.last_day == daily.index[-1]
+
+
+def test_rebuild_reads_daily_totals(monkeypatch):
+	repo = FakeRepo(_rows())
+	_use(monkeypatch, repo)
+	state = asyncio.run(load_spending_state("u"))
+	assert repo.rpc_calls == 1
+	assert repo.page_calls == 0
+	assert _total(state) == _expected_total(repo)
+	assert state.data_version == repo.version
+	assert repo.stored["data_version"] == repo.version
+
+
+def test_rebuild_falls_back_to_paging_rows_without_the_rpc(monkeypatch):
+	repo = FakeRepo(_rows())
+	repo.rpc_missing = True
+	monkeypatch.setattr(spending_state, "REBUILD_PAGE_SIZE", 7)
+	_use(monkeypatch, repo)
+	state = asyncio.run(load_spending_state("u"))
+	assert repo.page_calls > 1
+	assert _total(state) == _expected_total(repo)
+	assert state.data_version == repo.version
+	assert repo.stored["data_version"] == repo.version
+
+
+def test_stale_state_is_rebuilt_and_fresh_state_is_reused(monkeypatch):
+	repo = FakeRepo(_rows())
+	_use(monkeypatch, repo)
+	asyncio.run(load_spending_state("u"))
+	upserts = repo.upserts
+
+	asyncio.run(load_spending_state("u"))
+	assert repo.upserts == upserts  # version unchanged: no rebuild
+
+	# A write from another client (e.g. the web app) bumps the version without touching the state
+	repo.rows.pop(0)
+	repo.version += 1
+	state = asyncio.run(load_spending_state("u"))
+	assert repo.upserts == upserts + 1
+	assert _total(state) == _expected_total(repo)
+
+
+def test_rebuild_is_not_persisted_while_the_data_keeps_changing(monkeypatch):
+	repo = FakeRepo(_rows())
+	repo.bump_during_read = 100
+	_use(monkeypatch, repo)
+	state = asyncio.run(load_spending_state("u"))
+	assert _total(state) == _expected_total(repo)
+	assert repo.stored is None
+
+
+def test_record_transaction_applies_only_its_own_write(monkeypatch):
+	repo = FakeRepo(_rows())
+	_use(monkeypatch, repo)
+	asyncio.run(load_spending_state("u"))
+
+	now = datetime.utcnow()
+	repo.insert(12.5, now)
+	asyncio.run(record_transaction("u", "EXPENSE", 12.5, now))
+	assert repo.stored["data_version"] == repo.version
+	assert _total(SpendingState.from_dict("u", repo.stored)) == _expected_total(repo)
+
+	# An income is not folded but still advances the version, so no rebuild follows
+	repo.version += 1
+	asyncio.run(record_transaction("u", "INCOME", 1000.0, now))
+	assert repo.stored["data_version"] == repo.version
+	upserts = repo.upserts
+	asyncio.run(load_spending_state("u"))
+	assert repo.upserts == upserts
+
+	# Two writes since the state was built (e.g. a concurrent worker): no fold, next read rebuilds
+	repo.insert(3.0, now)
+	repo.insert(4.0, now)
+	asyncio.run(record_transaction("u", "EXPENSE", 4.0, now))
+	assert repo.stored["data_version"] == repo.version - 2
+	state = asyncio.run(load_spending_state("u"))
+	assert _total(state) == _expected_total(repo)
+	assert state.data_version == repo.version
@@ -0,0 +1,83 @@
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+import pytest
+
+from app.transaction_columns import CATEGORIES, TransactionColumns, _decode_cents_text, decode_cents, decode_epoch_days
+
+
+def _half_up_cents(text):
+	return int(Decimal(text).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) * 100)
+
+
+def test_decode_cents_exact_for_two_decimals():
+	assert decode_cents(["19.99", 19.99, "0.30000000000000004", None, "-7.10", 0, "1e2"]).tolist() == [1999, 1999, 30, 0, -710, 0, 10000]
+	assert decode_cents([]).dtype == np.int64
+
+
+@pytest.mark.parametrize("text", ["1.005", "0.125", "2.675", "-1.005", "-0.125", "10.0049", "10.0051", "0.995", "1234.565"])
+def test_float_and_text_paths_round_the_same_way(text):
+	expected = _half_up_cents(text)
+	assert decode_cents([text]).tolist() == [expected]
+	assert decode_cents([float(text)]).tolist() == [expected]
+	assert _decode_cents_text([text]).tolist() == [expected]
+
+
+def test_decode_cents_large_amounts_use_the_text_path():
+	assert decode_cents(["12345678901.235", "-98765432109.87"]).tolist() == [1234567890124, -9876543210987]
+
+
+def test_decode_epoch_days_matches_numpy_datetime_parse():
+	dates = ["1970-01-01", "2000-02-29", "2024-03-01T23:59:59", "1969-12-31", "2100-12-31 00:00:00+00", "1600-03-01"]
+	expected = np.array([d[:10] for d in dates], dtype="datetime64[D]").astype(np.int32)
+	assert decode_epoch_days(dates).tolist() == expected.tolist()
+	assert decode_epoch_days([]).dtype == np.int32
+
+
+def test_decode_epoch_days_takes_mixed_widths_and_datetime_objects():
+	values = ["2024-03-01T10:15:00", "2024-03-02T10:15:00.123456", datetime(2024, 3, 3, 23, 59), date(2024, 3, 4), "2024-03"]
+	expected = np.array(["2024-03-01", "2024-03-02", "2024-03-03", "2024-03-04", "2024-03-01"], dtype="datetime64[D]")
+	assert decode_epoch_days(values).tolist() == expected.astype(np.int32).tolist()
+	with pytest.raises(ValueError):
+		decode_epoch_days(["2024-13-01"])
+
+
+def test_category_codes_are_stable_across_pages():
+	first = CATEGORIES.encode(["stable-a", "stable-b", None])
+	assert CATEGORIES.encode(["stable-b", "stable-a", "stable-a"]).tolist() == [first[1], first[0], first[0]]
+	assert CATEGORIES.decode(CATEGORIES.encode([None, "stable-c"])) == ["unknown", "stable-c"]
+
+
+def test_expenses_keep_zero_amounts_and_flip_the_sign():
+	columns = TransactionColumns.from_rows([
+		{"date": "2025-01-03", "type": "EXPENSE", "amount": "0", "category": "fees"},
+		{"date": "2025-01-04", "type": "EXPENSE", "amount": "12.50", "category": "food"},
+		{"date": "2025-01-05", "type": "INCOME", "amount": "100", "category": "salary"},
+	])
+	assert columns.cents.tolist() == [0, -1250, 10000]
+	expenses = columns.expenses()
+	assert expenses.cents.tolist() == [0, 1250]
+	assert CATEGORIES.decode(expenses.category) == ["fees", "food"]
+
+
+def test_monthly_category_totals():
+	rows = [
+		{"date": "2025-02-10", "type": "EXPENSE", "amount": "5.00", "category": "food"},
+		{"date": "2025-01-31", "type": "EXPENSE", "amount": "1.10", "category": "food"},
+		{"date": "2025-01-01", "type": "EXPENSE", "amount": "2.20", "category": "food"},
+		{"date": "2025-01-15", "type": "EXPENSE", "amount": "3.00", "category": "rent"},
+		{"date": "2025-02-01", "type": "EXPENSE", "amount": "0", "category": "rent"},
+	]
+	expenses = TransactionColumns.concat([TransactionColumns.from_rows(rows[:2]), TransactionColumns.from_rows(rows[2:])]).expenses()
+	months, categories, totals, counts = expenses.monthly_category_totals()
+	got = list(zip(months.astype(str).tolist(), CATEGORIES.decode(categories), totals.tolist(), counts.tolist()))
+	by_month = sorted(got, key=lambda r: (r[0], r[1]))
+	assert by_month == [
+		("2025-01", "food", 330, 2),
+		("2025-01", "rent", 300, 1),
+		("2025-02", "food", 500, 1),
+		("2025-02", "rent", 0, 1),
+	]
+	assert months.astype(str).tolist() == sorted(months.astype(str).tolist())
+	assert len(TransactionColumns.empty().monthly_category_totals()[0]) == 0
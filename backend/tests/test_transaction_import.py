@@ -0,0 +1,71 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app.transaction_import import ImportFormatError, build_insert_rows, parse_import_body
+
+NOW = datetime(2025, 5, 1, 12, 0, 0)
+
+
+def _json(rows):
+	return parse_import_body("application/json", json.dumps(rows).encode())
+
+
+def _errors(rows):
+	_, _, errors = build_insert_rows(_json(rows), "user-1", "acc-1", NOW)
+	return {e["row"]: e["errors"] for e in errors}
+
+
+def _row(**overrides):
+	row = {"amount": "12.50", "category": "food", "transaction_type": "expense", "date": "2025-04-30"}
+	row.update(overrides)
+	return row
+
+
+def test_valid_rows_become_insert_payloads():
+	csv = b"Amount,Category,Type,Description\n12.5,food,Expense,lunch\n1000,salary,income,\n"
+	rows, positions, errors = build_insert_rows(parse_import_body("text/csv", csv), "user-1", "acc-1", NOW)
+	assert errors == [] and positions == [0, 1]
+	assert [(r["type"], r["amount"], r["category"], r["description"]) for r in rows] == [
+		("EXPENSE", "12.5", "food", "lunch"),
+		("INCOME", "1000.0", "salary", None),
+	]
+	assert all(r["date"] == NOW.isoformat() and r["userId"] == "user-1" and r["accountId"] == "acc-1" for r in rows)
+
+
+def test_bad_amounts():
+	errors = _errors([_row(amount="abc"), _row(amount="-5"), _row(amount="0"), _row(amount=None), _row(amount="nan")])
+	assert sorted(errors) == [0, 1, 2, 3, 4]
+	assert all(messages == ["amount must be a positive number"] for messages in errors.values())
+
+
+def test_bad_type():
+	assert _errors([_row(transaction_type="refund"), _row()]) == {0: ["transaction_type must be 'income' or 'expense'"]}
+
+
+def test_missing_category():
+	assert _errors([_row(category="  "), _row(category=None), _row()]) == {0: ["category is required"], 1: ["category is required"]}
+
+
+def test_unparseable_date():
+	errors = _errors([_row(date="yesterday"), _row(date=""), _row(date="2025-04-30T10:15:00Z")])
+	assert errors == {0: ["date must be an ISO 8601 date or timestamp"]}
+
+
+def test_description_defaults_to_none():
+	rows, _, _ = build_insert_rows(_json([_row(description=""), _row(description="  "), _row(description="rent"), _row()]), "u", None, NOW)
+	assert [r["description"] for r in rows] == [None, None, "rent", None]
+	assert all("accountId" not in r for r in rows)
+
+
+def test_rows_mixing_type_aliases_are_coalesced():
+	rows = [_row(), {"amount": "3", "category": "fees", "type": "income"}, {"amount": "4", "category": "fees", "type": "bogus"}]
+	payloads, positions, errors = build_insert_rows(_json(rows), "u", None, NOW)
+	assert positions == [0, 1] and [p["type"] for p in payloads] == ["EXPENSE", "INCOME"]
+	assert errors == [{"row": 2, "errors": ["transaction_type must be 'income' or 'expense'"]}]
+
+
+def test_missing_required_columns_is_a_format_error():
+	with pytest.raises(ImportFormatError):
+		_json([{"amount": "1"}])
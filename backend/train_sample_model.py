@@ -1,9 +1,11 @@
 # train_sample_model.py
 import json
-import pickle
+import os
 from typing import List
 
+import joblib
 import numpy as np
+from app.model_format import save_linear_model
 from app.simple_models import LinearSumModel
 
 
@@ -33,11 +35,16 @@ def main() -> None:
 
 	model = LinearSumModel(weights, intercept)
 
-	# Save model.pkl
-	with open("model.pkl", "wb") as f:
-		pickle.dump(model, f)
+	# Save model.pkl uncompressed with joblib so the weights can be memory-mapped by
+	# every worker; write-then-rename so running servers keep their mapped copy intact
+	joblib.dump(model, "model.pkl.tmp")
+	os.replace("model.pkl.tmp", "model.pkl")
 	print("Saved trained model -> model.pkl")
 
+	# Pickle-free artifact (weights, intercept and feature order); served with ML_MODEL_PATH=model.npz
+	save_linear_model("model.npz", model, features)
+	print("Saved pickle-free model -> model.npz")
+
 	# Save model_features.json
 	with open("model_features.json", "w") as f:
 		json.dump({"features": features}, f)